@@ -3,10 +3,13 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth.models import User
+from django.utils import timezone
 
 from .models import (
     Society, Service, ServiceProvider, Profile, OTP,
-    VotingRequest, Vote, Country, State, District, Circle
+    VotingRequest, Vote, Country, State, District, Circle,
+    SocietyServiceCount, VotingPolicy, ArchivedVotingRequest, ArchivedVote,
+    OutboxEvent
 )
 
 # Register your models here.
@@ -61,16 +64,19 @@ class CircleAdmin(admin.ModelAdmin):
         return obj.district.state.country.name
     get_country.short_description = 'Country'
 
+# Inline for a society's voting rules
+class VotingPolicyInline(admin.StackedInline):
+    model = VotingPolicy
+    can_delete = True
+    verbose_name_plural = 'voting policy'
+
 @admin.register(Society)
 class SocietyAdmin(admin.ModelAdmin):
     list_display = ('name', 'address', 'resident_count', 'country', 'state', 'district', 'circle')
     search_fields = ('name', 'address')
     list_filter = ('country', 'state', 'district', 'circle')
     readonly_fields = ('resident_count',)
-
-    def resident_count(self, obj):
-        return obj.profiles.count()
-    resident_count.short_description = 'Number of Residents'
+    inlines = (VotingPolicyInline,)
 
 @admin.register(Service)
 class ServiceAdmin(admin.ModelAdmin):
@@ -88,6 +94,13 @@ class ServiceProviderAdmin(admin.ModelAdmin):
         return ", ".join([society.name for society in obj.societies.all()])
     display_societies.short_description = 'Associated Societies'
 
+@admin.register(SocietyServiceCount)
+class SocietyServiceCountAdmin(admin.ModelAdmin):
+    list_display = ('society', 'service', 'approved_provider_count')
+    list_filter = ('service',)
+    search_fields = ('society__name', 'service__name')
+    readonly_fields = ('society', 'service', 'approved_provider_count')
+
 @admin.register(OTP)
 class OTPAdmin(admin.ModelAdmin):
     list_display = ('user', 'purpose', 'created_at', 'expires_at', 'is_used')
@@ -97,22 +110,65 @@ class OTPAdmin(admin.ModelAdmin):
 
 @admin.register(VotingRequest)
 class VotingRequestAdmin(admin.ModelAdmin):
-    list_display = ('request_type', 'society', 'initiated_by', 'status', 'expiry_time', 'approved_votes_count', 'rejected_votes_count')
+    list_display = ('request_type', 'society', 'initiated_by', 'status', 'expiry_time', 'approved_count', 'rejected_count')
     list_filter = ('request_type', 'status', 'society')
+    list_select_related = ('society', 'initiated_by')
     search_fields = ('society__name', 'initiated_by__username', 'resident_user__username', 'service_provider__name')
-    readonly_fields = ('created_at', 'updated_at', 'approved_votes_count', 'rejected_votes_count')
-
-    def approved_votes_count(self, obj):
-        return obj.votes.filter(vote_type='approve').count()
-    approved_votes_count.short_description = 'Approved Votes'
-
-    def rejected_votes_count(self, obj):
-        return obj.votes.filter(vote_type='reject').count()
-    rejected_votes_count.short_description = 'Rejected Votes'
+    readonly_fields = ('created_at', 'updated_at', 'approved_count', 'rejected_count')
 
 @admin.register(Vote)
 class VoteAdmin(admin.ModelAdmin):
     list_display = ('request', 'voter', 'vote_type', 'created_at')
     list_filter = ('vote_type', 'request__society')
     search_fields = ('request__id', 'voter__username', 'voter__email')
-    readonly_fields = ('created_at',)
\ No newline at end of file
+    readonly_fields = ('created_at',)
+
+    # Votes are cast through the API, which checks the request is open and
+    # settles it; deleting one here still corrects the tally (core.signals)
+    def has_add_permission(self, request, obj=None):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+# Archived voting history is read-only; rows are written by archive_voting_requests
+class ReadOnlyAdminMixin:
+    def has_add_permission(self, request, obj=None):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+class ArchivedVoteInline(ReadOnlyAdminMixin, admin.TabularInline):
+    model = ArchivedVote
+    fields = ('voter', 'vote_type', 'created_at')
+    can_delete = False
+    extra = 0
+
+@admin.register(ArchivedVotingRequest)
+class ArchivedVotingRequestAdmin(ReadOnlyAdminMixin, admin.ModelAdmin):
+    list_display = ('id', 'request_type', 'society', 'initiated_by', 'status', 'created_at', 'approved_count', 'rejected_count', 'archived_at')
+    list_filter = ('request_type', 'status', 'society')
+    list_select_related = ('society', 'initiated_by')
+    search_fields = ('id', 'society__name', 'initiated_by__username', 'resident_user__username', 'service_provider__name')
+    date_hierarchy = 'created_at'
+    inlines = (ArchivedVoteInline,)
+
+@admin.register(ArchivedVote)
+class ArchivedVoteAdmin(ReadOnlyAdminMixin, admin.ModelAdmin):
+    list_display = ('request', 'voter', 'vote_type', 'created_at')
+    list_filter = ('vote_type',)
+    list_select_related = ('request__society', 'voter')
+    search_fields = ('request__id', 'voter__username', 'voter__email')
+
+@admin.register(OutboxEvent)
+class OutboxEventAdmin(admin.ModelAdmin):
+    list_display = ('id', 'event_type', 'status', 'attempts', 'available_at', 'created_at', 'processed_at')
+    list_filter = ('status', 'event_type')
+    readonly_fields = ('event_type', 'payload', 'attempts', 'last_error', 'created_at', 'processed_at')
+    actions = ['retry_events']
+
+    @admin.action(description="Retry selected events now")
+    def retry_events(self, request, queryset):
+        updated = queryset.exclude(status='done').update(status='pending', attempts=0, available_at=timezone.now())
+        self.message_user(request, f"{updated} events queued for retry.")
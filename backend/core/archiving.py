@@ -0,0 +1,68 @@
+# backend/core/archiving.py
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from .models import VotingRequest, Vote, ArchivedVotingRequest, ArchivedVote
+
+CLOSED_STATUSES = ('approved', 'rejected', 'expired')
+
+REQUEST_FIELDS = (
+    'id', 'request_type', 'society_id', 'initiated_by_id', 'resident_user_id',
+    'service_provider_id', 'status', 'created_at', 'updated_at', 'expiry_time',
+    'approved_count', 'rejected_count',
+)
+VOTE_FIELDS = ('id', 'request_id', 'voter_id', 'vote_type', 'created_at')
+
+
+def archived_has_voted_annotation(user):
+    """Exists() expression for annotating whether `user` voted on each archived request."""
+    return Exists(ArchivedVote.objects.filter(request_id=OuterRef('pk'), voter=user))
+
+
+def archive_cutoff(now=None):
+    """Closed requests last touched before this are moved to the archive."""
+    days = getattr(settings, 'VOTING_ARCHIVE_AFTER_DAYS', 30)
+    return (now or timezone.now()) - timedelta(days=days)
+
+
+def archive_batch(cutoff, batch_size=500):
+    """
+    Moves up to `batch_size` closed requests last updated before `cutoff`,
+    with their votes, into the archive tables in one transaction. Rows locked
+    by another archiver are skipped. Returns (requests, votes) moved.
+    """
+    with transaction.atomic():
+        ids = list(
+            VotingRequest.objects.select_for_update(skip_locked=True)
+            .filter(status__in=CLOSED_STATUSES, updated_at__lt=cutoff)
+            .order_by('id')
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            return 0, 0
+
+        ArchivedVotingRequest.objects.bulk_create([
+            ArchivedVotingRequest(**row)
+            for row in VotingRequest.objects.filter(id__in=ids).values(*REQUEST_FIELDS)
+        ])
+        votes = [
+            ArchivedVote(**row)
+            for row in Vote.objects.filter(request_id__in=ids).values(*VOTE_FIELDS)
+        ]
+        ArchivedVote.objects.bulk_create(votes, batch_size=1000)
+
+        # Raw delete, skipping the collector on purpose. .delete() would load every
+        # vote to send post_delete, and the tally receiver in core.signals would
+        # then run one UPDATE per vote on requests deleted in the next statement;
+        # the copies above already hold the final tallies. It is only safe while
+        # nothing references Vote (no cascade to run) and post_delete is the only
+        # Vote signal; ArchivingTests checks both.
+        Vote.objects.filter(request_id__in=ids)._raw_delete(Vote.objects.db)
+        VotingRequest.objects.filter(id__in=ids).delete()
+
+    return len(ids), len(votes)
@@ -0,0 +1,193 @@
+# backend/core/authentication.py
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.utils import timezone
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+
+from .versions import get_version, bump_version_on_commit
+
+USER_FIELDS = tuple(field.attname for field in User._meta.concrete_fields)
+USER_ID_INDEX = USER_FIELDS.index('id')
+
+
+def token_ttl():
+    return timedelta(days=getattr(settings, 'AUTH_TOKEN_TTL_DAYS', 30))
+
+
+def token_expired(created, now=None):
+    return created < (now or timezone.now()) - token_ttl()
+
+
+def auth_version_name(user_id):
+    """Shared counter bumped whenever a user's cached credentials must be dropped."""
+    return f"auth-user:{user_id}"
+
+
+def invalidate_user_tokens(user_id):
+    """
+    Drops the user's entries in this process now and bumps their auth
+    version on commit. Other processes notice the bump only when CACHES
+    is shared between them (see core.checks); with a per-process cache
+    their entries live on until AUTH_TOKEN_CACHE_TTL runs out.
+    """
+    token_cache.discard_user(user_id)
+    bump_version_on_commit(auth_version_name(user_id))
+
+
+class CachedToken:
+    """What a token resolves to: the user's row, role and profile/provider ids."""
+    __slots__ = ('key', 'created', 'user_values', 'profile_id', 'provider_id', 'version', 'expires')
+
+    def __init__(self, key, created, user_values, profile_id, provider_id, version, expires):
+        self.key = key
+        self.created = created
+        self.user_values = user_values
+        self.profile_id = profile_id
+        self.provider_id = provider_id
+        self.version = version
+        self.expires = expires
+
+    @property
+    def user_id(self):
+        return self.user_values[USER_ID_INDEX]
+
+    @property
+    def role(self):
+        if self.profile_id is not None:
+            return 'resident'
+        if self.provider_id is not None:
+            return 'provider'
+        return None
+
+    def build_user(self):
+        """A fresh User per request, so nothing a view does to it leaks into the cache."""
+        user = User.from_db('default', USER_FIELDS, self.user_values)
+        # Known-missing relations are cached as None so hasattr() costs no query
+        if self.profile_id is None:
+            User.profile.related.set_cached_value(user, None)
+        if self.provider_id is None:
+            User.service_provider.related.set_cached_value(user, None)
+        return user
+
+    def build_token(self, user):
+        token = Token(key=self.key, user=user, created=self.created)
+        token._state.adding = False
+        return token
+
+
+class TokenCache:
+    """Bounded LRU of token key -> CachedToken whose entries also expire after a TTL."""
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, entry):
+        with self._lock:
+            self._entries[entry.key] = entry
+            self._entries.move_to_end(entry.key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def discard(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def discard_user(self, user_id):
+        with self._lock:
+            for key in [key for key, entry in self._entries.items() if entry.user_id == user_id]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = TokenCache(
+    max_size=getattr(settings, 'AUTH_TOKEN_CACHE_SIZE', 10000),
+    ttl=getattr(settings, 'AUTH_TOKEN_CACHE_TTL', 60),
+)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication that remembers what each key resolved to for
+    AUTH_TOKEN_CACHE_TTL seconds. A hit costs one cache read of the user's
+    auth version instead of the Token/User join; password changes,
+    deactivation and token rotation bump that version (see core.signals).
+    The bump reaches other worker processes only through a shared cache
+    backend, so AUTH_TOKEN_CACHE_TTL bounds how long they may trust stale
+    entries otherwise. Tokens older than AUTH_TOKEN_TTL_DAYS are refused.
+    """
+
+    def authenticate_credentials(self, key):
+        entry = token_cache.get(key)
+        if entry is not None and entry.version != get_version(auth_version_name(entry.user_id)):
+            token_cache.discard(key)
+            entry = None
+        if entry is None:
+            entry = self.load(key)
+
+        if token_expired(entry.created):
+            token_cache.discard(key)
+            raise AuthenticationFailed('Token has expired.')
+
+        user = entry.build_user()
+        if not user.is_active:
+            raise AuthenticationFailed('User inactive or deleted.')
+        return user, entry.build_token(user)
+
+    def load(self, key):
+        try:
+            user_id, created = Token.objects.values_list('user_id', 'created').get(key=key)
+        except Token.DoesNotExist:
+            raise AuthenticationFailed('Invalid token.')
+
+        # Read the version before the user row: a bump racing with this load
+        # then leaves the entry marked stale instead of caching old data as current
+        version = get_version(auth_version_name(user_id))
+        try:
+            user = User.objects.select_related('profile', 'service_provider').get(pk=user_id)
+        except User.DoesNotExist:
+            raise AuthenticationFailed('User inactive or deleted.')
+        entry = CachedToken(
+            key=key,
+            created=created,
+            user_values=tuple(getattr(user, name) for name in USER_FIELDS),
+            profile_id=getattr(getattr(user, 'profile', None), 'id', None),
+            provider_id=getattr(getattr(user, 'service_provider', None), 'id', None),
+            version=version,
+            expires=time.monotonic() + token_cache.ttl,
+        )
+        token_cache.set(entry)
+        return entry
+
+
+def issue_token(user):
+    """The user's login token, replacing it if it has expired."""
+    token, created = Token.objects.get_or_create(user=user)
+    if not created and token_expired(token.created):
+        token.delete()
+        token = Token.objects.create(user=user)
+    return token
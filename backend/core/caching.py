@@ -0,0 +1,159 @@
+# backend/core/caching.py
+
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.cache import get_conditional_response, patch_cache_control, quote_etag
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+from .versions import get_versions, bump_version_on_commit
+
+# Version names the public read endpoints are keyed by. Writes bump them
+# through core.signals, which makes every cached response built from older
+# data unreachable without having to find and delete it. Bumps made in another
+# process (web worker, outbox worker, sweeper) are seen here only because the
+# counters live in the shared default cache; see core.versions.
+SOCIETIES_VERSION = 'societies'
+SOCIETY_VERSION = 'society:{pk}'
+CATALOG_VERSION = 'catalog'
+
+RESPONSE_CACHE_KEY = 'core:response:{digest}'
+
+
+def get_response_cache():
+    return caches[getattr(settings, 'RESPONSE_CACHE_ALIAS', 'default')]
+
+
+def version_etag(versions):
+    """ETag for a response that only depends on the given version counters."""
+    return 'v-' + hashlib.md5(
+        ','.join(f"{name}={versions[name]}" for name in sorted(versions)).encode()
+    ).hexdigest()
+
+
+def conditional_response(request, build, etag, last_modified=None, private=False):
+    """
+    Answers If-None-Match / If-Modified-Since with 304 before build() runs,
+    otherwise calls build() and stamps a 200 with ETag and Last-Modified.
+    Clients are told to revalidate every time (Cache-Control: no-cache).
+    """
+    etag = quote_etag(etag)
+    response = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=int(last_modified.timestamp()) if last_modified else None
+    )
+    if response is None:
+        response = build()
+        if response.status_code != 200:
+            return response
+
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    if private:
+        patch_cache_control(response, private=True, no_cache=True)
+    else:
+        patch_cache_control(response, public=True, no_cache=True)
+    return response
+
+
+def response_cache_key(request, versions):
+    parts = [
+        request.get_host(),
+        request.path,
+        '&'.join(f"{key}={value}" for key, value in sorted(request.GET.lists())),
+        ','.join(f"{name}={versions[name]}" for name in sorted(versions)),
+    ]
+    digest = hashlib.md5('|'.join(parts).encode()).hexdigest()
+    return RESPONSE_CACHE_KEY.format(digest=digest)
+
+
+def cache_response(request, version_names, build, last_modified=None):
+    """
+    Returns the cached response data for this GET if the named versions have
+    not moved since it was stored, otherwise calls build() and caches a 200.
+    Either way the response carries a version ETag and If-None-Match is
+    answered with 304 without building or reading the cached body.
+    """
+    if request.method != 'GET':
+        return build()
+
+    versions = get_versions(version_names)
+
+    def build_cached():
+        response_cache = get_response_cache()
+        key = response_cache_key(request, versions)
+        data = response_cache.get(key)
+        if data is not None:
+            return Response(data)
+
+        response = build()
+        if response.status_code == 200:
+            response_cache.set(key, response.data, getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 600))
+        return response
+
+    return conditional_response(request, build_cached, version_etag(versions), last_modified)
+
+
+def row_last_modified(model):
+    """`last_modified` callable for cached_response reading the pk row's updated_at."""
+    def last_modified(pk=None, **kwargs):
+        try:
+            return model.objects.filter(pk=pk).values_list('updated_at', flat=True).first()
+        except (TypeError, ValueError):
+            return None
+    return last_modified
+
+
+def cached_response(*version_names, last_modified=None):
+    """
+    Decorator for view methods. Version names may use URL kwargs, e.g.
+    SOCIETY_VERSION ('society:{pk}'). `last_modified(**kwargs)` may return
+    the datetime sent as Last-Modified.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(view, request, *args, **kwargs):
+            names = [name.format(**kwargs) for name in version_names]
+            modified = last_modified(**kwargs) if last_modified and request.method == 'GET' else None
+            return cache_response(request, names, lambda: func(view, request, *args, **kwargs), modified)
+        return wrapper
+    return decorator
+
+
+class CachedResponseMixin:
+    """
+    Caches list and retrieve responses keyed by the view's `cache_versions`.
+    If the model has an `updated_at` column, retrieve also sends it as
+    Last-Modified (one indexed row read).
+    """
+    cache_versions = ()
+
+    def get_last_modified(self, pk):
+        model = self.queryset.model
+        if not any(field.name == 'updated_at' for field in model._meta.fields):
+            return None
+        return row_last_modified(model)(pk=pk)
+
+    def list(self, request, *args, **kwargs):
+        build = super().list
+        return cache_response(request, self.cache_versions, lambda: build(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        build = super().retrieve
+        last_modified = self.get_last_modified(kwargs.get(self.lookup_field)) if request.method == 'GET' else None
+        return cache_response(request, self.cache_versions, lambda: build(request, *args, **kwargs), last_modified)
+
+
+def bump_society_versions(society_ids):
+    """Invalidates the society list and the given societies' detail endpoints."""
+    society_ids = set(society_ids)
+    if not society_ids:
+        return
+    bump_version_on_commit(SOCIETIES_VERSION)
+    for society_id in society_ids:
+        bump_version_on_commit(SOCIETY_VERSION.format(pk=society_id))
@@ -0,0 +1,73 @@
+# backend/core/changes.py
+
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db.models import Q
+from django.utils import timezone
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 500
+
+# updated_at is stamped before commit, so a slow transaction can commit a row
+# older than one already returned. The cursor never moves past now - GRACE;
+# rows inside that window are sent again on the next poll.
+COMMIT_GRACE = timedelta(seconds=5)
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(updated_at, pk):
+    return f"{(updated_at - _EPOCH) // _MICROSECOND}.{pk}"
+
+
+def decode_cursor(cursor):
+    try:
+        micros, pk = cursor.split('.')
+        return _EPOCH + timedelta(microseconds=int(micros)), int(pk)
+    except (ValueError, OverflowError):
+        raise InvalidCursor(f"Invalid cursor: {cursor!r}.")
+
+
+def initial_cursor(now=None):
+    return encode_cursor((now or timezone.now()) - COMMIT_GRACE, 0)
+
+
+def voting_request_changes(queryset, cursor, limit=DEFAULT_LIMIT, now=None):
+    """
+    Rows of `queryset` changed after `cursor`, oldest first, scanning the
+    (updated_at, id) index. Returns (rows, next_cursor, has_more); the next
+    cursor is never earlier than `cursor` and never inside the grace window.
+    """
+    now = now or timezone.now()
+    since, since_pk = decode_cursor(cursor)
+    limit = max(1, min(limit, MAX_LIMIT))
+
+    rows = list(
+        queryset.filter(Q(updated_at__gt=since) | Q(updated_at=since, id__gt=since_pk))
+        .order_by('updated_at', 'id')[:limit + 1]
+    )
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    next_position = (since, since_pk)
+    if rows:
+        next_position = max(next_position, (rows[-1].updated_at, rows[-1].id))
+    # Hold the cursor back by the grace window so late commits are not skipped,
+    # on every page: a full page can end inside the window too
+    held_back = min(next_position, (now - COMMIT_GRACE, 0))
+    if held_back < next_position:
+        # What is left is inside the window and comes again on the next poll
+        has_more = False
+    next_position = max((since, since_pk), held_back)
+
+    return rows, encode_cursor(*next_position), has_more
+
+
+def cursor_time(cursor):
+    """The updated_at position of a cursor returned by voting_request_changes()."""
+    return decode_cursor(cursor)[0]
@@ -0,0 +1,41 @@
+# backend/core/checks.py
+
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+# Backends that keep their data inside one process
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def process_local_cache():
+    """The default cache's backend if it is local to each process, else None."""
+    backend = settings.CACHES.get('default', {}).get('BACKEND')
+    return backend if backend in PROCESS_LOCAL_CACHES else None
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    The version counters in core.versions (auth versions, society and
+    location versions) only reach other processes through a shared default
+    cache. That includes run_outbox_worker and run_voting_sweeper, which
+    apply approvals and expiries even under runserver, so DEBUG is no excuse.
+    """
+    backend = process_local_cache()
+    if backend is None:
+        return []
+    return [
+        Warning(
+            f"The default cache ({backend}) is local to each process.",
+            hint=(
+                "Password changes, token rotation and cached responses are then only "
+                "invalidated in the process that made the change; web workers keep "
+                "serving stale entries after run_outbox_worker or run_voting_sweeper "
+                "applies a change. Use a shared backend such as DatabaseCache or RedisCache."
+            ),
+            id='core.W001',
+        )
+    ]
@@ -0,0 +1,75 @@
+# backend/core/context.py
+
+from django.core.exceptions import ObjectDoesNotExist
+from django.utils.functional import cached_property
+
+RESIDENT = 'resident'
+PROVIDER = 'provider'
+
+
+class UserContext:
+    """
+    Facts about the requesting user, each looked up on first use and then
+    remembered for the rest of the request: role, profile, provider and the
+    ids of the societies the user is a resident of.
+    """
+
+    def __init__(self, user):
+        self.user = user
+
+    @cached_property
+    def profile(self):
+        if not self.user.is_authenticated:
+            return None
+        try:
+            return self.user.profile
+        except ObjectDoesNotExist:
+            return None
+
+    @cached_property
+    def provider(self):
+        if not self.user.is_authenticated:
+            return None
+        try:
+            return self.user.service_provider
+        except ObjectDoesNotExist:
+            return None
+
+    @cached_property
+    def role(self):
+        if self.profile is not None:
+            return RESIDENT
+        if self.provider is not None:
+            return PROVIDER
+        return None
+
+    @property
+    def is_resident(self):
+        return self.profile is not None
+
+    @property
+    def is_provider(self):
+        return self.provider is not None
+
+    @cached_property
+    def society_ids(self):
+        """Societies the user is a resident of; empty for everyone else."""
+        if self.profile is None:
+            return frozenset()
+        return frozenset(self.profile.societies.values_list('id', flat=True))
+
+
+def get_user_context(request):
+    """
+    The UserContext for `request`, built once and kept on the underlying
+    HttpRequest so the view, its serializers and helpers all share it.
+    Works with both DRF and plain Django requests; a context built before
+    authentication ran (for an anonymous user) is replaced.
+    """
+    http_request = getattr(request, '_request', request)
+    user = request.user
+    context = getattr(http_request, '_user_context', None)
+    if context is None or context.user is not user:
+        context = UserContext(user)
+        http_request._user_context = context
+    return context
@@ -0,0 +1,83 @@
+# backend/core/counters.py
+
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Now
+
+from .models import Society, Profile, ServiceProvider, SocietyServiceCount
+
+SocietyMembership = Profile.societies.through
+ProviderService = ServiceProvider.services.through
+
+
+def resident_count_subquery():
+    return Coalesce(
+        Subquery(
+            SocietyMembership.objects.filter(society_id=OuterRef('pk'))
+            .order_by()
+            .values('society_id')
+            .annotate(count=Count('*'))
+            .values('count')
+        ),
+        0
+    )
+
+
+def refresh_resident_counts(society_ids=None):
+    """
+    Recomputes Society.resident_count from the membership table. Each call
+    is a full recount of the societies it covers, not a +1/-1 adjustment, so
+    it also repairs any drift. Pass society_ids to limit it to the societies
+    a change touched. As in refresh_service_counts, the society rows are
+    locked before counting, so of two concurrent membership changes the
+    later recount waits for the earlier commit and counts both.
+    """
+    queryset = Society.objects.all()
+    if society_ids is not None:
+        society_ids = sorted(set(society_ids))
+        if not society_ids:
+            return 0
+        queryset = queryset.filter(id__in=society_ids)
+
+    with transaction.atomic():
+        list(queryset.order_by('id').select_for_update().values_list('id', flat=True))
+        return queryset.update(resident_count=resident_count_subquery(), updated_at=Now())
+
+
+def refresh_service_counts(society_ids):
+    """
+    Rebuilds the SocietyServiceCount rows of the given societies from the
+    provider tables: a full recount per society, not an adjustment of the
+    stored counts. The society rows are locked first so concurrent
+    refreshes of the same society run one after the other and the later one
+    always reads the earlier one's committed changes.
+    """
+    society_ids = sorted(set(society_ids))
+    if not society_ids:
+        return
+
+    with transaction.atomic():
+        list(Society.objects.filter(id__in=society_ids).order_by('id').select_for_update().values_list('id', flat=True))
+
+        counts = ProviderService.objects.filter(
+            serviceprovider__is_approved=True,
+            serviceprovider__societies__in=society_ids,
+        ).values('serviceprovider__societies', 'service_id').annotate(
+            count=Count('serviceprovider_id', distinct=True)
+        )
+
+        # Zero everything first so services that lost their last provider drop out
+        SocietyServiceCount.objects.filter(society_id__in=society_ids).update(approved_provider_count=0)
+        SocietyServiceCount.objects.bulk_create(
+            [
+                SocietyServiceCount(
+                    society_id=row['serviceprovider__societies'],
+                    service_id=row['service_id'],
+                    approved_provider_count=row['count'],
+                )
+                for row in counts
+            ],
+            update_conflicts=True,
+            unique_fields=['society', 'service'],
+            update_fields=['approved_provider_count'],
+        )
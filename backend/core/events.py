@@ -0,0 +1,298 @@
+# backend/core/events.py
+
+import asyncio
+import json
+import select
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, connections, transaction
+from django.utils.module_loading import import_string
+
+from .models import VotingRequest
+
+# Event types pushed to /api/votingrequests/stream/
+CREATED = 'voting_request.created'
+UPDATED = 'voting_request.updated'
+SETTLED = 'voting_request.settled'
+
+# Fields sent with every voting request event
+EVENT_FIELDS = (
+    'id', 'request_type', 'society_id', 'initiated_by_id', 'resident_user_id',
+    'service_provider_id', 'status', 'approved_count', 'rejected_count',
+    'expiry_time', 'updated_at',
+)
+
+_broker = None
+_broker_lock = threading.Lock()
+
+# Stream tickets stand in for the auth token in the stream URL, which
+# EventSource cannot send as a header and which would end up in access logs
+STREAM_TICKET_SALT = 'core.events.stream-ticket'
+STREAM_TICKET_MAX_AGE = 60
+
+
+def society_topic(society_id):
+    return f"society:{society_id}"
+
+
+def user_topic(user_id):
+    return f"user:{user_id}"
+
+
+class Subscription:
+    """
+    One stream's mailbox. Events are handed over to the subscriber's event
+    loop, so publish() is safe to call from any thread. A subscriber that
+    falls QUEUE_SIZE events behind is flagged `overflowed` and should resync.
+    """
+    QUEUE_SIZE = 100
+
+    def __init__(self, broker, loop):
+        self.broker = broker
+        self.loop = loop
+        self.queue = asyncio.Queue(self.QUEUE_SIZE)
+        self.topics = set()
+        self.overflowed = False
+
+    def deliver(self, event):
+        self.loop.call_soon_threadsafe(self._put, event)
+
+    def _put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    async def get(self, timeout):
+        """The next event, or None if nothing arrived within `timeout` seconds."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def add_topic(self, topic):
+        self.broker.add_topic(self, topic)
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker:
+    """
+    Fans events out to the streams connected to this process. Events
+    published by any other process (another ASGI worker, run_voting_sweeper,
+    run_outbox_worker) never reach them; use PostgresBroker for that.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._topics = defaultdict(set)
+
+    def has_subscribers(self):
+        return bool(self._topics)
+
+    def subscribe(self, topics, loop=None):
+        """Subscribes to `topics`; events are delivered on `loop` (default: the running one)."""
+        subscription = Subscription(self, loop or asyncio.get_running_loop())
+        for topic in topics:
+            self.add_topic(subscription, topic)
+        return subscription
+
+    def add_topic(self, subscription, topic):
+        with self._lock:
+            self._topics[topic].add(subscription)
+            subscription.topics.add(topic)
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for topic in subscription.topics:
+                subscribers = self._topics.get(topic)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._topics[topic]
+            subscription.topics.clear()
+
+    def publish(self, topics, event):
+        """Delivers `event` once to every subscription on any of `topics`."""
+        with self._lock:
+            subscriptions = set()
+            for topic in topics:
+                subscriptions.update(self._topics.get(topic, ()))
+        for subscription in subscriptions:
+            subscription.deliver(event)
+
+
+class PostgresBroker(InProcessBroker):
+    """
+    Relays events through Postgres LISTEN/NOTIFY, so streams connected to
+    this process also get events published by every other process on the
+    same database. publish() sends a NOTIFY; a listener thread, started with
+    the first subscription, fans each notification out to the local streams.
+    While it has any, it keeps LISTENERS_KEY alive in the shared cache, which
+    is how publishers in every process tell that nobody is listening and skip
+    the read and the NOTIFY. On other databases it behaves like
+    InProcessBroker. subscribe() may wait up to LISTEN_TIMEOUT for the
+    listener to connect, so call it from a thread, not the event loop.
+    """
+    CHANNEL = 'core_voting_events'
+    LISTEN_TIMEOUT = 5
+    RECONNECT_DELAY = 1
+    LISTENERS_KEY = 'core:voting-events:listening'
+    # Outlives a few missed refreshes, bounds how long a dead process counts
+    LISTENERS_TTL = 3 * LISTEN_TIMEOUT
+
+    def __init__(self):
+        super().__init__()
+        self._listener = None
+        self._listening = threading.Event()
+        self._stopping = threading.Event()
+        self._announced_at = float('-inf')
+
+    @staticmethod
+    def enabled():
+        return connection.vendor == 'postgresql'
+
+    def has_subscribers(self):
+        if super().has_subscribers():
+            return True
+        # Subscribers may be in other processes
+        return self.enabled() and cache.get(self.LISTENERS_KEY) is not None
+
+    def announce(self, force=False):
+        """
+        Tells every process that streams are open here, for LISTENERS_TTL
+        seconds. Unless forced, at most once per LISTEN_TIMEOUT.
+        """
+        now = time.monotonic()
+        if not force and now - self._announced_at < self.LISTEN_TIMEOUT:
+            return
+        if super().has_subscribers():
+            cache.set(self.LISTENERS_KEY, True, self.LISTENERS_TTL)
+            self._announced_at = now
+
+    def subscribe(self, topics, loop=None):
+        subscription = super().subscribe(topics, loop)
+        if self.enabled():
+            self.start_listener()
+            self.announce(force=True)
+        return subscription
+
+    def publish(self, topics, event):
+        if not self.enabled():
+            return super().publish(topics, event)
+        payload = json.dumps({'topics': list(topics), 'event': event}, cls=DjangoJSONEncoder)
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)', [self.CHANNEL, payload])
+
+    def start_listener(self):
+        with self._lock:
+            if self._listener is None:
+                self._listener = threading.Thread(target=self.listen, name='voting-events-listener', daemon=True)
+                self._listener.start()
+        self._listening.wait(self.LISTEN_TIMEOUT)
+
+    def stop(self):
+        """Ends the listener thread within LISTEN_TIMEOUT seconds and waits for it."""
+        self._stopping.set()
+        if self._listener is not None:
+            self._listener.join()
+
+    def dispatch(self, payload):
+        message = json.loads(payload)
+        super().publish(message['topics'], message['event'])
+
+    def listen(self):
+        while not self._stopping.is_set():
+            db = connections.create_connection('default')
+            try:
+                db.ensure_connection()
+                raw = db.connection
+                raw.autocommit = True
+                with raw.cursor() as cursor:
+                    cursor.execute(f'LISTEN {self.CHANNEL}')
+                self._listening.set()
+                if hasattr(raw, 'poll'):
+                    # psycopg2
+                    while not self._stopping.is_set():
+                        self.announce()
+                        if select.select([raw], [], [], self.LISTEN_TIMEOUT)[0]:
+                            raw.poll()
+                            while raw.notifies:
+                                self.dispatch(raw.notifies.pop(0).payload)
+                else:
+                    # psycopg 3.2+
+                    while not self._stopping.is_set():
+                        self.announce()
+                        for notify in raw.notifies(timeout=self.LISTEN_TIMEOUT):
+                            self.dispatch(notify.payload)
+            except Exception as e:
+                print(f"DEBUG PostgresBroker: listener connection lost ({e}); reconnecting.")
+            finally:
+                db.close()
+                # And the connection announce() used, in case it broke too
+                connections.close_all()
+            if self._stopping.is_set():
+                return
+            # Whatever was published meanwhile is lost; have every stream refetch
+            self.flag_overflowed()
+            time.sleep(self.RECONNECT_DELAY)
+
+    def flag_overflowed(self):
+        with self._lock:
+            subscriptions = set().union(*self._topics.values()) if self._topics else set()
+        for subscription in subscriptions:
+            subscription.overflowed = True
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                path = getattr(settings, 'VOTING_EVENT_BROKER', 'core.events.InProcessBroker')
+                _broker = import_string(path)()
+    return _broker
+
+
+def issue_stream_ticket(user):
+    """A signed, short-lived credential for opening the stream as `user`."""
+    return signing.dumps({'user_id': user.pk}, salt=STREAM_TICKET_SALT)
+
+
+def read_stream_ticket(ticket):
+    """The user id a ticket was issued for, or None if it is invalid or expired."""
+    try:
+        return signing.loads(ticket, salt=STREAM_TICKET_SALT, max_age=STREAM_TICKET_MAX_AGE)['user_id']
+    except (signing.BadSignature, KeyError, TypeError):
+        return None
+
+
+def encode_event(event):
+    """Formats an event as a server-sent-events message."""
+    return f"event: {event['type']}\ndata: {json.dumps(event['request'], cls=DjangoJSONEncoder)}\n\n"
+
+
+def publish_voting_requests(ids, event_type):
+    """
+    Publishes the current state of the given voting requests to their
+    society's stream and their initiator's. Skips the read (and the NOTIFY)
+    entirely when no stream is open in any process.
+    """
+    broker = get_broker()
+    if not ids or not broker.has_subscribers():
+        return
+    for row in VotingRequest.objects.filter(id__in=list(ids)).values(*EVENT_FIELDS):
+        topics = [society_topic(row['society_id']), user_topic(row['initiated_by_id'])]
+        broker.publish(topics, {'type': event_type, 'request': row})
+
+
+def publish_on_commit(ids, event_type):
+    ids = list(ids)
+    transaction.on_commit(lambda: publish_voting_requests(ids, event_type))
@@ -0,0 +1,172 @@
+# backend/core/hashing.py
+
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, get_hasher, identify_hasher, make_password
+from django.contrib.auth.models import User
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+class HashingPoolBusy(Exception):
+    """Raised instead of queueing when PASSWORD_HASHING_MAX_PENDING jobs are already waiting."""
+
+
+class HashingPool:
+    """
+    Runs password hashing on a fixed set of threads so the event loop (and
+    the thread Django runs sync views on under ASGI) stays free. PBKDF2 in
+    hashlib releases the GIL, so threads use every core without the pickling
+    a process pool would need. Jobs beyond `max_pending` are refused rather
+    than queued, which keeps login latency bounded at peak.
+    """
+
+    def __init__(self, max_workers, max_pending):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='password-hashing')
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.peak_pending = 0
+        self.submitted = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_seconds = 0.0
+        self.hash_seconds = 0.0
+
+    async def run(self, func, *args):
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise HashingPoolBusy()
+            self._count_submitted()
+        return await asyncio.wrap_future(self._submit(func, args))
+
+    def map(self, func, items):
+        """
+        func over items on the pool's threads, for sync bulk work such as
+        ResidentImporter. At most max_workers items are in flight at a time,
+        so logins queued meanwhile wait for one batch, not the whole list.
+        """
+        items = list(items)
+        results = []
+        for start in range(0, len(items), self.max_workers):
+            futures = []
+            for item in items[start:start + self.max_workers]:
+                with self._lock:
+                    self._count_submitted()
+                futures.append(self._submit(func, (item,)))
+            results.extend(future.result() for future in futures)
+        return results
+
+    def _count_submitted(self):
+        # Caller holds self._lock
+        self.pending += 1
+        self.submitted += 1
+        self.peak_pending = max(self.peak_pending, self.pending)
+
+    def _submit(self, func, args):
+        queued_at = time.monotonic()
+
+        def job():
+            started = time.monotonic()
+            try:
+                return func(*args)
+            finally:
+                # Counted here, not after the await, so a disconnected client cannot leak a slot
+                finished = time.monotonic()
+                with self._lock:
+                    self.pending -= 1
+                    self.completed += 1
+                    self.wait_seconds += started - queued_at
+                    self.hash_seconds += finished - started
+
+        return self._executor.submit(job)
+
+    def stats(self):
+        with self._lock:
+            completed = self.completed
+            return {
+                'workers': self.max_workers,
+                'max_pending': self.max_pending,
+                'pending': self.pending,
+                'peak_pending': self.peak_pending,
+                'submitted': self.submitted,
+                'completed': completed,
+                'rejected': self.rejected,
+                'avg_wait_ms': round(self.wait_seconds / completed * 1000, 2) if completed else 0.0,
+                'avg_hash_ms': round(self.hash_seconds / completed * 1000, 2) if completed else 0.0,
+            }
+
+
+def get_hashing_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                workers = getattr(settings, 'PASSWORD_HASHING_WORKERS', None) or os.cpu_count() or 1
+                max_pending = getattr(settings, 'PASSWORD_HASHING_MAX_PENDING', None) or workers * 8
+                _pool = HashingPool(workers, max_pending)
+    return _pool
+
+
+def needs_rehash(encoded):
+    """Whether `encoded` was made with other than the preferred hasher or its current cost."""
+    preferred = get_hasher('default')
+    try:
+        hasher = identify_hasher(encoded)
+    except ValueError:
+        return False
+    return hasher.algorithm != preferred.algorithm or preferred.must_update(encoded)
+
+
+async def hash_password(password):
+    return await get_hashing_pool().run(make_password, password)
+
+
+def find_login_user(username):
+    try:
+        return User._default_manager.get_by_natural_key(username)
+    except User.DoesNotExist:
+        return None
+
+
+async def authenticate_async(username, password):
+    """
+    ModelBackend.authenticate() with the hashing done on the hashing pool.
+    Returns the active user whose password matches, otherwise None.
+    """
+    user = await sync_to_async(find_login_user)(username)
+    pool = get_hashing_pool()
+    if user is None:
+        # Hash anyway, as ModelBackend does, so unknown usernames answer as slowly as wrong passwords
+        await pool.run(make_password, password)
+        return None
+
+    if not await pool.run(check_password, password, user.password) or not user.is_active:
+        return None
+
+    if needs_rehash(user.password):
+        user.password = await pool.run(make_password, password)
+        await sync_to_async(user.save)(update_fields=['password'])
+    return user
+
+
+def create_user(username, email, password, password_hash=None):
+    """User.objects.create_user(), or the same with a password already hashed by hash_password()."""
+    if password_hash is None:
+        return User.objects.create_user(username=username, email=email, password=password)
+    user = User(
+        username=User.normalize_username(username),
+        email=User.objects.normalize_email(email),
+        password=password_hash,
+    )
+    user.save()
+    return user
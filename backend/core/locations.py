@@ -0,0 +1,104 @@
+# backend/core/locations.py
+
+import threading
+
+from .models import Country, State, District, Circle
+from .versions import get_version, bump_version
+
+# Shared version counter for the Country/State/District/Circle tables.
+# Every worker compares its local copy against this number, so a write in
+# one process invalidates the precomputed tree everywhere.
+LOCATION_VERSION = 'locations'
+
+_lock = threading.Lock()
+_snapshot = None
+
+
+class LocationSnapshot:
+    """
+    Immutable, precomputed view of the whole location hierarchy for one version.
+    `tree` is the nested Country -> State -> District -> Circle structure,
+    `nodes` maps (level, id) to the matching node inside it and `parents`
+    maps (level, id) to the id of the row one level up.
+    """
+
+    def __init__(self, version, tree, nodes, parents):
+        self.version = version
+        self.tree = tree
+        self.nodes = nodes
+        self.parents = parents
+
+    def subtree(self, level, pk):
+        return self.nodes.get((level, pk))
+
+    def exists(self, level, pk):
+        return (level, pk) in self.nodes
+
+    def is_valid_hierarchy(self, country_id, state_id, district_id, circle_id):
+        """True if the circle sits in the district, the district in the state and so on."""
+        return (
+            ('country', country_id) in self.nodes
+            and self.parents.get(('state', state_id)) == country_id
+            and self.parents.get(('district', district_id)) == state_id
+            and self.parents.get(('circle', circle_id)) == district_id
+        )
+
+
+def get_location_version():
+    return get_version(LOCATION_VERSION)
+
+
+def bump_location_version():
+    bump_version(LOCATION_VERSION)
+
+
+def build_location_snapshot(version):
+    """
+    Builds the tree with one flat query per level. A row whose parent was not
+    in the previous level's read (it was committed in between) is left out;
+    its commit bumps the location version, so the next request rebuilds.
+    """
+    tree = []
+    nodes = {}
+    parents = {}
+
+    def attach(level, pk, node, parent_level, parent_id, children):
+        parent = nodes.get((parent_level, parent_id))
+        if parent is None:
+            return
+        nodes[(level, pk)] = node
+        parents[(level, pk)] = parent_id
+        parent[children].append(node)
+
+    for pk, name, code in Country.objects.order_by('name').values_list('id', 'name', 'code'):
+        node = {'id': pk, 'name': name, 'code': code, 'states': []}
+        nodes[('country', pk)] = node
+        tree.append(node)
+
+    for pk, name, code, country_id in State.objects.order_by('name').values_list('id', 'name', 'code', 'country_id'):
+        attach('state', pk, {'id': pk, 'name': name, 'code': code, 'districts': []}, 'country', country_id, 'states')
+
+    for pk, name, state_id in District.objects.order_by('name').values_list('id', 'name', 'state_id'):
+        attach('district', pk, {'id': pk, 'name': name, 'circles': []}, 'state', state_id, 'districts')
+
+    for pk, name, district_id in Circle.objects.order_by('name').values_list('id', 'name', 'district_id'):
+        attach('circle', pk, {'id': pk, 'name': name}, 'district', district_id, 'circles')
+
+    return LocationSnapshot(version, tree, nodes, parents)
+
+
+def get_location_snapshot():
+    """
+    Returns the process-local snapshot, rebuilding it only when the shared
+    location version has moved on since it was built.
+    """
+    global _snapshot
+    version = get_location_version()
+    snapshot = _snapshot
+    if snapshot is not None and snapshot.version == version:
+        return snapshot
+
+    with _lock:
+        if _snapshot is None or _snapshot.version != version:
+            _snapshot = build_location_snapshot(version)
+        return _snapshot
@@ -0,0 +1,42 @@
+# backend/core/management/commands/archive_voting_requests.py
+
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.archiving import archive_batch, archive_cutoff
+
+
+class Command(BaseCommand):
+    help = (
+        "Moves closed voting requests and their votes into the archive tables in "
+        "batches, keeping the hot tables down to pending and recently closed requests."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help="Requests moved per transaction.")
+        parser.add_argument('--older-than-days', type=int, help="Override VOTING_ARCHIVE_AFTER_DAYS.")
+        parser.add_argument('--pause', type=float, default=0.0, help="Seconds to sleep between batches.")
+
+    def handle(self, *args, **options):
+        if options['older_than_days'] is not None:
+            cutoff = timezone.now() - timedelta(days=options['older_than_days'])
+        else:
+            cutoff = archive_cutoff()
+
+        total_requests = total_votes = 0
+        while True:
+            requests, votes = archive_batch(cutoff, options['batch_size'])
+            if not requests:
+                break
+            total_requests += requests
+            total_votes += votes
+            self.stdout.write(f"Archived {requests} voting requests and {votes} votes.")
+            if options['pause']:
+                time.sleep(options['pause'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {total_requests} voting requests and {total_votes} votes closed before {cutoff:%Y-%m-%d %H:%M}."
+        ))
@@ -0,0 +1,61 @@
+# backend/core/management/commands/benchmark_password_hashing.py
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.hashers import get_hashers
+from django.core.management.base import BaseCommand
+
+from core.hashing import get_hashing_pool
+
+BENCHMARK_PASSWORD = 'benchmark-password-1'
+
+
+def verifications_per_second(verify, seconds, threads):
+    """Runs `verify` on `threads` threads for `seconds` and returns the combined rate."""
+    deadline = time.monotonic() + seconds
+
+    def worker():
+        count = 0
+        while time.monotonic() < deadline:
+            verify()
+            count += 1
+        return count
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        total = sum(executor.map(lambda _: worker(), range(threads)))
+    return total / (time.monotonic() - started)
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures password verifications per second (one per login) for each "
+        "configured hasher, on one core and on as many threads as the hashing pool uses."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seconds', type=float, default=3.0, help="Duration of each measurement.")
+        parser.add_argument('--threads', type=int, default=None, help="Threads for the pooled run (default: PASSWORD_HASHING_WORKERS).")
+
+    def handle(self, *args, **options):
+        threads = options['threads'] or get_hashing_pool().max_workers
+
+        for index, hasher in enumerate(get_hashers()):
+            label = f"{hasher.algorithm}{' (default)' if index == 0 else ''}"
+            try:
+                encoded = hasher.encode(BENCHMARK_PASSWORD, hasher.salt())
+            except ValueError as e:
+                # e.g. bcrypt or argon2 configured without their library installed
+                self.stdout.write(self.style.WARNING(f"{label}: skipped ({e})."))
+                continue
+
+            def verify():
+                hasher.verify(BENCHMARK_PASSWORD, encoded)
+
+            per_core = verifications_per_second(verify, options['seconds'], 1)
+            pooled = verifications_per_second(verify, options['seconds'], threads)
+            self.stdout.write(
+                f"{label}: {per_core:.1f} logins/s per core ({1000 / per_core:.1f} ms each), "
+                f"{pooled:.1f} logins/s on {threads} threads ({pooled / per_core:.1f}x)."
+            )
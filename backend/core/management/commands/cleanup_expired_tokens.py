@@ -0,0 +1,39 @@
+# backend/core/management/commands/cleanup_expired_tokens.py
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from core.authentication import token_ttl
+
+
+class Command(BaseCommand):
+    help = "Deletes auth tokens older than AUTH_TOKEN_TTL_DAYS in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="Tokens deleted per transaction.")
+        parser.add_argument('--pause', type=float, default=0.0, help="Seconds to sleep between batches.")
+        parser.add_argument('--dry-run', action='store_true', help="Only count expired tokens.")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - token_ttl()
+        expired = Token.objects.filter(created__lt=cutoff)
+
+        if options['dry_run']:
+            self.stdout.write(f"{expired.count()} tokens created before {cutoff:%Y-%m-%d %H:%M} (dry run, nothing deleted).")
+            return
+
+        total = 0
+        while True:
+            keys = list(expired.order_by('created').values_list('key', flat=True)[:options['batch_size']])
+            if not keys:
+                break
+            deleted, _ = Token.objects.filter(key__in=keys).delete()
+            total += deleted
+            self.stdout.write(f"Deleted {deleted} expired tokens.")
+            if options['pause']:
+                time.sleep(options['pause'])
+
+        self.stdout.write(self.style.SUCCESS(f"Deleted {total} tokens created before {cutoff:%Y-%m-%d %H:%M}."))
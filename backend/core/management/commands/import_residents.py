@@ -0,0 +1,65 @@
+# backend/core/management/commands/import_residents.py
+
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Society
+from core.onboarding import (
+    DEFAULT_CHUNK_SIZE, READERS, RESIDENT_FIELDS, ImportFormatError, ResidentImporter, format_for
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Creates residents in bulk from a CSV or NDJSON file with the columns "
+        f"{', '.join(RESIDENT_FIELDS)}. Rejected rows are written to --report, one JSON object per line."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to import, or - for stdin.")
+        parser.add_argument('--format', choices=sorted(READERS), help="Input format (default: from the file extension).")
+        parser.add_argument('--society', type=int, help="Society ID used for rows without society_ids or location.")
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="Rows validated and inserted per transaction.")
+        parser.add_argument('--workers', type=int, help="Password hashing processes (default: one per core).")
+        parser.add_argument('--report', help="Error report path (default: stderr).")
+        parser.add_argument('--dry-run', action='store_true', help="Validate only; create nothing.")
+
+    def handle(self, *args, **options):
+        fmt = options['format'] or format_for(options['path'])
+        if fmt is None:
+            raise CommandError("Cannot tell the input format from the file name; pass --format.")
+
+        society = None
+        if options['society'] is not None:
+            try:
+                society = Society.objects.get(pk=options['society'])
+            except Society.DoesNotExist:
+                raise CommandError(f"Society {options['society']} does not exist.")
+
+        importer = ResidentImporter(
+            society=society, chunk_size=options['chunk_size'],
+            hash_workers=options['workers'], dry_run=options['dry_run']
+        )
+
+        source = sys.stdin if options['path'] == '-' else open(options['path'], newline='', encoding='utf-8')
+        report = open(options['report'], 'w', encoding='utf-8') if options['report'] else sys.stderr
+        try:
+            for error in importer.run(READERS[fmt](source)):
+                report.write(json.dumps(error) + '\n')
+        except ImportFormatError as e:
+            raise CommandError(str(e))
+        finally:
+            if source is not sys.stdin:
+                source.close()
+            if report is not sys.stderr:
+                report.close()
+
+        summary = importer.summary()
+        if options['dry_run']:
+            self.stdout.write(f"{summary['rows'] - summary['rejected']} of {summary['rows']} rows are valid (dry run, nothing created).")
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f"Created {summary['created']} of {summary['rows']} residents; {summary['rejected']} rows rejected."
+            ))
@@ -0,0 +1,25 @@
+# backend/core/management/commands/rebuild_service_counts.py
+
+from django.core.management.base import BaseCommand
+
+from core.counters import refresh_service_counts
+from core.models import Society
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the per-society approved provider counts for every service category."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help="Societies rebuilt per transaction.")
+        parser.add_argument('--society', type=int, action='append', dest='society_ids', help="Only rebuild these society IDs.")
+
+    def handle(self, *args, **options):
+        society_ids = options['society_ids'] or list(Society.objects.order_by('id').values_list('id', flat=True))
+        batch_size = options['batch_size']
+
+        for start in range(0, len(society_ids), batch_size):
+            batch = society_ids[start:start + batch_size]
+            refresh_service_counts(batch)
+            self.stdout.write(f"Rebuilt service counts for societies {batch[0]}..{batch[-1]}.")
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt service counts for {len(society_ids)} societies."))
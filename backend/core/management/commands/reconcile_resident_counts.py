@@ -0,0 +1,35 @@
+# backend/core/management/commands/reconcile_resident_counts.py
+
+from django.core.management.base import BaseCommand
+from django.db.models import F
+
+from core.counters import refresh_resident_counts, resident_count_subquery
+from core.models import Society
+
+
+class Command(BaseCommand):
+    help = "Finds societies whose stored resident_count has drifted from their memberships and fixes them."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Only report drifted societies.")
+
+    def handle(self, *args, **options):
+        drifted = list(
+            Society.objects.annotate(actual_count=resident_count_subquery())
+            .exclude(resident_count=F('actual_count'))
+            .values_list('id', 'name', 'resident_count', 'actual_count')
+        )
+
+        for society_id, name, stored, actual in drifted:
+            self.stdout.write(f"Society {name} (ID: {society_id}): stored {stored}, actual {actual}")
+
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS("All resident counts are in sync."))
+            return
+
+        if options['dry_run']:
+            self.stdout.write(f"{len(drifted)} societies out of sync (dry run, nothing changed).")
+            return
+
+        updated = refresh_resident_counts(society_id for society_id, *_ in drifted)
+        self.stdout.write(self.style.SUCCESS(f"Reconciled resident_count for {updated} societies."))
@@ -0,0 +1,40 @@
+# backend/core/management/commands/reconcile_vote_tallies.py
+
+from django.core.management.base import BaseCommand
+from django.db.models import F, Q
+
+from core.models import VotingRequest
+from core.voting import refresh_vote_tallies, tally_subquery
+
+
+class Command(BaseCommand):
+    help = "Finds voting requests whose stored approved/rejected tallies have drifted from their votes and fixes them."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Only report drifted requests.")
+
+    def handle(self, *args, **options):
+        drifted = list(
+            VotingRequest.objects.annotate(
+                actual_approved=tally_subquery('approve'),
+                actual_rejected=tally_subquery('reject')
+            )
+            .filter(~Q(approved_count=F('actual_approved')) | ~Q(rejected_count=F('actual_rejected')))
+            .values_list('id', 'approved_count', 'actual_approved', 'rejected_count', 'actual_rejected')
+        )
+
+        for request_id, approved, actual_approved, rejected, actual_rejected in drifted:
+            self.stdout.write(
+                f"Voting request {request_id}: stored {approved}/{rejected}, actual {actual_approved}/{actual_rejected}"
+            )
+
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS("All vote tallies are in sync."))
+            return
+
+        if options['dry_run']:
+            self.stdout.write(f"{len(drifted)} voting requests out of sync (dry run, nothing changed).")
+            return
+
+        updated = refresh_vote_tallies(request_id for request_id, *_ in drifted)
+        self.stdout.write(self.style.SUCCESS(f"Reconciled vote tallies for {updated} voting requests."))
@@ -0,0 +1,50 @@
+# backend/core/management/commands/run_outbox_worker.py
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from django.utils import timezone
+
+from core.checks import process_local_cache
+from core import voting  # noqa: F401 registers the voting outbox handlers
+from core.outbox import process_outbox_batch, next_outbox_time
+
+
+class Command(BaseCommand):
+    help = (
+        "Applies queued outbox events (e.g. adding a resident once a join request is "
+        "approved). Safe to run several copies; each claims events with SKIP LOCKED."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Drain the due events once and exit.")
+        parser.add_argument('--batch-size', type=int, default=50, help="Events claimed per transaction.")
+        parser.add_argument('--max-sleep', type=float, default=2.0, help="Upper bound in seconds between polls.")
+
+    def handle(self, *args, **options):
+        backend = process_local_cache()
+        if backend is not None:
+            # Its version bumps would stay in this process and web workers would keep stale responses
+            raise CommandError(f"The default cache ({backend}) is local to each process; the outbox worker needs a shared one (see CACHES).")
+
+        batch_size = options['batch_size']
+        max_sleep = options['max_sleep']
+
+        while True:
+            close_old_connections()
+            done, failed = process_outbox_batch(batch_size)
+            if done or failed:
+                self.stdout.write(f"{timezone.now():%Y-%m-%d %H:%M:%S} Applied {done} outbox events, {failed} failed.")
+                # A full batch may mean more are waiting
+                continue
+
+            if options['once']:
+                return
+
+            next_due = next_outbox_time()
+            if next_due is None:
+                delay = max_sleep
+            else:
+                delay = min(max(0.0, (next_due - timezone.now()).total_seconds()), max_sleep)
+            time.sleep(delay)
@@ -0,0 +1,46 @@
+# backend/core/management/commands/run_voting_sweeper.py
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from django.utils import timezone
+
+from core.checks import process_local_cache
+from core.voting import sweep_voting_requests, next_expiry_time
+
+
+class Command(BaseCommand):
+    help = (
+        "Expires pending voting requests once their expiry_time passes. Sleeps until "
+        "the next expiry_time instead of polling, capped by --max-sleep so newly "
+        "created requests are picked up."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Run a single sweep and exit.")
+        parser.add_argument('--max-sleep', type=float, default=30.0, help="Upper bound in seconds between sweeps.")
+
+    def handle(self, *args, **options):
+        backend = process_local_cache()
+        if backend is not None:
+            # Its version bumps would stay in this process and web workers would keep stale responses
+            raise CommandError(f"The default cache ({backend}) is local to each process; the voting sweeper needs a shared one (see CACHES).")
+
+        max_sleep = options['max_sleep']
+
+        while True:
+            close_old_connections()
+            decided, expired = sweep_voting_requests()
+            if decided or expired:
+                self.stdout.write(f"{timezone.now():%Y-%m-%d %H:%M:%S} Decided {decided}, expired {expired} voting requests.")
+
+            if options['once']:
+                return
+
+            next_expiry = next_expiry_time()
+            if next_expiry is None:
+                delay = max_sleep
+            else:
+                delay = min(max(0.0, (next_expiry - timezone.now()).total_seconds()), max_sleep)
+            time.sleep(delay)
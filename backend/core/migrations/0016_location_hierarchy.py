@@ -0,0 +1,144 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+# The Country/State/District/Circle tables and the location foreign keys were
+# added to the models without a migration. Society's keys are created nullable
+# and then made required, so a database with societies but no locations stops
+# here with a NOT NULL error instead of inventing locations for them; assign
+# each society a location first. Databases whose tables were created by hand
+# must record this migration as applied in django_migrations instead.
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_alter_society_options_alter_votingrequest_options_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Country',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('code', models.CharField(max_length=3, unique=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Countries',
+            },
+        ),
+        migrations.CreateModel(
+            name='State',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('code', models.CharField(blank=True, max_length=10, null=True)),
+                ('country', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='states', to='core.country')),
+            ],
+            options={
+                'unique_together': {('name', 'country')},
+            },
+        ),
+        migrations.CreateModel(
+            name='District',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('state', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='districts', to='core.state')),
+            ],
+            options={
+                'unique_together': {('name', 'state')},
+            },
+        ),
+        migrations.CreateModel(
+            name='Circle',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('district', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='circles', to='core.district')),
+            ],
+            options={
+                'unique_together': {('name', 'district')},
+            },
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='country',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='core.country'),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='state',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='core.state'),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='district',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='core.district'),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='circle',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='core.circle'),
+        ),
+        migrations.AddField(
+            model_name='serviceprovider',
+            name='country',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='core.country'),
+        ),
+        migrations.AddField(
+            model_name='serviceprovider',
+            name='state',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='core.state'),
+        ),
+        migrations.AddField(
+            model_name='serviceprovider',
+            name='district',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='core.district'),
+        ),
+        migrations.AddField(
+            model_name='serviceprovider',
+            name='circle',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='core.circle'),
+        ),
+        migrations.AddField(
+            model_name='society',
+            name='country',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='societies', to='core.country'),
+        ),
+        migrations.AddField(
+            model_name='society',
+            name='state',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='societies', to='core.state'),
+        ),
+        migrations.AddField(
+            model_name='society',
+            name='district',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='societies', to='core.district'),
+        ),
+        migrations.AddField(
+            model_name='society',
+            name='circle',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='societies', to='core.circle'),
+        ),
+        migrations.AlterField(
+            model_name='society',
+            name='country',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='societies', to='core.country'),
+        ),
+        migrations.AlterField(
+            model_name='society',
+            name='state',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='societies', to='core.state'),
+        ),
+        migrations.AlterField(
+            model_name='society',
+            name='district',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='societies', to='core.district'),
+        ),
+        migrations.AlterField(
+            model_name='society',
+            name='circle',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='societies', to='core.circle'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+from django.db import migrations
+
+# (index name, table, column) for the society typeahead search, which
+# filters with pg_trgm's <% operator (trigram_word_similar) on each column.
+TRIGRAM_INDEXES = [
+    ('core_society_name_trgm', 'core_society', 'name'),
+    ('core_society_address_trgm', 'core_society', 'address'),
+    ('core_circle_name_trgm', 'core_circle', 'name'),
+    ('core_district_name_trgm', 'core_district', 'name'),
+]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    # Postgres only: SQLite runs use the in-process index in core/search.py
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for index_name, table, column in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {index_name} ON {table} '
+            f'USING gin ("{column}" gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for index_name, table, column in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {index_name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_location_hierarchy'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
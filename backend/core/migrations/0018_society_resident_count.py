@@ -0,0 +1,28 @@
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_resident_counts(apps, schema_editor):
+    Society = apps.get_model('core', 'Society')
+    Profile = apps.get_model('core', 'Profile')
+    memberships = Profile.societies.through.objects.filter(
+        society_id=OuterRef('pk')
+    ).order_by().values('society_id').annotate(count=Count('*')).values('count')
+    Society.objects.update(resident_count=Coalesce(Subquery(memberships), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_society_search_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='society',
+            name='resident_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_resident_counts, migrations.RunPython.noop),
+    ]
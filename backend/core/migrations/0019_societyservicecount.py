@@ -0,0 +1,45 @@
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_service_counts(apps, schema_editor):
+    ServiceProvider = apps.get_model('core', 'ServiceProvider')
+    SocietyServiceCount = apps.get_model('core', 'SocietyServiceCount')
+    rows = ServiceProvider.services.through.objects.filter(
+        serviceprovider__is_approved=True,
+        serviceprovider__societies__isnull=False,
+    ).values('serviceprovider__societies', 'service_id').annotate(
+        count=Count('serviceprovider_id', distinct=True)
+    )
+    SocietyServiceCount.objects.bulk_create([
+        SocietyServiceCount(
+            society_id=row['serviceprovider__societies'],
+            service_id=row['service_id'],
+            approved_provider_count=row['count'],
+        )
+        for row in rows
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_society_resident_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SocietyServiceCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('approved_provider_count', models.PositiveIntegerField(default=0)),
+                ('service', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='society_counts', to='core.service')),
+                ('society', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='service_counts', to='core.society')),
+            ],
+            options={
+                'unique_together': {('society', 'service')},
+            },
+        ),
+        migrations.RunPython(backfill_service_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_profile_service_society_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='votingrequest',
+            index=models.Index(fields=['status', 'expiry_time'], name='core_vr_status_expiry_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_vote_tallies(apps, schema_editor):
+    VotingRequest = apps.get_model('core', 'VotingRequest')
+    Vote = apps.get_model('core', 'Vote')
+
+    def tally(vote_type):
+        votes = Vote.objects.filter(
+            request_id=OuterRef('pk'), vote_type=vote_type
+        ).order_by().values('request_id').annotate(count=Count('*')).values('count')
+        return Coalesce(Subquery(votes), 0)
+
+    VotingRequest.objects.update(approved_count=tally('approve'), rejected_count=tally('reject'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0021_votingrequest_status_expiry_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='votingrequest',
+            name='approved_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='votingrequest',
+            name='rejected_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_vote_tallies, migrations.RunPython.noop),
+    ]
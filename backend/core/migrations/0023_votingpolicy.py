@@ -0,0 +1,28 @@
+import datetime
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0022_votingrequest_vote_tallies'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VotingPolicy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('approval_threshold', models.PositiveIntegerField(default=5)),
+                ('rejection_threshold', models.PositiveIntegerField(default=3)),
+                ('approval_percent', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('rejection_percent', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('voting_period', models.DurationField(default=datetime.timedelta(seconds=300))),
+                ('society', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='voting_policy', to='core.society')),
+            ],
+            options={
+                'verbose_name_plural': 'Voting policies',
+            },
+        ),
+    ]
@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0023_votingpolicy'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='votingrequest',
+            index=models.Index(fields=['updated_at', 'id'], name='core_vr_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0024_votingrequest_updated_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedVotingRequest',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('request_type', models.CharField(choices=[('resident_join', 'Resident Join'), ('provider_list', 'Service Provider Listing')], max_length=50)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('approved', 'Approved'), ('rejected', 'Rejected'), ('expired', 'Expired')], max_length=20)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('expiry_time', models.DateTimeField()),
+                ('approved_count', models.PositiveIntegerField(default=0)),
+                ('rejected_count', models.PositiveIntegerField(default=0)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('initiated_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_initiated_voting_requests', to=settings.AUTH_USER_MODEL)),
+                ('resident_user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='archived_resident_join_requests', to=settings.AUTH_USER_MODEL)),
+                ('service_provider', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='archived_listing_requests', to='core.serviceprovider')),
+                ('society', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_voting_requests', to='core.society')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['initiated_by', '-created_at'], name='core_avr_initiator_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedVote',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('vote_type', models.CharField(choices=[('approve', 'Approve'), ('reject', 'Reject')], max_length=10)),
+                ('created_at', models.DateTimeField()),
+                ('request', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='votes', to='core.archivedvotingrequest')),
+                ('voter', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_votes', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -0,0 +1,25 @@
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0026_outboxevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SocietyDeparture',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('left_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='society_departures', to='core.profile')),
+                ('society', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='departures', to='core.society')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['profile', 'left_at'], name='core_departure_profile_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+import django.core.validators
+from django.db import migrations, models
+
+
+def clamp_percents(apps, schema_editor):
+    # A percentage above 100 could never be met; cap it so the constraints can be added
+    VotingPolicy = apps.get_model('core', 'VotingPolicy')
+    VotingPolicy.objects.filter(approval_percent__gt=100).update(approval_percent=100)
+    VotingPolicy.objects.filter(rejection_percent__gt=100).update(rejection_percent=100)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0027_societydeparture'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='votingpolicy',
+            name='approval_percent',
+            field=models.PositiveSmallIntegerField(blank=True, null=True, validators=[django.core.validators.MaxValueValidator(100)]),
+        ),
+        migrations.AlterField(
+            model_name='votingpolicy',
+            name='rejection_percent',
+            field=models.PositiveSmallIntegerField(blank=True, null=True, validators=[django.core.validators.MaxValueValidator(100)]),
+        ),
+        migrations.RunPython(clamp_percents, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='votingpolicy',
+            constraint=models.CheckConstraint(condition=models.Q(('approval_percent__lte', 100)), name='core_policy_approval_percent_lte_100'),
+        ),
+        migrations.AddConstraint(
+            model_name='votingpolicy',
+            constraint=models.CheckConstraint(condition=models.Q(('rejection_percent__lte', 100)), name='core_policy_rejection_percent_lte_100'),
+        ),
+    ]
@@ -2,6 +2,7 @@
 
 from django.db import models
 from django.contrib.auth.models import User
+from django.core.validators import MaxValueValidator
 from django.utils import timezone
 import secrets
 from datetime import timedelta # Import timedelta
@@ -61,6 +62,8 @@ class Profile(models.Model):
     circle = models.ForeignKey(Circle, on_delete=models.SET_NULL, null=True, blank=True)
     # ManyToMany relationship with Society for residents
     societies = models.ManyToManyField('Society', related_name='profiles', blank=True) # Residents can be in multiple societies
+    # Also touched when memberships change, so clients can revalidate /api/user-profile/
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.user.username
@@ -69,6 +72,7 @@ class Profile(models.Model):
 class Service(models.Model):
     name = models.CharField(max_length=255, unique=True)
     description = models.TextField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name
@@ -83,6 +87,10 @@ class Society(models.Model):
     district = models.ForeignKey(District, on_delete=models.CASCADE, related_name='societies')
     circle = models.ForeignKey(Circle, on_delete=models.CASCADE, related_name='societies')
     # Residents are linked via the Profile model's ManyToMany relationship
+    # Denormalized count of those residents, kept in sync by core.signals (see core.counters)
+    resident_count = models.PositiveIntegerField(default=0, editable=False)
+    # Also touched when resident_count is refreshed
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name_plural = "Societies" # <-- Corrected the plural name
@@ -112,6 +120,37 @@ class ServiceProvider(models.Model):
     def __str__(self):
         return self.name # Or self.user.username if you prefer
 
+# Materialized count of approved providers offering a service in a society.
+# Maintained by core.signals (see core.counters.refresh_service_counts) so the
+# service category listing is a single indexed read.
+class SocietyServiceCount(models.Model):
+    society = models.ForeignKey(Society, on_delete=models.CASCADE, related_name='service_counts')
+    service = models.ForeignKey(Service, on_delete=models.CASCADE, related_name='society_counts')
+    approved_provider_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('society', 'service')
+
+    def __str__(self):
+        return f"{self.service.name} in {self.society.name}: {self.approved_provider_count}"
+
+# When a resident left a society, written by core.signals on membership
+# removal so the voting inbox changes feed can tell clients to drop that
+# society's requests
+class SocietyDeparture(models.Model):
+    profile = models.ForeignKey(Profile, on_delete=models.CASCADE, related_name='society_departures')
+    society = models.ForeignKey(Society, on_delete=models.CASCADE, related_name='departures')
+    left_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # Departures after a cursor, in VotingRequestViewSet.changes
+            models.Index(fields=['profile', 'left_at'], name='core_departure_profile_idx'),
+        ]
+
+    def __str__(self):
+        return f"Profile {self.profile_id} left society {self.society_id} at {self.left_at}"
+
 # OTP Model for password reset
 class OTP(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -127,6 +166,32 @@ class OTP(models.Model):
     def __str__(self):
         return f"OTP for {self.user.username} ({self.purpose})"
 
+# Per-society voting rules; societies without one use the defaults below
+class VotingPolicy(models.Model):
+    DEFAULT_APPROVAL_THRESHOLD = 5
+    DEFAULT_REJECTION_THRESHOLD = 3
+    DEFAULT_VOTING_PERIOD = timedelta(minutes=5)
+
+    society = models.OneToOneField(Society, on_delete=models.CASCADE, related_name='voting_policy')
+    # Absolute number of votes needed
+    approval_threshold = models.PositiveIntegerField(default=DEFAULT_APPROVAL_THRESHOLD)
+    rejection_threshold = models.PositiveIntegerField(default=DEFAULT_REJECTION_THRESHOLD)
+    # Optional quorum as a percentage of the society's residents; when set, the
+    # larger of the absolute and percentage requirements applies
+    approval_percent = models.PositiveSmallIntegerField(null=True, blank=True, validators=[MaxValueValidator(100)])
+    rejection_percent = models.PositiveSmallIntegerField(null=True, blank=True, validators=[MaxValueValidator(100)])
+    voting_period = models.DurationField(default=DEFAULT_VOTING_PERIOD)
+
+    class Meta:
+        verbose_name_plural = "Voting policies"
+        constraints = [
+            models.CheckConstraint(condition=models.Q(approval_percent__lte=100), name='core_policy_approval_percent_lte_100'),
+            models.CheckConstraint(condition=models.Q(rejection_percent__lte=100), name='core_policy_rejection_percent_lte_100'),
+        ]
+
+    def __str__(self):
+        return f"Voting policy for {self.society.name}"
+
 # Voting Request Model
 class VotingRequest(models.Model):
     REQUEST_CHOICES = [
@@ -152,15 +217,24 @@ class VotingRequest(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     expiry_time = models.DateTimeField() # Time when voting expires
+    # Stored tallies, incremented in the same transaction as each Vote insert (see core.voting.cast_vote)
+    approved_count = models.PositiveIntegerField(default=0)
+    rejected_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            # Used by the voting sweeper to find due and next-to-expire pending requests
+            models.Index(fields=['status', 'expiry_time'], name='core_vr_status_expiry_idx'),
+            # Scanned by the delta-sync endpoint (/api/votingrequests/changes/)
+            models.Index(fields=['updated_at', 'id'], name='core_vr_updated_idx'),
+        ]
 
     def is_expired(self):
         return self.status == 'pending' and self.expiry_time < timezone.now()
 
     def count_votes(self):
-        """Counts approved and rejected votes for this request."""
-        approved_votes = self.votes.filter(vote_type='approve').count()
-        rejected_votes = self.votes.filter(vote_type='reject').count()
-        return approved_votes, rejected_votes
+        """Returns the stored approved and rejected tallies for this request."""
+        return self.approved_count, self.rejected_count
 
     def __str__(self):
         target = ""
@@ -186,4 +260,68 @@ class Vote(models.Model):
         unique_together = ('request', 'voter') # A user can only vote once per request
 
     def __str__(self):
-        return f"{self.voter.username} voted {self.get_vote_type_display()} on Request {self.request.id}"
\ No newline at end of file
+        return f"{self.voter.username} voted {self.get_vote_type_display()} on Request {self.request.id}"
+
+# Archive of closed voting requests and their votes, moved out of the hot
+# tables by `manage.py archive_voting_requests`. Rows keep their original ids.
+class ArchivedVotingRequest(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    request_type = models.CharField(max_length=50, choices=VotingRequest.REQUEST_CHOICES)
+    society = models.ForeignKey(Society, on_delete=models.CASCADE, related_name='archived_voting_requests')
+    initiated_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_initiated_voting_requests')
+    resident_user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_resident_join_requests', null=True, blank=True)
+    service_provider = models.ForeignKey(ServiceProvider, on_delete=models.CASCADE, related_name='archived_listing_requests', null=True, blank=True)
+    status = models.CharField(max_length=20, choices=VotingRequest.STATUS_CHOICES)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    expiry_time = models.DateTimeField()
+    approved_count = models.PositiveIntegerField(default=0)
+    rejected_count = models.PositiveIntegerField(default=0)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # History listing in UserInitiatedVotingRequestsView
+            models.Index(fields=['initiated_by', '-created_at'], name='core_avr_initiator_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_request_type_display()} for {self.society.name} ({self.get_status_display()}, archived)"
+
+# Archived Vote Model
+class ArchivedVote(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    request = models.ForeignKey(ArchivedVotingRequest, on_delete=models.CASCADE, related_name='votes')
+    voter = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_votes')
+    vote_type = models.CharField(max_length=10, choices=Vote.VOTE_CHOICES)
+    created_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.voter.username} voted {self.get_vote_type_display()} on archived Request {self.request_id}"
+
+# Durable queue of side effects written in the same transaction as the state
+# change that caused them, applied later by `manage.py run_outbox_worker`
+class OutboxEvent(models.Model):
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    event_type = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    available_at = models.DateTimeField(default=timezone.now) # Not retried before this time
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # The worker's claim query
+            models.Index(fields=['status', 'available_at'], name='core_outbox_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.event_type} #{self.id} ({self.get_status_display()})"
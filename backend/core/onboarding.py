@@ -0,0 +1,322 @@
+# backend/core/onboarding.py
+
+import csv
+import json
+import os
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.contrib.auth.validators import UnicodeUsernameValidator
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+
+from .caching import bump_society_versions
+from .counters import SocietyMembership, refresh_resident_counts
+from .locations import get_location_snapshot
+from .models import Profile, Society
+
+# Columns of a resident import. In CSV, society_ids is separated by ';'.
+RESIDENT_FIELDS = (
+    'username', 'email', 'password', 'phone_number',
+    'country_id', 'state_id', 'district_id', 'circle_id', 'society_ids',
+)
+LOCATION_FIELDS = ('country_id', 'state_id', 'district_id', 'circle_id')
+DEFAULT_CHUNK_SIZE = 500
+# Same limits as ResidentRegisterSerializer
+MIN_PASSWORD_LENGTH = 8
+MAX_PHONE_LENGTH = 15
+
+REQUIRED = "This field is required."
+username_validator = UnicodeUsernameValidator()
+
+
+class ImportFormatError(Exception):
+    """The input as a whole cannot be read, e.g. a CSV without the required columns."""
+
+
+def read_csv(lines):
+    reader = csv.DictReader(lines)
+    missing = {'username', 'email'} - set(reader.fieldnames or ())
+    if missing:
+        raise ImportFormatError(f"CSV header is missing column(s): {', '.join(sorted(missing))}.")
+    for number, row in enumerate(reader, start=1):
+        yield number, row
+
+
+def read_ndjson(lines):
+    number = 0
+    for line in lines:
+        if not line.strip():
+            continue
+        number += 1
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield number, row if isinstance(row, dict) else None
+
+
+READERS = {'csv': read_csv, 'ndjson': read_ndjson}
+
+
+def format_for(name):
+    """Import format from a file name or content type; None if unrecognised."""
+    name = (name or '').lower()
+    if name.endswith('.csv') or 'csv' in name:
+        return 'csv'
+    if name.endswith(('.ndjson', '.jsonl')) or 'ndjson' in name or 'jsonl' in name:
+        return 'ndjson'
+    return None
+
+
+def setup_hashing_worker():
+    # Forked workers inherit the configured project; spawned ones need setting up
+    django.setup()
+
+
+def parse_id(value):
+    if isinstance(value, bool):
+        raise ValueError(value)
+    return int(str(value).strip())
+
+
+def parse_id_list(value):
+    if isinstance(value, (list, tuple)):
+        return [parse_id(item) for item in value]
+    return [parse_id(item) for item in str(value).split(';') if item.strip()]
+
+
+class ResidentImporter:
+    """
+    Creates residents (User, Profile and society memberships) from a stream
+    of (row number, dict) pairs, a chunk at a time. Each chunk is checked
+    against lookup sets loaded once per import (locations, societies) plus
+    one username and one email query, its passwords are hashed, and its
+    rows go in with bulk_create in one transaction. Hashing runs on a pool
+    of `hash_workers` processes (for manage.py import_residents) or, given
+    `hashing_pool`, on the threads of core.hashing's pool, which is what
+    request handlers use instead of forking. Rejected
+    rows are yielded as {'row', 'username', 'errors'} while the import goes
+    on. Rows without a password get an unusable one; those residents sign in
+    after a password reset. With `society`, rows may omit society_ids and
+    location, which then default to that society's.
+    """
+
+    def __init__(self, society=None, chunk_size=DEFAULT_CHUNK_SIZE, hash_workers=None, dry_run=False, hashing_pool=None):
+        self.society = society
+        self.chunk_size = chunk_size
+        self.hash_workers = hash_workers or os.cpu_count() or 1
+        self.hashing_pool = hashing_pool
+        self.dry_run = dry_run
+        self.locations = get_location_snapshot()
+        self.society_ids = set(Society.objects.values_list('id', flat=True))
+        # Usernames and emails taken by earlier rows of this import
+        self.seen_usernames = set()
+        self.seen_emails = set()
+        self.rows = 0
+        self.created = 0
+        self.rejected = 0
+
+    def summary(self):
+        return {'rows': self.rows, 'created': self.created, 'rejected': self.rejected, 'dry_run': self.dry_run}
+
+    def run(self, rows):
+        rows = iter(rows)
+        # A dry run only validates, so it needs no hashing processes
+        if self.dry_run or self.hashing_pool is not None:
+            pool_context = nullcontext(self.hashing_pool)
+        else:
+            pool_context = ProcessPoolExecutor(max_workers=self.hash_workers, initializer=setup_hashing_worker)
+        with pool_context as pool:
+            while True:
+                chunk = list(islice(rows, self.chunk_size))
+                if not chunk:
+                    break
+                yield from self.import_chunk(chunk, pool)
+
+    def import_chunk(self, chunk, pool):
+        self.rows += len(chunk)
+        valid, errors = [], []
+        for number, data in chunk:
+            resident, row_errors = self.clean_row(data)
+            if row_errors:
+                errors.append(self.error(number, data, row_errors))
+            else:
+                valid.append((number, resident))
+
+        valid, taken = self.exclude_taken(valid)
+        errors.extend(taken)
+
+        if valid and not self.dry_run:
+            try:
+                self.insert(valid, pool)
+            except IntegrityError:
+                # Lost a race with a concurrent registration; nothing from this chunk was saved
+                errors.extend(
+                    self.error(number, resident, {'row': ["Conflicted with a concurrent registration; import it again."]})
+                    for number, resident in valid
+                )
+                valid = []
+        if not self.dry_run:
+            self.created += len(valid)
+
+        self.rejected += len(errors)
+        return sorted(errors, key=lambda error: error['row'])
+
+    def error(self, number, data, errors):
+        username = data.get('username') if isinstance(data, dict) else None
+        return {'row': number, 'username': username, 'errors': errors}
+
+    def clean_row(self, data):
+        if data is None:
+            return None, {'row': ["Malformed JSON object."]}
+
+        errors = {}
+        resident = {}
+
+        username = str(data.get('username') or '').strip()
+        if not username:
+            errors['username'] = [REQUIRED]
+        elif len(username) > 150:
+            errors['username'] = ["Ensure this field has no more than 150 characters."]
+        else:
+            try:
+                username_validator(username)
+            except DjangoValidationError as e:
+                errors['username'] = e.messages
+        resident['username'] = User.normalize_username(username)
+
+        email = str(data.get('email') or '').strip()
+        if not email:
+            errors['email'] = [REQUIRED]
+        else:
+            try:
+                validate_email(email)
+            except DjangoValidationError as e:
+                errors['email'] = e.messages
+        resident['email'] = User.objects.normalize_email(email)
+
+        password = data.get('password') or None
+        if password is not None and len(str(password)) < MIN_PASSWORD_LENGTH:
+            errors['password'] = [f"Ensure this field has at least {MIN_PASSWORD_LENGTH} characters."]
+        resident['password'] = str(password) if password is not None else None
+
+        phone_number = str(data.get('phone_number') or '').strip()
+        if len(phone_number) > MAX_PHONE_LENGTH:
+            errors['phone_number'] = [f"Ensure this field has no more than {MAX_PHONE_LENGTH} characters."]
+        resident['phone_number'] = phone_number
+
+        self.clean_location(data, resident, errors)
+        self.clean_societies(data, resident, errors)
+        return resident, errors
+
+    def clean_location(self, data, resident, errors):
+        if self.society is not None and not any(data.get(field) not in (None, '') for field in LOCATION_FIELDS):
+            for field in LOCATION_FIELDS:
+                resident[field] = getattr(self.society, field)
+            return
+
+        for field in LOCATION_FIELDS:
+            value = data.get(field)
+            if value in (None, ''):
+                errors[field] = [REQUIRED]
+                continue
+            try:
+                resident[field] = parse_id(value)
+            except ValueError:
+                errors[field] = ["A valid integer is required."]
+
+        if not any(field in errors for field in LOCATION_FIELDS) and not self.locations.is_valid_hierarchy(
+            *(resident[field] for field in LOCATION_FIELDS)
+        ):
+            errors['location'] = ["Invalid location hierarchy. Please check your selections."]
+
+    def clean_societies(self, data, resident, errors):
+        value = data.get('society_ids')
+        if value in (None, '', []):
+            resident['society_ids'] = [self.society.id] if self.society is not None else []
+            return
+        try:
+            society_ids = list(dict.fromkeys(parse_id_list(value)))
+        except ValueError:
+            errors['society_ids'] = ["Expected a list of integer IDs."]
+            return
+        missing = [pk for pk in society_ids if pk not in self.society_ids]
+        if missing:
+            errors['society_ids'] = [f"Society with ID(s) {', '.join(str(pk) for pk in missing)} does not exist."]
+        resident['society_ids'] = society_ids
+
+    def exclude_taken(self, valid):
+        """Drops rows whose username or email exists already or appeared earlier in the import."""
+        usernames = [resident['username'] for _, resident in valid]
+        emails = [resident['email'] for _, resident in valid]
+        existing_usernames = set(User.objects.filter(username__in=usernames).values_list('username', flat=True))
+        existing_emails = set(User.objects.filter(email__in=emails).values_list('email', flat=True))
+
+        kept, errors = [], []
+        for number, resident in valid:
+            row_errors = {}
+            if resident['username'] in existing_usernames or resident['username'] in self.seen_usernames:
+                row_errors['username'] = ["A user with that username already exists."]
+            if resident['email'] in existing_emails or resident['email'] in self.seen_emails:
+                row_errors['email'] = ["A user with that email already exists."]
+            if row_errors:
+                errors.append(self.error(number, resident, row_errors))
+                continue
+            self.seen_usernames.add(resident['username'])
+            self.seen_emails.add(resident['email'])
+            kept.append((number, resident))
+        return kept, errors
+
+    def hash_passwords(self, residents, pool):
+        passwords = [resident['password'] for resident in residents if resident['password'] is not None]
+        if isinstance(pool, ProcessPoolExecutor):
+            chunksize = max(1, len(passwords) // (self.hash_workers * 4))
+            hashes = iter(pool.map(make_password, passwords, chunksize=chunksize))
+        else:
+            hashes = iter(pool.map(make_password, passwords))
+        return [next(hashes) if resident['password'] is not None else make_password(None) for resident in residents]
+
+    def insert(self, valid, pool):
+        residents = [resident for _, resident in valid]
+        password_hashes = self.hash_passwords(residents, pool)
+
+        with transaction.atomic():
+            User.objects.bulk_create([
+                User(username=resident['username'], email=resident['email'], password=password_hash)
+                for resident, password_hash in zip(residents, password_hashes)
+            ])
+            # Read back rather than rely on bulk_create setting pks, which not every backend does
+            user_ids = dict(User.objects.filter(
+                username__in=[resident['username'] for resident in residents]
+            ).values_list('username', 'id'))
+
+            Profile.objects.bulk_create([
+                Profile(
+                    user_id=user_ids[resident['username']],
+                    phone_number=resident['phone_number'],
+                    **{field: resident[field] for field in LOCATION_FIELDS}
+                )
+                for resident in residents
+            ])
+            profile_ids = dict(Profile.objects.filter(user_id__in=user_ids.values()).values_list('user_id', 'id'))
+
+            memberships = [
+                SocietyMembership(
+                    profile_id=profile_ids[user_ids[resident['username']]],
+                    society_id=society_id,
+                )
+                for resident in residents
+                for society_id in resident['society_ids']
+            ]
+            SocietyMembership.objects.bulk_create(memberships)
+
+            # bulk_create sends no m2m_changed, so do what core.signals would
+            society_ids = {membership.society_id for membership in memberships}
+            refresh_resident_counts(society_ids)
+            bump_society_versions(society_ids)
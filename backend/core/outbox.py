@@ -0,0 +1,109 @@
+# backend/core/outbox.py
+
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutboxEvent
+
+MAX_ATTEMPTS = 8
+# Retry delay doubles per attempt: 30s, 1m, 2m, 4m, ...
+BASE_RETRY_DELAY = timedelta(seconds=30)
+# How long a claimed event is left to its worker before others may take it
+CLAIM_TIMEOUT = timedelta(minutes=5)
+
+# event_type -> handler(payload); handlers must be idempotent, since an event
+# is applied again if the worker dies before marking it done
+_handlers = {}
+
+
+def outbox_handler(event_type):
+    def register(func):
+        _handlers[event_type] = func
+        return func
+    return register
+
+
+def enqueue(event_type, payload):
+    """Writes an event in the caller's transaction; it is applied only if that commits."""
+    return OutboxEvent.objects.create(event_type=event_type, payload=payload)
+
+
+def retry_delay(attempts):
+    return BASE_RETRY_DELAY * (2 ** (attempts - 1))
+
+
+def claim_outbox_batch(batch_size=50, now=None):
+    """
+    Claims up to `batch_size` due events with SELECT ... FOR UPDATE SKIP LOCKED,
+    so several workers can run side by side, and leases them for CLAIM_TIMEOUT
+    by pushing available_at forward. The lease commits at once, so no row lock
+    is held while the handlers run; events of a worker that dies are due again
+    when the lease runs out.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        events = list(
+            OutboxEvent.objects.select_for_update(skip_locked=True)
+            .filter(status='pending', available_at__lte=now)
+            .order_by('id')[:batch_size]
+        )
+        for event in events:
+            event.attempts += 1
+            event.available_at = now + CLAIM_TIMEOUT
+        OutboxEvent.objects.bulk_update(events, ['attempts', 'available_at'])
+    return events
+
+
+def apply_outbox_event(event):
+    """
+    Runs the event's handler and marks it done in one transaction, so either
+    both happen or neither. A failure is retried with backoff until
+    MAX_ATTEMPTS, then marked failed. Returns whether the handler succeeded.
+    """
+    try:
+        handler = _handlers[event.event_type]
+        with transaction.atomic():
+            handler(event.payload)
+            event.status = 'done'
+            event.processed_at = timezone.now()
+            event.save(update_fields=['status', 'processed_at'])
+        return True
+    except Exception as e:
+        event.last_error = f"{type(e).__name__}: {e}"
+        if event.attempts >= MAX_ATTEMPTS:
+            event.status = 'failed'
+        else:
+            event.status = 'pending'
+            event.available_at = timezone.now() + retry_delay(event.attempts)
+        event.processed_at = None
+        print(f"ERROR Outbox: Event {event.id} ({event.event_type}) attempt {event.attempts} failed: {event.last_error}")
+        event.save(update_fields=['status', 'available_at', 'last_error', 'processed_at'])
+        return False
+
+
+def process_outbox_batch(batch_size=50):
+    """
+    Claims a batch of due events (see claim_outbox_batch) and applies each in
+    its own transaction. Returns (done, failed_attempts).
+    """
+    done = failed = 0
+    for event in claim_outbox_batch(batch_size):
+        if apply_outbox_event(event):
+            done += 1
+        else:
+            failed += 1
+    return done, failed
+
+
+def pending_events(event_type, **payload):
+    """Events of `event_type` not yet applied whose payload has the given values."""
+    return OutboxEvent.objects.filter(
+        event_type=event_type, status='pending', **{f"payload__{key}": value for key, value in payload.items()}
+    )
+
+
+def next_outbox_time():
+    """When the earliest pending event becomes due, or None."""
+    return OutboxEvent.objects.filter(status='pending').order_by('available_at').values_list('available_at', flat=True).first()
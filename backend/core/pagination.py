@@ -0,0 +1,23 @@
+# backend/core/pagination.py
+
+from rest_framework.pagination import CursorPagination
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor (keyset) pagination used by every list endpoint. Pages are fetched
+    with WHERE key > cursor instead of OFFSET, so deep pages cost the same as
+    the first one. Views can set `pagination_ordering` to page on a different
+    key; end it with a unique field (e.g. ('-created_at', '-id')) so rows
+    sharing a timestamp keep one order from page to page.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = 'id'
+
+    def get_ordering(self, request, queryset, view):
+        ordering = getattr(view, 'pagination_ordering', None)
+        if ordering:
+            return (ordering,) if isinstance(ordering, str) else tuple(ordering)
+        return super().get_ordering(request, queryset, view)
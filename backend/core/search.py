@@ -0,0 +1,195 @@
+# backend/core/search.py
+
+import threading
+from collections import Counter, defaultdict
+
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db import connection, transaction
+from django.db.models import Case, When, Value, FloatField, F, Q
+from django.db.models.functions import Greatest
+
+from .models import Society
+from .versions import get_version
+
+SEARCH_VERSION = 'society-search'
+
+MIN_QUERY_LENGTH = 2
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 25
+
+# A match on the society name counts for more than one on its location or address
+FIELD_WEIGHTS = {
+    'name': 1.0,
+    'circle': 0.7,
+    'district': 0.6,
+    'address': 0.5,
+}
+# Added once when the query starts the society name or a word in it
+PREFIX_BONUS = 0.5
+MIN_SCORE = 0.3
+# pg_trgm's <% threshold for the index scan: the lowest similarity that can
+# still reach MIN_SCORE on the heaviest field
+INDEX_THRESHOLD = MIN_SCORE / max(FIELD_WEIGHTS.values())
+
+_lock = threading.Lock()
+_index = None
+
+
+def normalize(text):
+    return ' '.join((text or '').lower().split())
+
+
+def trigrams(text):
+    """Word trigrams padded the way pg_trgm pads them ('  w', ' wo', 'wor', ...)."""
+    grams = set()
+    for word in normalize(text).split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def is_prefix_match(query, text):
+    return text.startswith(query) or f" {query}" in text
+
+
+class SocietySearchIndex:
+    """
+    In-process trigram index over society name, address and circle/district
+    names, used when the database has no pg_trgm (SQLite test runs).
+    """
+
+    def __init__(self, version, rows):
+        self.version = version
+        self.rows = {}
+        self.field_grams = {}
+        self.postings = defaultdict(set)
+
+        for pk, name, address, circle_name, district_name in rows:
+            fields = {
+                'name': normalize(name),
+                'circle': normalize(circle_name),
+                'district': normalize(district_name),
+                'address': normalize(address),
+            }
+            self.rows[pk] = {
+                'id': pk,
+                'name': name,
+                'address': address,
+                'circle': circle_name,
+                'district': district_name,
+                'fields': fields,
+            }
+            for field, text in fields.items():
+                grams = trigrams(text)
+                self.field_grams[(pk, field)] = grams
+                for gram in grams:
+                    self.postings[gram].add(pk)
+
+    def score(self, pk, query, query_grams):
+        best = 0.0
+        for field, weight in FIELD_WEIGHTS.items():
+            grams = self.field_grams[(pk, field)]
+            # Share of the query's trigrams found in the field (word similarity)
+            similarity = len(query_grams & grams) / len(query_grams) if query_grams else 0.0
+            best = max(best, similarity * weight)
+        if is_prefix_match(query, self.rows[pk]['fields']['name']):
+            best += PREFIX_BONUS
+        return best
+
+    def search(self, query, limit):
+        query = normalize(query)
+        query_grams = trigrams(query)
+
+        candidates = Counter()
+        for gram in query_grams:
+            candidates.update(self.postings.get(gram, ()))
+
+        results = []
+        for pk in candidates:
+            score = self.score(pk, query, query_grams)
+            if score >= MIN_SCORE:
+                results.append((score, pk))
+
+        results.sort(key=lambda item: (-item[0], self.rows[item[1]]['name']))
+        return [
+            {
+                'id': pk,
+                'name': self.rows[pk]['name'],
+                'address': self.rows[pk]['address'],
+                'circle': self.rows[pk]['circle'],
+                'district': self.rows[pk]['district'],
+                'score': round(score, 3),
+            }
+            for score, pk in results[:limit]
+        ]
+
+
+def get_search_index():
+    global _index
+    version = get_version(SEARCH_VERSION)
+    index = _index
+    if index is not None and index.version == version:
+        return index
+
+    with _lock:
+        if _index is None or _index.version != version:
+            rows = Society.objects.values_list('id', 'name', 'address', 'circle__name', 'district__name')
+            _index = SocietySearchIndex(version, rows)
+        return _index
+
+
+def _search_postgres(query, limit):
+    """
+    Scored like SocietySearchIndex.score(). The <% (trigram_word_similar)
+    prefilter is served by the pg_trgm GIN indexes added in migration 0017;
+    the score filter then applies MIN_SCORE exactly.
+    """
+    score = Greatest(
+        TrigramWordSimilarity(query, 'name') * FIELD_WEIGHTS['name'],
+        TrigramWordSimilarity(query, 'circle__name') * FIELD_WEIGHTS['circle'],
+        TrigramWordSimilarity(query, 'district__name') * FIELD_WEIGHTS['district'],
+        TrigramWordSimilarity(query, 'address') * FIELD_WEIGHTS['address'],
+    ) + Case(
+        When(Q(name__istartswith=query) | Q(name__icontains=f" {query}"), then=Value(PREFIX_BONUS)),
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+
+    queryset = Society.objects.filter(
+        Q(name__trigram_word_similar=query) |
+        Q(address__trigram_word_similar=query) |
+        Q(circle__name__trigram_word_similar=query) |
+        Q(district__name__trigram_word_similar=query)
+    ).annotate(
+        score=score,
+        circle_name=F('circle__name'),
+        district_name=F('district__name'),
+    ).filter(score__gte=MIN_SCORE).order_by('-score', 'name')[:limit]
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            # Scoped to this transaction; the default (0.6) would drop weaker matches
+            cursor.execute("SET LOCAL pg_trgm.word_similarity_threshold = %s", [INDEX_THRESHOLD])
+        return [
+            {
+                'id': society.id,
+                'name': society.name,
+                'address': society.address,
+                'circle': society.circle_name,
+                'district': society.district_name,
+                'score': round(society.score, 3),
+            }
+            for society in queryset
+        ]
+
+
+def search_societies(query, limit=DEFAULT_LIMIT):
+    """Ranked typeahead matches for `query`, at most `limit` (capped at MAX_LIMIT)."""
+    query = normalize(query)
+    if len(query) < MIN_QUERY_LENGTH:
+        return []
+    limit = max(1, min(limit, MAX_LIMIT))
+
+    if connection.vendor == 'postgresql':
+        return _search_postgres(query, limit)
+    return get_search_index().search(query, limit)
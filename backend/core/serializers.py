@@ -10,11 +10,82 @@ from django.contrib.auth import authenticate
 
 from .models import (
     Society, Service, ServiceProvider, Profile, OTP,
-    VotingRequest, Vote, Country, State, District, Circle
+    VotingRequest, Vote, Country, State, District, Circle,
+    ArchivedVotingRequest
 )
+from .locations import get_location_snapshot
+from .context import get_user_context
+from .hashing import create_user
+
+# --- Custom Fields ---
+class BulkPrimaryKeyListField(serializers.ListField):
+    """
+    List of primary keys resolved with a single id__in query.
+    Every missing ID is reported in one error and the validated value is the
+    list of model instances, in request order with duplicates dropped, so
+    create() can use them without querying again.
+    """
+    default_error_messages = {
+        'does_not_exist': '{model} with ID(s) {pk_list} does not exist.',
+    }
+
+    def __init__(self, queryset, **kwargs):
+        kwargs.setdefault('child', serializers.IntegerField())
+        self.queryset = queryset
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        pks = list(dict.fromkeys(super().to_internal_value(data)))
+        if not pks:
+            return []
+
+        instances = self.queryset.all().in_bulk(pks)
+        missing = [pk for pk in pks if pk not in instances]
+        if missing:
+            self.fail(
+                'does_not_exist',
+                model=self.queryset.model._meta.verbose_name.capitalize(),
+                pk_list=', '.join(str(pk) for pk in missing)
+            )
+        return [instances[pk] for pk in pks]
 
 # --- Location Serializers ---
-class CountrySerializer(serializers.ModelSerializer):
+class ExpandableLocationSerializer(serializers.ModelSerializer):
+    """
+    Location serializer whose parent comes back as an ID unless it is named in
+    `expand`, a nested dict such as {'district': {'state': {}}}.
+    """
+    parent_field = None
+    parent_serializer_class = None
+
+    def __init__(self, *args, **kwargs):
+        self.expand = kwargs.pop('expand', None) or {}
+        super().__init__(*args, **kwargs)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if self.parent_field:
+            if self.parent_field in self.expand:
+                fields[self.parent_field] = self.parent_serializer_class(
+                    read_only=True, expand=self.expand[self.parent_field]
+                )
+            else:
+                fields[self.parent_field] = serializers.PrimaryKeyRelatedField(read_only=True)
+        return fields
+
+    @classmethod
+    def expandable_paths(cls):
+        """Dotted paths accepted in ?expand=, e.g. ['district', 'district.state', ...]."""
+        paths = []
+        prefix = ''
+        serializer_class = cls
+        while serializer_class.parent_field:
+            prefix = f"{prefix}.{serializer_class.parent_field}" if prefix else serializer_class.parent_field
+            paths.append(prefix)
+            serializer_class = serializer_class.parent_serializer_class
+        return paths
+
+class CountrySerializer(ExpandableLocationSerializer):
     class Meta:
         model = Country
         fields = ['id', 'name', 'code']
@@ -40,9 +111,34 @@ class CircleSerializer(serializers.ModelSerializer):
         model = Circle
         fields = ['id', 'name', 'district']
 
+# Compact variants used by the location viewsets: parents are IDs unless expanded
+class CompactStateSerializer(ExpandableLocationSerializer):
+    parent_field = 'country'
+    parent_serializer_class = CountrySerializer
+
+    class Meta:
+        model = State
+        fields = ['id', 'name', 'code', 'country']
+
+class CompactDistrictSerializer(ExpandableLocationSerializer):
+    parent_field = 'state'
+    parent_serializer_class = CompactStateSerializer
+
+    class Meta:
+        model = District
+        fields = ['id', 'name', 'state']
+
+class CompactCircleSerializer(ExpandableLocationSerializer):
+    parent_field = 'district'
+    parent_serializer_class = CompactDistrictSerializer
+
+    class Meta:
+        model = Circle
+        fields = ['id', 'name', 'district']
+
 # --- Basic Serializers ---
 class SocietySerializer(serializers.ModelSerializer):
-    resident_count = serializers.SerializerMethodField()
+    resident_count = serializers.IntegerField(read_only=True)
     country = CountrySerializer(read_only=True)
     state = StateSerializer(read_only=True)
     district = DistrictSerializer(read_only=True)
@@ -52,13 +148,6 @@ class SocietySerializer(serializers.ModelSerializer):
         model = Society
         fields = ['id', 'name', 'address', 'resident_count', 'country', 'state', 'district', 'circle']
 
-    def get_resident_count(self, obj):
-        """
-        Calculates the number of residents associated with this society.
-        Uses the 'profiles' related_name from Profile.societies ManyToManyField.
-        """
-        return obj.profiles.count()
-
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
@@ -94,10 +183,72 @@ class ServiceProviderSerializer(serializers.ModelSerializer):
              'services': {'required': False}
         }
 
+# Lean provider card for a society's service directory. Built from a fixed
+# number of queries: the page itself (with locations joined), one services
+# prefetch and a society_count subquery, see SocietyViewSet.service_providers.
+class DirectoryServiceSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Service
+        fields = ['id', 'name']
+
+class ProviderDirectorySerializer(serializers.ModelSerializer):
+    services = DirectoryServiceSerializer(many=True, read_only=True)
+    country = serializers.CharField(source='country.name', read_only=True, default=None)
+    state = serializers.CharField(source='state.name', read_only=True, default=None)
+    district = serializers.CharField(source='district.name', read_only=True, default=None)
+    circle = serializers.CharField(source='circle.name', read_only=True, default=None)
+    society_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = ServiceProvider
+        fields = [
+            'id', 'name', 'contact_info', 'brief_note', 'services',
+            'country', 'state', 'district', 'circle', 'society_count'
+        ]
+        read_only_fields = fields
+
 # --- Authentication & Registration Serializers ---
 
+class LocationHierarchyMixin:
+    """
+    Validates country_id/state_id/district_id/circle_id against the shared
+    in-memory location index instead of querying each level.
+    Call validate_location_hierarchy() from the serializer's validate().
+    """
+
+    @property
+    def location_snapshot(self):
+        # Pin one snapshot per serializer so all checks see the same version
+        if not hasattr(self, '_location_snapshot'):
+            self._location_snapshot = get_location_snapshot()
+        return self._location_snapshot
+
+    def _validate_location_id(self, level, value):
+        if not self.location_snapshot.exists(level, value):
+            raise serializers.ValidationError(f"{level.capitalize()} with ID {value} does not exist.")
+        return value
+
+    def validate_country_id(self, value):
+        return self._validate_location_id('country', value)
+
+    def validate_state_id(self, value):
+        return self._validate_location_id('state', value)
+
+    def validate_district_id(self, value):
+        return self._validate_location_id('district', value)
+
+    def validate_circle_id(self, value):
+        return self._validate_location_id('circle', value)
+
+    def validate_location_hierarchy(self, data):
+        if not self.location_snapshot.is_valid_hierarchy(
+            data.get('country_id'), data.get('state_id'),
+            data.get('district_id'), data.get('circle_id')
+        ):
+            raise serializers.ValidationError("Invalid location hierarchy. Please check your selections.")
+
 # Resident Registration Serializer
-class ResidentRegisterSerializer(serializers.Serializer):
+class ResidentRegisterSerializer(LocationHierarchyMixin, serializers.Serializer):
     username = serializers.CharField(max_length=150)
     email = serializers.EmailField()
     password = serializers.CharField(write_only=True, min_length=8)
@@ -109,8 +260,8 @@ class ResidentRegisterSerializer(serializers.Serializer):
     district_id = serializers.IntegerField(write_only=True)
     circle_id = serializers.IntegerField(write_only=True)
     
-    society_ids = serializers.ListField(
-        child=serializers.IntegerField(),
+    society_ids = BulkPrimaryKeyListField(
+        queryset=Society.objects.all(),
         write_only=True,
         required=False,
         allow_empty=True,
@@ -129,60 +280,8 @@ class ResidentRegisterSerializer(serializers.Serializer):
             raise serializers.ValidationError("A user with that email already exists.")
         return value
 
-    def validate_country_id(self, value):
-        try:
-            Country.objects.get(id=value)
-        except ObjectDoesNotExist:
-            raise serializers.ValidationError(f"Country with ID {value} does not exist.")
-        return value
-
-    def validate_state_id(self, value):
-        try:
-            State.objects.get(id=value)
-        except ObjectDoesNotExist:
-            raise serializers.ValidationError(f"State with ID {value} does not exist.")
-        return value
-
-    def validate_district_id(self, value):
-        try:
-            District.objects.get(id=value)
-        except ObjectDoesNotExist:
-            raise serializers.ValidationError(f"District with ID {value} does not exist.")
-        return value
-
-    def validate_circle_id(self, value):
-        try:
-            Circle.objects.get(id=value)
-        except ObjectDoesNotExist:
-            raise serializers.ValidationError(f"Circle with ID {value} does not exist.")
-        return value
-
-    def validate_society_ids(self, values):
-        if not values:
-            return values
-
-        for society_id in values:
-            try:
-                Society.objects.get(id=society_id)
-            except ObjectDoesNotExist:
-                raise serializers.ValidationError(f"Society with ID {society_id} does not exist.")
-        return values
-
     def validate(self, data):
-        # Validate location hierarchy
-        country_id = data.get('country_id')
-        state_id = data.get('state_id')
-        district_id = data.get('district_id')
-        circle_id = data.get('circle_id')
-
-        try:
-            country = Country.objects.get(id=country_id)
-            state = State.objects.get(id=state_id, country=country)
-            district = District.objects.get(id=district_id, state=state)
-            circle = Circle.objects.get(id=circle_id, district=district)
-        except ObjectDoesNotExist:
-            raise serializers.ValidationError("Invalid location hierarchy. Please check your selections.")
-
+        self.validate_location_hierarchy(data)
         return data
 
     @transaction.atomic
@@ -191,7 +290,7 @@ class ResidentRegisterSerializer(serializers.Serializer):
         email = validated_data.get('email')
         password = validated_data.get('password')
 
-        society_ids = validated_data.pop('society_ids', [])
+        societies = validated_data.pop('society_ids', [])
         phone_number = validated_data.pop('phone_number', '')
         
         # Extract location data
@@ -201,12 +300,10 @@ class ResidentRegisterSerializer(serializers.Serializer):
         circle_id = validated_data.pop('circle_id')
         
         validated_data.pop('password', None)
+        # Set by the async registration view, which hashes off the request thread
+        password_hash = validated_data.pop('password_hash', None)
 
-        user = User.objects.create_user(
-            username=username,
-            email=email,
-            password=password
-        )
+        user = create_user(username, email, password, password_hash)
 
         profile = Profile.objects.create(
             user=user,
@@ -217,19 +314,18 @@ class ResidentRegisterSerializer(serializers.Serializer):
             circle_id=circle_id
         )
 
-        if society_ids:
-            societies_to_add = Society.objects.filter(id__in=society_ids)
-            profile.societies.set(societies_to_add)
+        if societies:
+            profile.societies.set(societies)
 
         return user
 
 # Provider Registration Serializer
-class ProviderRegisterSerializer(serializers.Serializer):
+class ProviderRegisterSerializer(LocationHierarchyMixin, serializers.Serializer):
     username = serializers.CharField(max_length=150)
     email = serializers.EmailField()
     password = serializers.CharField(write_only=True, min_length=8)
-    service_ids = serializers.ListField(
-        child=serializers.IntegerField(),
+    service_ids = BulkPrimaryKeyListField(
+        queryset=Service.objects.all(),
         min_length=1,
         write_only=True,
         help_text="List of service IDs this provider offers."
@@ -257,56 +353,10 @@ class ProviderRegisterSerializer(serializers.Serializer):
     def validate_service_ids(self, values):
         if not values:
             raise serializers.ValidationError("At least one service ID must be provided.")
-        for service_id in values:
-            try:
-                Service.objects.get(id=service_id)
-            except ObjectDoesNotExist:
-                raise serializers.ValidationError(f"Service with ID {service_id} does not exist.")
         return values
 
-    def validate_country_id(self, value):
-        try:
-            Country.objects.get(id=value)
-        except ObjectDoesNotExist:
-            raise serializers.ValidationError(f"Country with ID {value} does not exist.")
-        return value
-
-    def validate_state_id(self, value):
-        try:
-            State.objects.get(id=value)
-        except ObjectDoesNotExist:
-            raise serializers.ValidationError(f"State with ID {value} does not exist.")
-        return value
-
-    def validate_district_id(self, value):
-        try:
-            District.objects.get(id=value)
-        except ObjectDoesNotExist:
-            raise serializers.ValidationError(f"District with ID {value} does not exist.")
-        return value
-
-    def validate_circle_id(self, value):
-        try:
-            Circle.objects.get(id=value)
-        except ObjectDoesNotExist:
-            raise serializers.ValidationError(f"Circle with ID {value} does not exist.")
-        return value
-
     def validate(self, data):
-        # Validate location hierarchy
-        country_id = data.get('country_id')
-        state_id = data.get('state_id')
-        district_id = data.get('district_id')
-        circle_id = data.get('circle_id')
-
-        try:
-            country = Country.objects.get(id=country_id)
-            state = State.objects.get(id=state_id, country=country)
-            district = District.objects.get(id=district_id, state=state)
-            circle = Circle.objects.get(id=circle_id, district=district)
-        except ObjectDoesNotExist:
-            raise serializers.ValidationError("Invalid location hierarchy. Please check your selections.")
-
+        self.validate_location_hierarchy(data)
         return data
 
     @transaction.atomic
@@ -315,8 +365,9 @@ class ProviderRegisterSerializer(serializers.Serializer):
         email = validated_data['email']
         password = validated_data['password']
 
-        service_ids = validated_data.pop('service_ids')
+        services = validated_data.pop('service_ids')
         validated_data.pop('password')
+        password_hash = validated_data.pop('password_hash', None)
 
         provider_name = validated_data.pop('name')
         contact_info = validated_data.pop('contact_info', '')
@@ -328,11 +379,7 @@ class ProviderRegisterSerializer(serializers.Serializer):
         district_id = validated_data.pop('district_id')
         circle_id = validated_data.pop('circle_id')
 
-        user = User.objects.create_user(
-            username=username,
-            email=email,
-            password=password
-        )
+        user = create_user(username, email, password, password_hash)
 
         service_provider = ServiceProvider.objects.create(
             user=user,
@@ -345,16 +392,17 @@ class ProviderRegisterSerializer(serializers.Serializer):
             circle_id=circle_id
         )
         
-        services = Service.objects.filter(id__in=service_ids)
         service_provider.services.set(services)
 
         return service_provider
 
 # Login Serializer
-class LoginSerializer(serializers.Serializer):
+# Field checks only; the async login views verify the password on the hashing pool
+class CredentialsSerializer(serializers.Serializer):
     username = serializers.CharField(required=True)
     password = serializers.CharField(write_only=True, required=True)
 
+class LoginSerializer(CredentialsSerializer):
     def validate(self, data):
         username = data.get('username')
         password = data.get('password')
@@ -447,23 +495,13 @@ class VotingRequestSerializer(serializers.ModelSerializer):
     initiated_by = UserSerializer(read_only=True)
     resident_user = UserSerializer(read_only=True)
     service_provider = ServiceProviderSerializer(read_only=True)
-    approved_votes_count = serializers.SerializerMethodField()
-    rejected_votes_count = serializers.SerializerMethodField()
+    approved_votes_count = serializers.IntegerField(source='approved_count', read_only=True)
+    rejected_votes_count = serializers.IntegerField(source='rejected_count', read_only=True)
     has_voted = serializers.SerializerMethodField()
     society = SocietySerializer(read_only=True)
     society_name = serializers.CharField(source='society.name', read_only=True)
     status_display = serializers.CharField(source='get_status_display', read_only=True)
 
-    def get_approved_votes_count(self, obj):
-        """Returns the count of 'approve' votes for this request."""
-        count = obj.votes.filter(vote_type='approve').count()
-        return count
-
-    def get_rejected_votes_count(self, obj):
-        """Returns the count of 'reject' votes for this request."""
-        count = obj.votes.filter(vote_type='reject').count()
-        return count
-
     class Meta:
         model = VotingRequest
         fields = [
@@ -478,6 +516,10 @@ class VotingRequestSerializer(serializers.ModelSerializer):
         ]
 
     def get_has_voted(self, obj):
+        # Annotated in the list query by views using UserAnnotationMixin
+        annotated = getattr(obj, 'has_voted', None)
+        if annotated is not None:
+            return annotated
         request = self.context.get('request')
         if request and hasattr(request, 'user') and request.user.is_authenticated:
             user = request.user
@@ -485,6 +527,27 @@ class VotingRequestSerializer(serializers.ModelSerializer):
             return has_voted
         return False
 
+# Same shape as VotingRequestSerializer, for requests moved to the archive
+class ArchivedVotingRequestSerializer(VotingRequestSerializer):
+    class Meta(VotingRequestSerializer.Meta):
+        model = ArchivedVotingRequest
+
+# Serializers for casting many votes at once
+class BulkVoteItemSerializer(serializers.Serializer):
+    request_id = serializers.IntegerField()
+    vote_type = serializers.ChoiceField(choices=Vote.VOTE_CHOICES)
+
+class BulkVoteSerializer(serializers.Serializer):
+    MAX_VOTES = 100
+
+    votes = BulkVoteItemSerializer(many=True, allow_empty=False, max_length=MAX_VOTES)
+
+    def validate_votes(self, votes):
+        request_ids = [vote['request_id'] for vote in votes]
+        if len(request_ids) != len(set(request_ids)):
+            raise serializers.ValidationError("Each voting request may appear only once.")
+        return votes
+
 # Serializer for casting a vote
 class VoteSerializer(serializers.ModelSerializer):
     class Meta:
@@ -504,16 +567,15 @@ class VoteSerializer(serializers.ModelSerializer):
         if not request_obj:
              raise serializers.ValidationError("Voting request context is missing.")
 
-        user_is_resident = hasattr(voter, 'profile')
+        user_context = get_user_context(request_context)
+        user_is_resident = user_context.is_resident
 
-        if user_is_resident and request_obj.society:
-             user_societies = list(voter.profile.societies.all().values_list('id', flat=True))
-             is_user_in_request_society = request_obj.society.id in user_societies
+        if user_is_resident and request_obj.society_id:
+             is_user_in_request_society = request_obj.society_id in user_context.society_ids
         else:
              is_user_in_request_society = False
 
-        if Vote.objects.filter(request=request_obj, voter=voter).exists():
-            raise serializers.ValidationError("You have already voted on this request.")
+        # Duplicate votes are caught by the unique constraint in core.voting.cast_vote
 
         if request_obj.status != 'pending':
              raise serializers.ValidationError("This voting request is no longer active.")
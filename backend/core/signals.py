@@ -0,0 +1,244 @@
+# backend/core/signals.py
+
+from django.utils import timezone
+from django.db.models.signals import post_init, post_save, post_delete, pre_delete, m2m_changed
+from django.db.models import F
+from django.dispatch import receiver
+from django.contrib.auth.models import User
+from rest_framework.authtoken.models import Token
+
+from .models import (
+    Society, Profile, Service, ServiceProvider, VotingRequest, Vote, Country, State, District, Circle, SocietyDeparture
+)
+from .authentication import invalidate_user_tokens
+from .caching import CATALOG_VERSION, bump_society_versions
+from .counters import refresh_resident_counts, refresh_service_counts
+from .events import CREATED, UPDATED, publish_on_commit
+from .locations import LOCATION_VERSION
+from .search import SEARCH_VERSION
+from .versions import bump_version_on_commit
+from .voting import TALLY_FIELDS
+
+
+# --- Location hierarchy invalidation ---
+@receiver(post_save, sender=Country)
+@receiver(post_save, sender=State)
+@receiver(post_save, sender=District)
+@receiver(post_save, sender=Circle)
+@receiver(post_delete, sender=Country)
+@receiver(post_delete, sender=State)
+@receiver(post_delete, sender=District)
+@receiver(post_delete, sender=Circle)
+def location_changed(sender, **kwargs):
+    bump_version_on_commit(LOCATION_VERSION)
+
+
+# --- Society search index invalidation ---
+@receiver(post_save, sender=Society)
+@receiver(post_save, sender=District)
+@receiver(post_save, sender=Circle)
+@receiver(post_delete, sender=Society)
+@receiver(post_delete, sender=District)
+@receiver(post_delete, sender=Circle)
+def society_search_changed(sender, **kwargs):
+    bump_version_on_commit(SEARCH_VERSION)
+
+
+# --- Response cache invalidation ---
+@receiver(post_save, sender=Society)
+@receiver(post_delete, sender=Society)
+def society_changed(sender, instance, **kwargs):
+    bump_society_versions([instance.pk])
+
+@receiver(post_save, sender=Service)
+@receiver(post_delete, sender=Service)
+def service_changed(sender, **kwargs):
+    bump_version_on_commit(CATALOG_VERSION)
+
+
+# --- Society.resident_count maintenance ---
+def update_resident_counts(society_ids):
+    society_ids = list(society_ids)
+    refresh_resident_counts(society_ids)
+    bump_society_versions(society_ids)
+
+@receiver(m2m_changed, sender=Profile.societies.through)
+def profile_societies_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear':
+        # Remember which societies lose residents, and which profiles lose
+        # societies, before the rows are gone
+        if reverse:
+            instance._cleared_society_ids = [instance.pk]
+            instance._cleared_profile_ids = list(instance.profiles.values_list('id', flat=True))
+        else:
+            instance._cleared_society_ids = list(instance.societies.values_list('id', flat=True))
+            instance._cleared_profile_ids = [instance.pk]
+        return
+
+    if action == 'post_clear':
+        society_ids = getattr(instance, '_cleared_society_ids', [])
+        profile_ids = getattr(instance, '_cleared_profile_ids', [])
+    elif action in ('post_add', 'post_remove'):
+        # Reverse side (society.profiles.add(...)) only ever touches one society
+        society_ids = [instance.pk] if reverse else pk_set
+        profile_ids = pk_set if reverse else [instance.pk]
+    else:
+        return
+
+    update_resident_counts(society_ids)
+    now = timezone.now()
+    # The profile payload lists its societies, so membership changes are profile changes
+    Profile.objects.filter(pk__in=profile_ids).update(updated_at=now)
+    if action != 'post_add':
+        # Read by the voting inbox changes feed to drop the societies' requests
+        SocietyDeparture.objects.bulk_create([
+            SocietyDeparture(profile_id=profile_id, society_id=society_id, left_at=now)
+            for profile_id in profile_ids
+            for society_id in society_ids
+        ])
+
+@receiver(pre_delete, sender=Profile)
+def profile_deleting(sender, instance, **kwargs):
+    # Cascaded membership deletes do not send m2m_changed
+    instance._deleted_society_ids = list(instance.societies.values_list('id', flat=True))
+
+@receiver(post_delete, sender=Profile)
+def profile_deleted(sender, instance, **kwargs):
+    update_resident_counts(getattr(instance, '_deleted_society_ids', []))
+
+
+# --- SocietyServiceCount maintenance ---
+def update_service_counts(society_ids):
+    society_ids = list(society_ids)
+    refresh_service_counts(society_ids)
+    bump_society_versions(society_ids)
+
+def provider_society_ids(provider_ids):
+    return ServiceProvider.societies.through.objects.filter(
+        serviceprovider_id__in=provider_ids
+    ).values_list('society_id', flat=True)
+
+@receiver(m2m_changed, sender=ServiceProvider.societies.through)
+def provider_societies_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    # Provider listed in or delisted from societies
+    if action == 'pre_clear':
+        if reverse:
+            instance._cleared_society_ids = [instance.pk]
+        else:
+            instance._cleared_society_ids = list(instance.societies.values_list('id', flat=True))
+        return
+
+    if action == 'post_clear':
+        update_service_counts(getattr(instance, '_cleared_society_ids', []))
+    elif action in ('post_add', 'post_remove'):
+        update_service_counts([instance.pk] if reverse else pk_set)
+
+@receiver(m2m_changed, sender=ServiceProvider.services.through)
+def provider_services_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    # Provider changed the services it offers
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        if reverse:
+            # service.service_providers.add(...): pk_set are providers; a clear
+            # can not tell us which ones, so fall back to every society
+            if action == 'post_clear':
+                update_service_counts(Society.objects.values_list('id', flat=True))
+            else:
+                update_service_counts(provider_society_ids(pk_set))
+        else:
+            update_service_counts(provider_society_ids([instance.pk]))
+
+@receiver(post_init, sender=ServiceProvider)
+def provider_loaded(sender, instance, **kwargs):
+    instance._loaded_is_approved = instance.is_approved
+
+@receiver(post_save, sender=ServiceProvider)
+def provider_saved(sender, instance, created, **kwargs):
+    if created:
+        return
+    society_ids = list(provider_society_ids([instance.pk]))
+    if instance.is_approved != instance._loaded_is_approved:
+        # Provider approved or unapproved
+        update_service_counts(society_ids)
+        instance._loaded_is_approved = instance.is_approved
+    else:
+        # Name or contact details shown in the society directories changed
+        bump_society_versions(society_ids)
+
+@receiver(pre_delete, sender=ServiceProvider)
+def provider_deleting(sender, instance, **kwargs):
+    instance._deleted_society_ids = list(provider_society_ids([instance.pk]))
+
+@receiver(post_delete, sender=ServiceProvider)
+def provider_deleted(sender, instance, **kwargs):
+    update_service_counts(getattr(instance, '_deleted_society_ids', []))
+
+
+# --- Vote tallies ---
+# core.voting counts the votes it casts in the same UPDATE that checks the
+# request is open and marks them `_tallied`; any other save (admin, shell,
+# fixtures) and every delete is counted here.
+def tally_key(vote):
+    # Read from __dict__ so a vote loaded with .only() is not refetched
+    return vote.__dict__.get('request_id'), vote.__dict__.get('vote_type')
+
+def adjust_tally(key, delta):
+    request_id, vote_type = key
+    field = TALLY_FIELDS.get(vote_type)
+    if request_id is None or field is None:
+        return
+    queryset = VotingRequest.objects.filter(pk=request_id)
+    if delta < 0:
+        queryset = queryset.filter(**{f"{field}__gt": 0})
+    queryset.update(**{field: F(field) + delta}, updated_at=timezone.now())
+
+@receiver(post_init, sender=Vote)
+def vote_loaded(sender, instance, **kwargs):
+    instance._loaded_tally = tally_key(instance) if instance.pk else None
+
+@receiver(post_save, sender=Vote)
+def vote_saved(sender, instance, created, **kwargs):
+    key = tally_key(instance)
+    if created:
+        if not getattr(instance, '_tallied', False):
+            adjust_tally(key, 1)
+    elif key != instance._loaded_tally:
+        # vote_type (or request) changed: move the vote from one tally to the other
+        if instance._loaded_tally is not None:
+            adjust_tally(instance._loaded_tally, -1)
+        adjust_tally(key, 1)
+    instance._loaded_tally = key
+
+@receiver(post_delete, sender=Vote)
+def vote_deleted(sender, instance, **kwargs):
+    adjust_tally(instance._loaded_tally or tally_key(instance), -1)
+
+
+# --- Live voting updates ---
+@receiver(post_save, sender=VotingRequest)
+def voting_request_saved(sender, instance, created, **kwargs):
+    # Tally and status changes made with .update() in core.voting publish their own events
+    publish_on_commit([instance.pk], CREATED if created else UPDATED)
+
+
+# --- Cached token authentication ---
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    # Covers password resets and deactivation
+    invalidate_user_tokens(instance.pk)
+
+
+@receiver(post_save, sender=Token)
+@receiver(post_delete, sender=Token)
+def token_changed(sender, instance, **kwargs):
+    invalidate_user_tokens(instance.user_id)
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_save, sender=ServiceProvider)
+@receiver(post_delete, sender=Profile)
+@receiver(post_delete, sender=ServiceProvider)
+def role_changed(sender, instance, created=True, **kwargs):
+    # Only creation and deletion change the cached role and ids
+    if created:
+        invalidate_user_tokens(instance.user_id)
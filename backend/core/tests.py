@@ -1,3 +1,1389 @@
-from django.test import TestCase
+import asyncio
+import json
+import threading
+from io import StringIO
+from unittest import mock
+from datetime import timedelta
+
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.db import DatabaseError, IntegrityError, connections, transaction
+from django.db.models.signals import pre_delete
+from asgiref.sync import sync_to_async
+from django.db import connection
+from django.core.cache import cache
+from django.core.checks import run_checks
+from django.core.management import CommandError, call_command
+from django.test import AsyncClient, RequestFactory, TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from rest_framework import serializers
+from rest_framework.authtoken.models import Token
+from rest_framework.throttling import AnonRateThrottle
+from django.utils import timezone
+
+from .models import (
+    Country, State, District, Circle, Society, Profile, Service, ServiceProvider, VotingRequest, Vote, OutboxEvent,
+    ArchivedVotingRequest, VotingPolicy,
+)
+from .archiving import archive_batch, archive_cutoff
+from .context import get_user_context
+from .changes import COMMIT_GRACE, cursor_time, encode_cursor, initial_cursor, voting_request_changes
+from .authentication import auth_version_name, issue_token, token_cache
+from .hashing import HashingPool, HashingPoolBusy, get_hashing_pool
+from .views import ResidentLoginView
+from .events import (
+    SETTLED, UPDATED, InProcessBroker, PostgresBroker, publish_voting_requests, read_stream_ticket, society_topic,
+)
+from .locations import build_location_snapshot
+from .onboarding import ResidentImporter, read_csv
+from .outbox import claim_outbox_batch, enqueue, outbox_handler, process_outbox_batch
+from .serializers import BulkPrimaryKeyListField, ResidentRegisterSerializer
+from .search import PREFIX_BONUS, search_societies
+from .versions import bump_version
+from .voting import (
+    cast_vote, cast_votes, next_expiry_time, sweep_voting_requests, VoteConflict, APPROVAL_THRESHOLD, APPROVED_EVENT,
+)
 
 # Create your tests here.
+
+VOTERS = 200
+# Concurrent connections used to cast them
+THREADS = 32
+
+
+def create_society(name='Green Valley'):
+    country = Country.objects.create(name='India', code='IN')
+    state = State.objects.create(name='Assam', code='AS', country=country)
+    district = District.objects.create(name='Kamrup', state=state)
+    circle = Circle.objects.create(name='Guwahati', district=district)
+    return Society.objects.create(
+        name=name, address='GS Road',
+        country=country, state=state, district=district, circle=circle
+    )
+
+
+def create_resident(username, *societies):
+    user = User.objects.create(username=username)
+    Profile.objects.create(user=user).societies.add(*societies)
+    return user
+
+
+class CastVoteTests(TestCase):
+    def setUp(self):
+        self.society = create_society()
+        self.voter = create_resident('voter', self.society)
+        # Quorum is capped at the resident count; keep one vote short of it
+        for i in range(APPROVAL_THRESHOLD):
+            create_resident(f'resident{i}', self.society)
+        self.joiner = create_resident('joiner')
+        self.voting_request = VotingRequest.objects.create(
+            request_type='resident_join', society=self.society,
+            initiated_by=self.joiner, resident_user=self.joiner,
+            expiry_time=timezone.now() + timedelta(minutes=5)
+        )
+
+    def test_second_vote_conflicts(self):
+        self.assertEqual(cast_vote(self.voting_request, self.voter, 'approve'), 'pending')
+        with self.assertRaisesMessage(VoteConflict, "You have already voted on this request."):
+            cast_vote(self.voting_request, self.voter, 'reject')
+
+        self.voting_request.refresh_from_db()
+        self.assertEqual(Vote.objects.filter(request=self.voting_request).count(), 1)
+        self.assertEqual((self.voting_request.approved_count, self.voting_request.rejected_count), (1, 0))
+
+
+class VoteTallyTests(TestCase):
+    def setUp(self):
+        self.society = create_society()
+        self.voter = create_resident('voter', self.society)
+        for i in range(APPROVAL_THRESHOLD):
+            create_resident(f'resident{i}', self.society)
+        self.joiner = create_resident('joiner')
+        self.voting_request = VotingRequest.objects.create(
+            request_type='resident_join', society=self.society,
+            initiated_by=self.joiner, resident_user=self.joiner,
+            expiry_time=timezone.now() + timedelta(minutes=5)
+        )
+
+    def tallies(self):
+        self.voting_request.refresh_from_db()
+        return self.voting_request.approved_count, self.voting_request.rejected_count
+
+    def test_cast_votes_are_counted_once(self):
+        cast_vote(self.voting_request, self.voter, 'approve')
+        other = create_resident('other', self.society)
+        cast_votes(other, [{'request_id': self.voting_request.pk, 'vote_type': 'reject'}], society_ids={self.society.pk})
+        self.assertEqual(self.tallies(), (1, 1))
+
+    def test_saved_changed_and_deleted_votes(self):
+        vote = Vote.objects.create(request=self.voting_request, voter=self.voter, vote_type='approve')
+        self.assertEqual(self.tallies(), (1, 0))
+
+        vote = Vote.objects.get(pk=vote.pk)
+        vote.vote_type = 'reject'
+        vote.save()
+        self.assertEqual(self.tallies(), (0, 1))
+        # Saving again without a change counts nothing
+        vote.save()
+        self.assertEqual(self.tallies(), (0, 1))
+
+        Vote.objects.get(pk=vote.pk).delete()
+        self.assertEqual(self.tallies(), (0, 0))
+
+    def test_admin_cannot_add_or_change_votes(self):
+        vote_admin = admin.site._registry[Vote]
+        self.assertFalse(vote_admin.has_add_permission(None))
+        self.assertFalse(vote_admin.has_change_permission(None))
+
+    def test_reconcile_fixes_drifted_tallies(self):
+        cast_vote(self.voting_request, self.voter, 'approve')
+        VotingRequest.objects.filter(pk=self.voting_request.pk).update(approved_count=7, rejected_count=2)
+
+        out = StringIO()
+        call_command('reconcile_vote_tallies', '--dry-run', stdout=out)
+        self.assertIn('stored 7/2, actual 1/0', out.getvalue())
+        self.assertEqual(self.tallies(), (7, 2))
+
+        call_command('reconcile_vote_tallies', stdout=StringIO())
+        self.assertEqual(self.tallies(), (1, 0))
+        out = StringIO()
+        call_command('reconcile_vote_tallies', stdout=out)
+        self.assertIn('in sync', out.getvalue())
+
+
+@skipUnlessDBFeature('has_select_for_update')
+class ConcurrentVotingTests(TransactionTestCase):
+    """
+    Fires VOTERS votes (plus a duplicate from each voter) at one request from
+    THREADS threads, each with its own connection. Needs a database with row
+    locking, i.e. Postgres: python manage.py test core
+    """
+
+    def setUp(self):
+        self.society = create_society()
+        self.voters = [create_resident(f'voter{i}', self.society) for i in range(VOTERS)]
+        self.joiner = create_resident('joiner')
+        self.voting_request = VotingRequest.objects.create(
+            request_type='resident_join', society=self.society,
+            initiated_by=self.joiner, resident_user=self.joiner,
+            expiry_time=timezone.now() + timedelta(minutes=5)
+        )
+
+    def fire(self, voters, vote_type):
+        # THREADS workers share the votes so the burst stays under max_connections
+        pending = list(voters)
+        barrier = threading.Barrier(THREADS)
+        results = []
+        lock = threading.Lock()
+
+        def work():
+            try:
+                barrier.wait()
+                while True:
+                    with lock:
+                        if not pending:
+                            return
+                        voter = pending.pop()
+                    try:
+                        outcome = cast_vote(self.voting_request, voter, vote_type)
+                    except VoteConflict as e:
+                        outcome = str(e)
+                    with lock:
+                        results.append(outcome)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=work) for _ in range(THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_burst_approves_exactly_once(self):
+        results = self.fire(self.voters + self.voters, 'approve')
+
+        self.voting_request.refresh_from_db()
+        votes = Vote.objects.filter(request=self.voting_request).count()
+
+        self.assertEqual(len(results), 2 * VOTERS)
+        self.assertEqual(results.count('approved'), 1)
+        self.assertEqual(self.voting_request.status, 'approved')
+        self.assertEqual(votes, APPROVAL_THRESHOLD)
+        self.assertEqual(self.voting_request.approved_count, votes)
+        self.assertEqual(OutboxEvent.objects.filter(event_type=APPROVED_EVENT).count(), 1)
+
+        # The membership is added by the outbox worker, not the voting request
+        self.assertFalse(self.joiner.profile.societies.exists())
+        self.assertEqual(process_outbox_batch(), (1, 0))
+        self.assertEqual(self.joiner.profile.societies.filter(pk=self.society.pk).count(), 1)
+
+    def test_duplicate_votes_conflict(self):
+        voters = self.voters[:2]
+        results = self.fire(voters * 50, 'approve')
+
+        self.voting_request.refresh_from_db()
+        self.assertEqual(results.count('pending'), 2)
+        self.assertEqual(results.count("You have already voted on this request."), 98)
+        self.assertEqual(self.voting_request.approved_count, 2)
+        self.assertEqual(self.voting_request.status, 'pending')
+
+
+class StopSweeping(Exception):
+    pass
+
+
+class VotingSweeperTests(TestCase):
+    def setUp(self):
+        self.society = create_society()
+        VotingPolicy.objects.create(society=self.society, approval_threshold=1, rejection_threshold=1)
+        self.initiator = create_resident('initiator', self.society)
+        self.voter = create_resident('voter', self.society)
+
+    def add_request(self, expires_in, vote_type=None):
+        voting_request = VotingRequest.objects.create(
+            request_type='resident_join', society=self.society, initiated_by=self.initiator,
+            resident_user=self.initiator, expiry_time=timezone.now() + expires_in
+        )
+        if vote_type:
+            Vote.objects.create(request=voting_request, voter=self.voter, vote_type=vote_type)
+        return voting_request
+
+    def status(self, voting_request):
+        voting_request.refresh_from_db()
+        return voting_request.status
+
+    def test_settles_overdue_requests(self):
+        overdue = timedelta(minutes=-1)
+        approved = self.add_request(overdue, 'approve')
+        rejected = self.add_request(overdue, 'reject')
+        expired = [self.add_request(overdue) for _ in range(3)]
+        open_request = self.add_request(timedelta(minutes=5))
+
+        with mock.patch('core.voting.publish_on_commit') as publish:
+            self.assertEqual(sweep_voting_requests(), (2, 3))
+
+        self.assertEqual((self.status(approved), self.status(rejected)), ('approved', 'rejected'))
+        self.assertEqual({self.status(voting_request) for voting_request in expired}, {'expired'})
+        self.assertEqual(self.status(open_request), 'pending')
+        self.assertEqual(list(OutboxEvent.objects.filter(event_type=APPROVED_EVENT).values_list('payload', flat=True)), [{
+            'voting_request_id': approved.pk, 'request_type': 'resident_join', 'society_id': self.society.pk,
+            'resident_user_id': self.initiator.pk, 'service_provider_id': None,
+        }])
+        settled = {request_id for call in publish.call_args_list if call.args[1] == SETTLED for request_id in call.args[0]}
+        self.assertEqual(settled, {approved.pk, rejected.pk, *(voting_request.pk for voting_request in expired)})
+        # Nothing is left for a second sweep
+        self.assertEqual(sweep_voting_requests(), (0, 0))
+
+    def test_expiries_are_bulk_updates(self):
+        def sweep_queries(count):
+            for _ in range(count):
+                self.add_request(timedelta(minutes=-1))
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(sweep_voting_requests(), (0, count))
+            return len(queries)
+
+        self.assertEqual(sweep_queries(2), sweep_queries(10))
+
+    def test_next_expiry_time(self):
+        self.assertIsNone(next_expiry_time())
+        later = self.add_request(timedelta(minutes=10))
+        sooner = self.add_request(timedelta(minutes=2))
+        self.assertEqual(next_expiry_time(), sooner.expiry_time)
+        VotingRequest.objects.filter(pk=sooner.pk).update(status='rejected')
+        self.assertEqual(next_expiry_time(), later.expiry_time)
+
+    def sweeper_delay(self, *args):
+        command = 'core.management.commands.run_voting_sweeper'
+        # The first sleep ends the otherwise endless loop; the test's connection must stay open
+        with mock.patch(f'{command}.time.sleep', side_effect=StopSweeping) as sleep, \
+                mock.patch(f'{command}.close_old_connections'):
+            with self.assertRaises(StopSweeping):
+                call_command('run_voting_sweeper', *args, stdout=StringIO())
+        return sleep.call_args.args[0]
+
+    def test_sweeper_sleeps_until_the_next_expiry(self):
+        self.assertEqual(self.sweeper_delay('--max-sleep', '30'), 30)
+        self.add_request(timedelta(seconds=10))
+        self.assertAlmostEqual(self.sweeper_delay('--max-sleep', '30'), 10, delta=1)
+        self.assertEqual(self.sweeper_delay('--max-sleep', '5'), 5)
+
+
+class ResidentCountTests(TestCase):
+    def setUp(self):
+        self.society = create_society()
+
+    def count(self):
+        self.society.refresh_from_db()
+        return self.society.resident_count
+
+    def test_join_leave_and_clear(self):
+        first = create_resident('first', self.society)
+        second = create_resident('second', self.society)
+        self.assertEqual(self.count(), 2)
+
+        first.profile.societies.remove(self.society)
+        self.assertEqual(self.count(), 1)
+        self.society.profiles.add(first.profile)
+        self.assertEqual(self.count(), 2)
+        # Adding an existing member changes nothing
+        second.profile.societies.add(self.society)
+        self.assertEqual(self.count(), 2)
+
+        self.society.profiles.clear()
+        self.assertEqual(self.count(), 0)
+
+    def test_deleted_resident_leaves(self):
+        create_resident('first', self.society)
+        create_resident('second', self.society).delete()
+        self.assertEqual(self.count(), 1)
+
+    def test_reconcile_fixes_drifted_counts(self):
+        create_resident('first', self.society)
+        Society.objects.filter(pk=self.society.pk).update(resident_count=5)
+
+        out = StringIO()
+        call_command('reconcile_resident_counts', '--dry-run', stdout=out)
+        self.assertIn('stored 5, actual 1', out.getvalue())
+        self.assertEqual(self.count(), 5)
+
+        call_command('reconcile_resident_counts', stdout=StringIO())
+        self.assertEqual(self.count(), 1)
+
+
+@skipUnlessDBFeature('has_select_for_update')
+class ConcurrentResidentCountTests(TransactionTestCase):
+    """THREADS residents join one society at once, each from its own connection."""
+
+    def test_concurrent_joins_are_all_counted(self):
+        society = create_society()
+        profiles = [create_resident(f'resident{i}').profile for i in range(THREADS)]
+        barrier = threading.Barrier(THREADS)
+
+        def join(profile):
+            try:
+                barrier.wait()
+                profile.societies.add(society)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=join, args=(profile,)) for profile in profiles]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        society.refresh_from_db()
+        self.assertEqual(society.resident_count, THREADS)
+
+
+class BulkPrimaryKeyListFieldTests(TestCase):
+    def setUp(self):
+        self.society = create_society()
+        self.other = Society.objects.create(
+            name='Blue Hills', address='Zoo Road', country=self.society.country, state=self.society.state,
+            district=self.society.district, circle=self.society.circle
+        )
+
+    def test_resolves_in_one_query(self):
+        field = BulkPrimaryKeyListField(queryset=Society.objects.all())
+        with self.assertNumQueries(1):
+            value = field.run_validation([self.other.pk, self.society.pk, self.other.pk])
+        # Request order, duplicates dropped
+        self.assertEqual(value, [self.other, self.society])
+
+    def test_every_missing_id_in_one_error(self):
+        field = BulkPrimaryKeyListField(queryset=Society.objects.all())
+        with self.assertNumQueries(1), self.assertRaises(serializers.ValidationError) as raised:
+            field.run_validation([self.society.pk, 998, 999])
+        self.assertEqual(raised.exception.detail, ["Society with ID(s) 998, 999 does not exist."])
+
+    def test_create_does_not_query_societies_again(self):
+        society = self.society
+        serializer = ResidentRegisterSerializer(data={
+            'username': 'newcomer', 'email': 'newcomer@example.com', 'password': 'long-enough-1',
+            'country_id': society.country_id, 'state_id': society.state_id,
+            'district_id': society.district_id, 'circle_id': society.circle_id,
+            'society_ids': [society.pk, self.other.pk],
+        })
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        with CaptureQueriesContext(connection) as queries:
+            user = serializer.save()
+        # Only the resident count refresh touches the society table; it reads no rows back
+        self.assertFalse([query['sql'] for query in queries if '"core_society"."name"' in query['sql']])
+        self.assertEqual(set(user.profile.societies.values_list('pk', flat=True)), {society.pk, self.other.pk})
+
+
+class LocationTreeTests(TestCase):
+    url = '/api/locations/tree/'
+
+    def setUp(self):
+        self.society = create_society()
+        self.country, self.state = self.society.country, self.society.state
+
+    def test_tree_and_subtree(self):
+        tree = self.client.get(self.url).json()['tree']
+        self.assertEqual(tree, [{
+            'id': self.country.pk, 'name': 'India', 'code': 'IN', 'states': [{
+                'id': self.state.pk, 'name': 'Assam', 'code': 'AS', 'districts': [{
+                    'id': self.society.district_id, 'name': 'Kamrup', 'circles': [
+                        {'id': self.society.circle_id, 'name': 'Guwahati'},
+                    ],
+                }],
+            }],
+        }])
+
+        response = self.client.get(self.url, {'state_id': self.state.pk}).json()
+        self.assertEqual((response['level'], response['tree']['name']), ('state', 'Assam'))
+        self.assertEqual(self.client.get(self.url, {'state_id': 999}).status_code, 404)
+        self.assertEqual(self.client.get(self.url, {'state_id': 'abc'}).status_code, 400)
+
+    def test_not_modified_until_a_location_changes(self):
+        etag = self.client.get(self.url)['ETag']
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Circle.objects.create(name='Dispur', district=self.society.district)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        circles = response.json()['tree'][0]['states'][0]['districts'][0]['circles']
+        self.assertEqual([circle['name'] for circle in circles], ['Dispur', 'Guwahati'])
+
+    def test_rows_committed_mid_build_are_left_out(self):
+        # As if the country was committed after the country level had been read
+        with mock.patch.object(Country.objects, 'order_by', return_value=Country.objects.none()):
+            snapshot = build_location_snapshot(1)
+        self.assertEqual(snapshot.tree, [])
+        self.assertFalse(snapshot.exists('state', self.state.pk))
+        self.assertFalse(snapshot.exists('circle', self.society.circle_id))
+
+
+# Without caching, so query counts are those of building the response
+NO_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+
+
+@override_settings(CACHES=NO_CACHE)
+class LocationExpandTests(TestCase):
+    url = '/api/circles/'
+
+    def setUp(self):
+        self.district = create_society().district
+
+    def add_circles(self, count):
+        for _ in range(count):
+            Circle.objects.create(name=f'Circle {Circle.objects.count()}', district=self.district)
+
+    def test_compact_rows_by_default(self):
+        row = self.client.get(self.url).json()['results'][0]
+        self.assertEqual(row['district'], self.district.pk)
+
+    def test_expanded_parents_cost_no_extra_queries(self):
+        for expand in ('', 'district', 'district.state', 'district,district.state,district.state.country'):
+            with self.subTest(expand=expand):
+                self.add_circles(2)
+                # Page only; the expanded parents are joined in
+                with self.assertNumQueries(1):
+                    response = self.client.get(self.url, {'expand': expand})
+                self.add_circles(8)
+                with self.assertNumQueries(1):
+                    self.client.get(self.url, {'expand': expand})
+
+        row = response.json()['results'][0]
+        self.assertEqual(row['district']['state']['country']['code'], 'IN')
+
+    def test_unknown_expansion_is_rejected(self):
+        response = self.client.get(self.url, {'expand': 'district,society'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('society', response.json()['expand'])
+
+
+class LocationHierarchyValidationTests(TestCase):
+    def setUp(self):
+        self.society = create_society()
+        other_district = District.objects.create(name='Nagaon', state=self.society.state)
+        self.other_circle = Circle.objects.create(name='Raha', district=other_district)
+
+    def serializer(self, **location):
+        society = self.society
+        data = {
+            'username': 'newcomer', 'email': 'newcomer@example.com', 'password': 'long-enough-1',
+            'country_id': society.country_id, 'state_id': society.state_id,
+            'district_id': society.district_id, 'circle_id': society.circle_id,
+        }
+        data.update(location)
+        return ResidentRegisterSerializer(data=data)
+
+    def test_valid_hierarchy(self):
+        serializer = self.serializer()
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+
+    def test_circle_outside_the_district_is_rejected(self):
+        serializer = self.serializer(circle_id=self.other_circle.pk)
+        self.assertFalse(serializer.is_valid())
+        self.assertEqual(serializer.errors['non_field_errors'], ["Invalid location hierarchy. Please check your selections."])
+
+    def test_unknown_location_is_rejected(self):
+        serializer = self.serializer(state_id=999)
+        self.assertFalse(serializer.is_valid())
+        self.assertEqual(serializer.errors['state_id'], ["State with ID 999 does not exist."])
+
+    def test_checked_against_the_in_memory_index(self):
+        self.serializer().is_valid()
+        with CaptureQueriesContext(connection) as queries:
+            self.serializer(circle_id=self.other_circle.pk).is_valid()
+        location_tables = ('"core_country"', '"core_state"', '"core_district"', '"core_circle"')
+        self.assertFalse([query['sql'] for query in queries if any(table in query['sql'] for table in location_tables)])
+
+
+@override_settings(CACHES=NO_CACHE)
+class ProviderDirectoryTests(TestCase):
+    def setUp(self):
+        self.society = create_society()
+        self.other_society = Society.objects.create(
+            name='Blue Hills', address='Zoo Road', country=self.society.country, state=self.society.state,
+            district=self.society.district, circle=self.society.circle
+        )
+        self.services = [Service.objects.create(name=name) for name in ('Plumbing', 'Electrical')]
+        self.url = f'/api/societies/{self.society.pk}/service-providers/'
+        self.providers = 0
+
+    def add_providers(self, count):
+        for _ in range(count):
+            self.providers += 1
+            society = self.society
+            provider = ServiceProvider.objects.create(
+                user=User.objects.create(username=f'provider{self.providers}'), name=f'Provider {self.providers}',
+                is_approved=True, country=society.country, state=society.state,
+                district=society.district, circle=society.circle
+            )
+            provider.services.add(*self.services)
+            provider.societies.add(self.society, self.other_society)
+
+    def test_fixed_query_count(self):
+        self.add_providers(2)
+        # Society, page (locations joined, society count annotated), services
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url)
+        self.add_providers(8)
+        with self.assertNumQueries(3):
+            self.assertEqual(len(self.client.get(self.url).json()['results']), 10)
+
+        row = response.json()['results'][0]
+        self.assertEqual(row['society_count'], 2)
+        self.assertEqual(row['district'], 'Kamrup')
+        self.assertEqual(sorted(service['name'] for service in row['services']), ['Electrical', 'Plumbing'])
+
+    def test_service_filter_keeps_the_count(self):
+        self.add_providers(3)
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url, {'service_id': self.services[0].pk})
+        self.assertEqual(len(response.json()['results']), 3)
+
+
+class UserContextTests(TestCase):
+    def setUp(self):
+        self.society = create_society()
+        self.voter = create_resident('voter', self.society)
+        for i in range(APPROVAL_THRESHOLD):
+            create_resident(f'resident{i}', self.society)
+        self.joiner = create_resident('joiner')
+        self.voting_request = VotingRequest.objects.create(
+            request_type='resident_join', society=self.society,
+            initiated_by=self.joiner, resident_user=self.joiner,
+            expiry_time=timezone.now() + timedelta(minutes=5)
+        )
+        self.auth = {'HTTP_AUTHORIZATION': f'Token {Token.objects.create(user=self.voter).key}'}
+
+    def lookups(self, queries):
+        sql = [query['sql'] for query in queries]
+        profiles = [query for query in sql if 'FROM "core_profile" WHERE' in query]
+        society_ids = [query for query in sql if 'INNER JOIN "core_profile_societies"' in query]
+        return len(profiles), len(society_ids)
+
+    def test_vote_reads_profile_and_societies_once(self):
+        # get_object() filters by the societies and VoteSerializer checks them again
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                f'/api/votingrequests/{self.voting_request.pk}/vote/', {'vote_type': 'approve'},
+                content_type='application/json', **self.auth
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.lookups(queries), (1, 1))
+
+    def test_list_reads_profile_and_societies_once(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/votingrequests/', **self.auth)
+        self.assertEqual(len(response.json()['results']), 1)
+        self.assertEqual(self.lookups(queries), (1, 1))
+
+    def test_context_is_per_request_and_per_user(self):
+        request = RequestFactory().get('/')
+        request.user = self.voter
+        context = get_user_context(request)
+        self.assertIs(get_user_context(request), context)
+        self.assertEqual((context.role, context.society_ids), ('resident', frozenset({self.society.pk})))
+
+        # Authentication swapped the user: the context built for the old one is dropped
+        request.user = self.joiner
+        self.assertEqual(get_user_context(request).society_ids, frozenset())
+
+
+class VotingStreamTests(TestCase):
+    def setUp(self):
+        self.user = create_resident('streamer', create_society())
+        self.token = Token.objects.create(user=self.user)
+
+    def test_wsgi_has_no_stream(self):
+        # Under WSGI the endless response would be buffered and pin a worker
+        headers = {'HTTP_AUTHORIZATION': f'Token {self.token.key}'}
+        self.assertEqual(self.client.get('/api/votingrequests/stream/', **headers).status_code, 204)
+        self.assertEqual(self.client.post('/api/votingrequests/stream-ticket/', **headers).status_code, 204)
+
+    async def test_asgi_ticket_identifies_user(self):
+        response = await AsyncClient().post(
+            '/api/votingrequests/stream-ticket/', headers={'Authorization': f'Token {self.token.key}'}
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(read_stream_ticket(response.json()['ticket']), self.user.pk)
+        self.assertIsNone(read_stream_ticket(self.token.key))
+
+    def test_broker_tracks_local_subscribers(self):
+        loop = asyncio.new_event_loop()
+        try:
+            broker = InProcessBroker()
+            self.assertFalse(broker.has_subscribers())
+            subscription = broker.subscribe([society_topic(1)], loop)
+            self.assertTrue(broker.has_subscribers())
+            subscription.close()
+            self.assertFalse(broker.has_subscribers())
+        finally:
+            loop.close()
+
+
+@skipUnlessDBFeature('has_select_for_update')
+class PostgresBrokerTests(TransactionTestCase):
+    def setUp(self):
+        if connection.vendor != 'postgresql':
+            self.skipTest("Needs LISTEN/NOTIFY")
+        cache.delete(PostgresBroker.LISTENERS_KEY)
+
+    def test_notifications_reach_local_subscribers(self):
+        broker = PostgresBroker()
+
+        def publish():
+            try:
+                broker.publish([society_topic(1)], {'type': 'voting_request.settled', 'request': {'id': 7}})
+            finally:
+                connections.close_all()
+
+        async def receive():
+            # As voting_request_stream does: waiting for the listener must not block the loop
+            subscribe = sync_to_async(broker.subscribe, thread_sensitive=False)
+            subscription = await subscribe([society_topic(1)], asyncio.get_running_loop())
+            try:
+                # Published from another connection, as run_voting_sweeper would
+                await sync_to_async(publish, thread_sensitive=False)()
+                return await subscription.get(5)
+            finally:
+                subscription.close()
+
+        try:
+            event = asyncio.run(receive())
+        finally:
+            broker.stop()
+        self.assertEqual(event, {'type': 'voting_request.settled', 'request': {'id': 7}})
+
+    def test_publishing_is_skipped_until_a_stream_opens_anywhere(self):
+        society = create_society()
+        initiator = create_resident('initiator', society)
+        voting_request = VotingRequest.objects.create(
+            request_type='resident_join', society=society, initiated_by=initiator,
+            resident_user=initiator, expiry_time=timezone.now() + timedelta(minutes=5)
+        )
+        publisher = PostgresBroker()
+        with mock.patch('core.events.get_broker', return_value=publisher):
+            # Only the shared cache is read: no SELECT of the request, no NOTIFY
+            with CaptureQueriesContext(connection) as queries:
+                publish_voting_requests([voting_request.pk], UPDATED)
+            self.assertFalse([query['sql'] for query in queries if 'core_votingrequest' in query['sql'] or 'pg_notify' in query['sql']])
+
+            # A stream opens in another process
+            other_process = PostgresBroker()
+            loop = asyncio.new_event_loop()
+            try:
+                subscription = other_process.subscribe([society_topic(society.pk)], loop)
+                self.assertTrue(publisher.has_subscribers())
+                with CaptureQueriesContext(connection) as queries:
+                    publish_voting_requests([voting_request.pk], UPDATED)
+                self.assertTrue([query['sql'] for query in queries if 'pg_notify' in query['sql']])
+                subscription.close()
+            finally:
+                other_process.stop()
+                loop.close()
+
+
+class VotingRequestListQueryTests(TestCase):
+    """The voting request lists cost a fixed number of queries, however many rows they hold."""
+
+    def setUp(self):
+        self.society = create_society()
+        self.other_society = Society.objects.create(
+            name='Blue Hills', address='Zoo Road', country=self.society.country, state=self.society.state,
+            district=self.society.district, circle=self.society.circle
+        )
+        self.service = Service.objects.create(name='Plumbing')
+        self.voter = create_resident('voter', self.society)
+        self.initiator = create_resident('initiator', self.society)
+        self.voter_token = Token.objects.create(user=self.voter)
+        self.initiator_token = Token.objects.create(user=self.initiator)
+        self.providers = 0
+
+    def add_listing_requests(self, count):
+        for _ in range(count):
+            self.providers += 1
+            user = User.objects.create(username=f'provider{self.providers}')
+            provider = ServiceProvider.objects.create(
+                user=user, name=f'Provider {self.providers}', country=self.society.country,
+                state=self.society.state, district=self.society.district, circle=self.society.circle
+            )
+            provider.services.add(self.service)
+            provider.societies.add(self.other_society)
+            VotingRequest.objects.create(
+                request_type='provider_list', society=self.society, initiated_by=self.initiator,
+                service_provider=provider, expiry_time=timezone.now() + timedelta(days=1)
+            )
+
+    def count_queries(self, url, token):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, HTTP_AUTHORIZATION=f'Token {token.key}')
+        self.assertEqual(response.status_code, 200)
+        return len(response.json()['results']), len(queries)
+
+    def test_query_count_does_not_grow_with_rows(self):
+        for url, token, expected in [
+            # Auth version (database cache), profile, society ids, page, provider services, provider societies
+            ('/api/votingrequests/', self.voter_token, 6),
+            # Auth version (database cache), page, provider services, provider societies
+            ('/api/my-initiated-voting-requests/', self.initiator_token, 4),
+        ]:
+            with self.subTest(url=url):
+                self.add_listing_requests(2)
+                # Resolves the token into the auth cache
+                self.count_queries(url, token)
+                rows, few = self.count_queries(url, token)
+                self.add_listing_requests(8)
+                more_rows, many = self.count_queries(url, token)
+                self.assertGreater(more_rows, rows)
+                self.assertEqual(many, few)
+                with self.assertNumQueries(expected):
+                    self.client.get(url, HTTP_AUTHORIZATION=f'Token {token.key}')
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    url = '/api/my-initiated-voting-requests/'
+
+    def setUp(self):
+        token_cache.clear()
+        self.user = create_resident('resident', create_society())
+        self.token = Token.objects.create(user=self.user)
+
+    def get(self):
+        return self.client.get(self.url, HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_expired_token_is_refused_and_replaced_at_login(self):
+        Token.objects.filter(pk=self.token.pk).update(created=timezone.now() - timedelta(days=31))
+        response = self.get()
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json()['detail'], 'Token has expired.')
+
+        new_token = issue_token(self.user)
+        self.assertNotEqual(new_token.key, self.token.key)
+        self.token = new_token
+        self.assertEqual(self.get().status_code, 200)
+
+    def test_cached_token_expires(self):
+        self.assertEqual(self.get().status_code, 200)
+        with override_settings(AUTH_TOKEN_TTL_DAYS=0):
+            self.assertEqual(self.get().status_code, 401)
+
+    def test_password_change_drops_cached_token(self):
+        self.assertEqual(self.get().status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.set_password('a-new-password')
+            self.user.save()
+            Token.objects.filter(user=self.user).delete()
+        self.assertEqual(self.get().status_code, 401)
+
+    def test_version_bump_from_another_process_reloads(self):
+        self.assertEqual(self.get().status_code, 200)
+        # .update() sends no signal, as when another worker changed the row
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.get().status_code, 200)
+        # ...and that worker's bump reaches this one through the shared cache
+        bump_version(auth_version_name(self.user.pk))
+        self.assertEqual(self.get().status_code, 401)
+
+
+class SharedCacheCheckTests(TestCase):
+    def check_ids(self):
+        return [message.id for message in run_checks(tags=['caches'])]
+
+    @override_settings(DEBUG=False, CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_process_local_cache_warns(self):
+        self.assertIn('core.W001', self.check_ids())
+
+    @override_settings(DEBUG=True, CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_process_local_cache_warns_under_debug(self):
+        # run_outbox_worker and run_voting_sweeper write from other processes under runserver too
+        self.assertIn('core.W001', self.check_ids())
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'core_cache'}})
+    def test_shared_cache_passes(self):
+        self.assertNotIn('core.W001', self.check_ids())
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_worker_and_sweeper_refuse_process_local_cache(self):
+        for command in ('run_outbox_worker', 'run_voting_sweeper'):
+            with self.subTest(command=command), self.assertRaisesMessage(CommandError, 'local to each process'):
+                call_command(command, '--once')
+
+
+class ResponseCacheTests(TestCase):
+    """Cached public reads are served until a committed change bumps their version."""
+
+    def setUp(self):
+        self.society = create_society()
+        self.detail_url = f'/api/societies/{self.society.pk}/'
+
+    def get(self, url, **headers):
+        response = self.client.get(url, **headers)
+        self.assertIn(response.status_code, (200, 304))
+        return response
+
+    def test_hit_until_save_commits(self):
+        self.assertEqual(self.get(self.detail_url).json()['name'], 'Green Valley')
+        # update() sends no signals, so the cached response is still served
+        Society.objects.filter(pk=self.society.pk).update(name='Renamed')
+        self.assertEqual(self.get(self.detail_url).json()['name'], 'Green Valley')
+
+        with self.captureOnCommitCallbacks(execute=False):
+            self.society.name = 'Hill View'
+            self.society.save()
+        # Not committed yet, so still the old version
+        self.assertEqual(self.get(self.detail_url).json()['name'], 'Green Valley')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.society.save()
+        self.assertEqual(self.get(self.detail_url).json()['name'], 'Hill View')
+        self.assertEqual(self.get('/api/societies/').json()['results'][0]['name'], 'Hill View')
+
+    def test_applied_approval_refreshes_resident_count(self):
+        joiner = create_resident('joiner')
+        etag = self.get(self.detail_url)['ETag']
+        self.assertEqual(self.get(self.detail_url).json()['resident_count'], 0)
+
+        enqueue(APPROVED_EVENT, {
+            'voting_request_id': 1, 'request_type': 'resident_join', 'society_id': self.society.pk,
+            'resident_user_id': joiner.pk, 'service_provider_id': None,
+        })
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(process_outbox_batch(), (1, 0))
+
+        self.assertEqual(self.get(self.detail_url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        self.assertEqual(self.get(self.detail_url).json()['resident_count'], 1)
+
+    def test_unchanged_version_answers_304(self):
+        etag = self.get(self.detail_url)['ETag']
+        self.assertEqual(self.get(self.detail_url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_catalog_change_invalidates_service_list(self):
+        service = Service.objects.create(name='Plumbing')
+        self.assertEqual([row['name'] for row in self.get('/api/services/').json()['results']], ['Plumbing'])
+        Service.objects.filter(pk=service.pk).update(name='Stale')
+        self.assertEqual([row['name'] for row in self.get('/api/services/').json()['results']], ['Plumbing'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            service.name = 'Electrical'
+            service.save()
+        self.assertEqual([row['name'] for row in self.get('/api/services/').json()['results']], ['Electrical'])
+
+
+class ResidentImportTests(TestCase):
+    header = 'username,email,password,phone_number\n'
+
+    def setUp(self):
+        self.society = create_society()
+        User.objects.create(username='taken', email='taken@example.com')
+        self.staff = User.objects.create(username='staff', is_staff=True)
+        self.token = Token.objects.create(user=self.staff)
+
+    def post(self, body):
+        response = self.client.post(
+            f'/api/residents/import/?society={self.society.pk}', data=body,
+            content_type='text/csv', HTTP_AUTHORIZATION=f'Token {self.token.key}'
+        )
+        self.assertEqual(response.status_code, 200)
+        return [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+
+    def test_rejects_bad_rows_and_imports_the_rest(self):
+        submitted = get_hashing_pool().stats()['submitted']
+        lines = self.post(self.header + (
+            'alice,alice@example.com,long-enough-1,\n'
+            'bob,not-an-email,long-enough-2,\n'
+            'taken,carol@example.com,,\n'
+            'dave,dave@example.com,short,\n'
+            'erin,erin@example.com,,\n'
+        ))
+        errors, summary = lines[:-1], lines[-1]['summary']
+        self.assertEqual({error['row']: sorted(error['errors']) for error in errors}, {
+            2: ['email'], 3: ['username'], 4: ['password'],
+        })
+        self.assertEqual(summary, {'rows': 5, 'created': 2, 'rejected': 3, 'dry_run': False})
+        alice = User.objects.get(username='alice')
+        self.assertTrue(alice.check_password('long-enough-1'))
+        self.assertFalse(User.objects.get(username='erin').has_usable_password())
+        self.assertEqual(list(alice.profile.societies.all()), [self.society])
+        # Hashed on the shared thread pool, not a per-request process pool
+        self.assertEqual(get_hashing_pool().stats()['submitted'], submitted + 1)
+
+    def test_duplicates_within_one_import(self):
+        rows = read_csv((self.header + (
+            'frank,frank@example.com,,\n'
+            'frank,other@example.com,,\n'
+            'grace,grace@example.com,,\n'
+            'heidi,frank@EXAMPLE.com,,\n'
+            'grace,grace@example.com,,\n'
+        )).splitlines(keepends=True))
+        importer = ResidentImporter(society=self.society, chunk_size=2, hashing_pool=get_hashing_pool())
+        errors = list(importer.run(rows))
+        self.assertEqual({error['row']: sorted(error['errors']) for error in errors}, {
+            2: ['username'], 4: ['email'], 5: ['email', 'username'],
+        })
+        self.assertEqual(importer.summary()['created'], 2)
+        self.assertEqual(self.society.profiles.count(), 2)
+
+
+class SocietySearchTests(TestCase):
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.green_valley = create_society('Green Valley')
+            self.oak_park = Society.objects.create(
+                name='Oak Park', address='Greenfield Lane', country=self.green_valley.country,
+                state=self.green_valley.state, district=self.green_valley.district, circle=self.green_valley.circle
+            )
+            Society.objects.create(
+                name='Hill View', address='Station Road', country=self.green_valley.country,
+                state=self.green_valley.state, district=self.green_valley.district, circle=self.green_valley.circle
+            )
+
+    def test_prefix_bonus_only_for_the_name(self):
+        results = {result['name']: result['score'] for result in search_societies('green')}
+        self.assertEqual(set(results), {'Green Valley', 'Oak Park'})
+        self.assertGreater(results['Green Valley'], PREFIX_BONUS)
+        # An address starting with the query ranks on similarity alone
+        self.assertLess(results['Oak Park'], PREFIX_BONUS)
+
+    def test_prefix_of_a_later_word_in_the_name(self):
+        results = search_societies('valley')
+        self.assertEqual(results[0]['name'], 'Green Valley')
+        self.assertGreater(results[0]['score'], PREFIX_BONUS)
+
+
+class UserProfileETagTests(TestCase):
+    url = '/api/user-profile/'
+
+    def setUp(self):
+        token_cache.clear()
+        self.society = create_society()
+        self.user = create_resident('resident', self.society)
+        self.token = Token.objects.create(user=self.user)
+
+    def get(self, etag=None):
+        headers = {'HTTP_AUTHORIZATION': f'Token {self.token.key}'}
+        if etag:
+            headers['HTTP_IF_NONE_MATCH'] = etag
+        return self.client.get(self.url, **headers)
+
+    def test_unchanged_profile_is_not_modified(self):
+        etag = self.get()['ETag']
+        self.assertEqual(self.get(etag).status_code, 304)
+
+    def test_leaving_through_the_society_changes_the_etag(self):
+        etag = self.get()['ETag']
+        self.society.profiles.clear()
+        response = self.get(etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['societies'], [])
+
+    def test_user_fields_change_the_etag(self):
+        etag = self.get()['ETag']
+        User.objects.filter(pk=self.user.pk).update(email='new@example.com')
+        response = self.get(etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['user']['email'], 'new@example.com')
+
+
+class ArchivingTests(TestCase):
+    def setUp(self):
+        self.society = create_society()
+        self.initiator = create_resident('initiator', self.society)
+
+    def close_request(self, votes):
+        request = VotingRequest.objects.create(
+            request_type='resident_join', society=self.society, initiated_by=self.initiator,
+            resident_user=self.initiator, expiry_time=timezone.now() + timedelta(days=1)
+        )
+        for number in range(votes):
+            voter = create_resident(f'voter{request.pk}-{number}', self.society)
+            Vote.objects.create(request=request, voter=voter, vote_type='approve')
+        VotingRequest.objects.filter(pk=request.pk).update(
+            status='approved', approved_count=votes, updated_at=timezone.now() - timedelta(days=60)
+        )
+        return request
+
+    def test_moves_closed_requests_with_their_votes(self):
+        request = self.close_request(votes=3)
+        self.assertEqual(archive_batch(archive_cutoff()), (1, 3))
+        self.assertFalse(VotingRequest.objects.filter(pk=request.pk).exists())
+        self.assertFalse(Vote.objects.exists())
+        archived = ArchivedVotingRequest.objects.get(pk=request.pk)
+        self.assertEqual((archived.status, archived.approved_count), ('approved', 3))
+        self.assertEqual(archived.votes.count(), 3)
+
+    def test_query_count_does_not_grow_with_votes(self):
+        self.close_request(votes=1)
+        with CaptureQueriesContext(connection) as few:
+            archive_batch(archive_cutoff())
+        self.close_request(votes=6)
+        with CaptureQueriesContext(connection) as many:
+            archive_batch(archive_cutoff())
+        self.assertEqual(len(many), len(few))
+
+    def test_raw_vote_delete_skips_nothing(self):
+        # archive_batch deletes votes without the collector; that stays correct only
+        # while no model points at Vote and no Vote signal besides the tally one exists
+        self.assertEqual(Vote._meta.related_objects, ())
+        self.assertFalse(pre_delete.has_listeners(Vote))
+
+
+@outbox_handler('test.fail')
+def failing_handler(payload):
+    raise RuntimeError("boom")
+
+
+@outbox_handler('test.check-unlocked')
+def check_unlocked_handler(payload):
+    # Try to lock the event from another connection while the handler runs
+    def lock():
+        try:
+            with transaction.atomic():
+                list(OutboxEvent.objects.select_for_update(nowait=True).filter(pk=payload['event_id']))
+            payload['locked'] = False
+        except DatabaseError:
+            payload['locked'] = True
+        finally:
+            connections.close_all()
+
+    thread = threading.Thread(target=lock)
+    thread.start()
+    thread.join()
+    check_unlocked_handler.results.append(payload['locked'])
+
+
+check_unlocked_handler.results = []
+
+
+class OutboxTests(TestCase):
+    def test_claimed_events_are_leased(self):
+        event = enqueue('test.fail', {})
+        self.assertEqual([claimed.pk for claimed in claim_outbox_batch()], [event.pk])
+        # A second worker finds nothing due until the lease runs out
+        self.assertEqual(claim_outbox_batch(), [])
+
+    def test_failure_is_retried_and_does_not_undo_others(self):
+        society = create_society()
+        joiner = create_resident('joiner')
+        failing = enqueue('test.fail', {})
+        enqueue(APPROVED_EVENT, {
+            'voting_request_id': 1, 'request_type': 'resident_join', 'society_id': society.pk,
+            'resident_user_id': joiner.pk, 'service_provider_id': None,
+        })
+        self.assertEqual(process_outbox_batch(), (1, 1))
+        self.assertTrue(joiner.profile.societies.filter(pk=society.pk).exists())
+
+        failing.refresh_from_db()
+        self.assertEqual((failing.status, failing.attempts), ('pending', 1))
+        self.assertIn('boom', failing.last_error)
+        self.assertGreater(failing.available_at, timezone.now())
+
+
+class OutboxLockTests(TransactionTestCase):
+    @skipUnlessDBFeature('has_select_for_update_nowait')
+    def test_handlers_run_without_the_claim_lock(self):
+        event = enqueue('test.check-unlocked', {})
+        event.payload = {'event_id': event.pk}
+        event.save()
+        self.assertEqual(process_outbox_batch(), (1, 0))
+        self.assertEqual(check_unlocked_handler.results, [False])
+
+
+class InitiateResidentJoinTests(TestCase):
+    url = '/api/votingrequests/initiate-resident-join/'
+
+    def setUp(self):
+        self.society = create_society()
+        self.joiner = create_resident('joiner')
+        self.token = Token.objects.create(user=self.joiner)
+
+    def post(self):
+        return self.client.post(
+            self.url, {'society_id': self.society.pk}, content_type='application/json',
+            HTTP_AUTHORIZATION=f'Token {self.token.key}'
+        )
+
+    def test_no_new_request_while_an_approval_is_being_applied(self):
+        self.assertEqual(self.post().status_code, 201)
+        voting_request = VotingRequest.objects.get(resident_user=self.joiner)
+        voting_request.status = 'approved'
+        voting_request.save()
+        enqueue(APPROVED_EVENT, {
+            'voting_request_id': voting_request.pk, 'request_type': 'resident_join', 'society_id': self.society.pk,
+            'resident_user_id': self.joiner.pk, 'service_provider_id': None,
+        })
+
+        response = self.post()
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('being applied', response.json()['detail'])
+        self.assertEqual(VotingRequest.objects.filter(resident_user=self.joiner).count(), 1)
+
+        process_outbox_batch()
+        self.assertIn('already a member', self.post().json()['detail'])
+
+
+class ServiceCategoryCountTests(TestCase):
+    def url(self, pk):
+        return f'/api/societies/{pk}/service-categories-with-counts/'
+
+    def test_lists_services_with_approved_providers(self):
+        society = create_society()
+        plumbing = Service.objects.create(name='Plumbing')
+        user = User.objects.create(username='provider')
+        provider = ServiceProvider.objects.create(
+            user=user, name='Provider', is_approved=True, country=society.country,
+            state=society.state, district=society.district, circle=society.circle
+        )
+        provider.services.add(plumbing)
+        provider.societies.add(society)
+        self.assertEqual(self.client.get(self.url(society.pk)).json(), [
+            {'id': plumbing.pk, 'name': 'Plumbing', 'approved_provider_count': 1},
+        ])
+
+    def test_unknown_or_malformed_id_is_not_found(self):
+        for pk in ('12345', 'abc'):
+            with self.subTest(pk=pk):
+                self.assertEqual(self.client.get(self.url(pk)).status_code, 404)
+
+
+class VotingPolicyTests(TestCase):
+    def test_percent_above_100_is_invalid(self):
+        society = create_society()
+        for field in ('approval_percent', 'rejection_percent'):
+            with self.subTest(field=field):
+                policy = VotingPolicy(society=society, **{field: 101})
+                with self.assertRaises(ValidationError) as raised:
+                    policy.full_clean()
+                self.assertIn(field, raised.exception.message_dict)
+                VotingPolicy(society=society, **{field: 100}).full_clean()
+
+    def test_database_rejects_percent_above_100(self):
+        society = create_society()
+        for field in ('approval_percent', 'rejection_percent'):
+            with self.subTest(field=field), self.assertRaises(IntegrityError), transaction.atomic():
+                VotingPolicy.objects.create(society=society, **{field: 101})
+        self.assertEqual(VotingPolicy.objects.create(society=society).approval_percent, None)
+
+
+class VotingRequestChangesTests(TestCase):
+    def setUp(self):
+        self.society = create_society()
+        self.resident = create_resident('resident', self.society)
+        self.initiator = create_resident('initiator', self.society)
+        self.token = Token.objects.create(user=self.resident)
+
+    def create_request(self, updated_at=None):
+        voting_request = VotingRequest.objects.create(
+            request_type='resident_join', society=self.society, initiated_by=self.initiator,
+            resident_user=self.initiator, expiry_time=timezone.now() + timedelta(days=1)
+        )
+        if updated_at is not None:
+            VotingRequest.objects.filter(pk=voting_request.pk).update(updated_at=updated_at)
+        return voting_request
+
+    def test_full_page_does_not_move_the_cursor_into_the_grace_window(self):
+        now = timezone.now()
+        for age in (timedelta(minutes=1), timedelta(seconds=2), timedelta(seconds=1)):
+            self.create_request(updated_at=now - age)
+
+        rows, cursor, has_more = voting_request_changes(
+            VotingRequest.objects.all(), encode_cursor(now - timedelta(minutes=10), 0), limit=2, now=now
+        )
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(cursor_time(cursor), now - COMMIT_GRACE)
+        # The rest is inside the window, so the client waits for its next poll
+        self.assertFalse(has_more)
+
+    def test_leaving_a_society_sends_tombstones(self):
+        voting_request = self.create_request()
+        cursor = initial_cursor()
+        self.society.profiles.remove(self.resident.profile)
+
+        response = self.client.get(
+            '/api/votingrequests/changes/', {'since': cursor}, HTTP_AUTHORIZATION=f'Token {self.token.key}'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['removed'], [{'id': voting_request.pk, 'status': 'pending'}])
+
+
+class CastVotesTests(TestCase):
+    def setUp(self):
+        self.society = create_society()
+        self.initiator = create_resident('initiator', self.society)
+        self.voter = create_resident('voter', self.society)
+        # Enough residents that one vote decides nothing
+        for number in range(APPROVAL_THRESHOLD):
+            create_resident(f'resident{number}', self.society)
+        self.requests = [
+            VotingRequest.objects.create(
+                request_type='resident_join', society=self.society, initiated_by=self.initiator,
+                resident_user=self.initiator, expiry_time=timezone.now() + timedelta(days=1)
+            )
+            for _ in range(2)
+        ]
+
+    def test_vote_landing_after_the_check_is_reported_per_item(self):
+        raced, other = self.requests
+        # Another path records the voter's vote just after the already-voted check has read
+        Vote.objects.create(request=raced, voter=self.voter, vote_type='reject')
+        vote_filter = Vote.objects.filter
+        calls = []
+
+        def stale_filter(*args, **kwargs):
+            calls.append(kwargs)
+            return Vote.objects.none() if len(calls) == 1 else vote_filter(*args, **kwargs)
+
+        with mock.patch.object(Vote.objects, 'filter', stale_filter):
+            results = cast_votes(self.voter, [
+                {'request_id': raced.pk, 'vote_type': 'approve'},
+                {'request_id': other.pk, 'vote_type': 'approve'},
+            ], society_ids={self.society.pk})
+
+        self.assertEqual([result['recorded'] for result in results], [False, True])
+        self.assertEqual(results[0]['detail'], "You have already voted on this request.")
+        raced.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual((raced.approved_count, other.approved_count), (0, 1))
+        self.assertEqual(Vote.objects.get(request=raced, voter=self.voter).vote_type, 'reject')
+
+
+class OneLoginPerMinute(AnonRateThrottle):
+    rate = '1/min'
+
+
+class LoginRegisterTests(TestCase):
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.society = create_society()
+        self.user = create_resident('resident', self.society)
+        self.user.set_password('correct-horse')
+        self.user.save()
+
+    def login(self, password='correct-horse', url='/api/resident-login/'):
+        return self.client.post(url, {'username': 'resident', 'password': password}, content_type='application/json')
+
+    def register(self, username='newcomer'):
+        society = self.society
+        return self.client.post('/api/resident-register/', {
+            'username': username, 'email': f'{username}@example.com', 'password': 'long-enough-1',
+            'country_id': society.country_id, 'state_id': society.state_id,
+            'district_id': society.district_id, 'circle_id': society.circle_id,
+        }, content_type='application/json')
+
+    def test_login(self):
+        response = self.login()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['token'], Token.objects.get(user=self.user).key)
+        self.assertEqual(self.login('wrong-password').status_code, 400)
+        # A resident is not a provider
+        self.assertEqual(self.login(url='/api/provider-login/').status_code, 403)
+
+    async def test_login_under_asgi(self):
+        response = await AsyncClient().post(
+            '/api/resident-login/', {'username': 'resident', 'password': 'correct-horse'}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['user_role'], 'resident')
+
+    def test_options_and_unknown_methods(self):
+        for url in ('/api/resident-login/', '/api/provider-login/', '/api/resident-register/', '/api/provider-register/'):
+            with self.subTest(url=url):
+                response = self.client.options(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn('POST', response['Allow'])
+                self.assertEqual(self.client.get(url).status_code, 405)
+
+    def test_malformed_body_goes_through_the_exception_handler(self):
+        response = self.client.post('/api/resident-login/', '{', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('detail', response.json())
+
+    def test_busy_hashing_pool_answers_503(self):
+        with mock.patch.object(HashingPool, 'run', side_effect=HashingPoolBusy):
+            for response in (self.login(), self.register()):
+                self.assertEqual(response.status_code, 503)
+                self.assertEqual(response['Retry-After'], '1')
+        self.assertFalse(User.objects.filter(username='newcomer').exists())
+
+    def test_register(self):
+        response = self.register()
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertTrue(User.objects.get(username='newcomer').check_password('long-enough-1'))
+
+    def test_username_taken_during_save_is_a_400(self):
+        with mock.patch('core.serializers.create_user', side_effect=IntegrityError):
+            response = self.register()
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('username', response.json())
+
+    def test_throttling_applies(self):
+        cache.delete('throttle_anon_127.0.0.1')
+        with mock.patch.object(ResidentLoginView, 'throttle_classes', [OneLoginPerMinute]):
+            self.assertEqual(self.login().status_code, 200)
+            self.assertEqual(self.login().status_code, 429)
+        cache.delete('throttle_anon_127.0.0.1')
+
+
+class PaginationTests(TestCase):
+    def test_pages_of_rows_sharing_created_at_cover_every_row_once(self):
+        society = create_society()
+        initiator = create_resident('initiator', society)
+        token = Token.objects.create(user=initiator)
+        created_at = timezone.now()
+        ids = set()
+        for _ in range(5):
+            voting_request = VotingRequest.objects.create(
+                request_type='resident_join', society=society, initiated_by=initiator,
+                resident_user=initiator, expiry_time=created_at + timedelta(days=1)
+            )
+            ids.add(voting_request.pk)
+        VotingRequest.objects.update(created_at=created_at)
+
+        seen = []
+        url = '/api/my-initiated-voting-requests/?page_size=2'
+        while url:
+            page = self.client.get(url, HTTP_AUTHORIZATION=f'Token {token.key}').json()
+            seen.extend(row['id'] for row in page['results'])
+            url = page['next']
+        self.assertEqual(sorted(seen), sorted(ids))
+        self.assertEqual(seen, sorted(ids, reverse=True))
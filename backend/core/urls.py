@@ -5,13 +5,14 @@ from rest_framework.routers import DefaultRouter
 from .views import (
     SocietyViewSet, ServiceViewSet, ServiceProviderViewSet,
     ResidentRegisterView, ProviderRegisterView,
-    ResidentLoginView, ProviderLoginView,
+    ResidentLoginView, ProviderLoginView, HashingPoolStatsView, ResidentImportView,
     UserProfileView, ServiceProviderSelfManagementView,
     RequestPasswordResetView, ConfirmPasswordResetView,
     VotingRequestViewSet, UserInitiatedVotingRequestsView,
     AvailableSocietiesForResidentView, InitiateResidentJoinVotingRequestView,
     AvailableSocietiesForServiceProviderView, InitiateServiceProviderListingVotingRequestView,
-    CountryViewSet, StateViewSet, DistrictViewSet, CircleViewSet
+    CountryViewSet, StateViewSet, DistrictViewSet, CircleViewSet,
+    LocationTreeView, SocietySearchView, voting_request_stream
 )
 
 # Create a router and register our viewsets with it.
@@ -42,16 +43,29 @@ urlpatterns = [
     # Initiate service provider listing voting request
     path('votingrequests/initiate-provider-listing/', InitiateServiceProviderListingVotingRequestView.as_view(), name='initiate-provider-listing'),
 
+    # Live voting request events (server-sent events; served under ASGI)
+    path('votingrequests/stream/', voting_request_stream, name='voting-request-stream'),
+
+    # Whole location hierarchy in one response (replaces the chained country/state/district/circle lookups)
+    path('locations/tree/', LocationTreeView.as_view(), name='location-tree'),
+
+    # Society typeahead search
+    path('search/societies/', SocietySearchView.as_view(), name='search-societies'),
+
     # Include the router URLs after specific paths
     # The router will automatically generate the URL for the custom action:
     # /api/societies/{society_pk}/service-providers/
     path('', include(router.urls)),
 
     # Authentication and Registration
+    # Async views; password hashing runs on the hashing pool (core/hashing.py)
     path('resident-register/', ResidentRegisterView.as_view(), name='resident-register'),
     path('provider-register/', ProviderRegisterView.as_view(), name='provider-register'),
     path('resident-login/', ResidentLoginView.as_view(), name='resident-login'),
     path('provider-login/', ProviderLoginView.as_view(), name='provider-login'),
+    path('auth/hashing-stats/', HashingPoolStatsView.as_view(), name='hashing-stats'),
+    # Bulk resident onboarding (staff only)
+    path('residents/import/', ResidentImportView.as_view(), name='resident-import'),
 
     # Profile Management
     path('user-profile/', UserProfileView.as_view(), name='user-profile'), # For residents
@@ -0,0 +1,54 @@
+# backend/core/versions.py
+
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+# Version counters shared by every process through the default Django cache.
+# Anything precomputed from the database records the version it was built
+# from and is thrown away once the counter moves on. That only works if the
+# cache is shared by every process that writes, run_outbox_worker and
+# run_voting_sweeper included (core.checks warns about per-process backends).
+VERSION_CACHE_KEY = 'core:version:{name}'
+
+
+def _seed():
+    # Seed with a timestamp rather than 1 so an evicted counter never comes
+    # back as a version some worker has already cached.
+    return int(time.time() * 1000)
+
+
+def get_version(name):
+    key = VERSION_CACHE_KEY.format(name=name)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _seed(), None)
+        version = cache.get(key)
+    return version
+
+
+def get_versions(names):
+    """Current values of several counters in one cache round trip."""
+    keys = {VERSION_CACHE_KEY.format(name=name): name for name in names}
+    found = cache.get_many(keys)
+    versions = {}
+    for key, name in keys.items():
+        versions[name] = found[key] if key in found else get_version(name)
+    return versions
+
+
+def bump_version(name):
+    key = VERSION_CACHE_KEY.format(name=name)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _seed(), None)
+
+
+def bump_version_on_commit(name):
+    """
+    Bumps only after commit so no worker can rebuild from uncommitted rows
+    and label the stale result with the new version.
+    """
+    transaction.on_commit(lambda: bump_version(name))
@@ -7,21 +7,31 @@ from rest_framework.views import APIView
 from rest_framework.exceptions import ValidationError, PermissionDenied, NotFound
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.settings import api_settings
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser
 from rest_framework.decorators import action
+from rest_framework.exceptions import AuthenticationFailed
+from asgiref.sync import iscoroutinefunction, sync_to_async
 from django.contrib.auth.models import User
-from django.contrib.auth import authenticate
 from django.core.exceptions import ObjectDoesNotExist
 from django.utils import timezone
-from django.db import transaction
-from django.db.models import Q, Case, When, IntegerField, Count
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.db import IntegrityError, transaction
+from django.db.models import Q, Case, When, IntegerField, Count, Max, OuterRef, Subquery, Prefetch
+from django.db.models.functions import Coalesce
+import asyncio
+import codecs
+import hashlib
+import json
 import random
-from datetime import timedelta
 
 from .serializers import (
     SocietySerializer,
     ServiceSerializer,
     ServiceProviderSerializer,
+    ProviderDirectorySerializer,
     UserSerializer,
     ResidentRegisterSerializer,
     ProviderRegisterSerializer,
@@ -30,63 +40,193 @@ from .serializers import (
     RequestPasswordResetSerializer,
     ConfirmPasswordResetSerializer,
     VoteSerializer,
+    BulkVoteSerializer,
     VotingRequestSerializer,
-    LoginSerializer,
+    ArchivedVotingRequestSerializer,
+    CredentialsSerializer,
     InitiateResidentJoinSerializer,
     InitiateProviderListingSerializer,
     CountrySerializer,
-    StateSerializer,
-    DistrictSerializer,
-    CircleSerializer
+    CompactStateSerializer,
+    CompactDistrictSerializer,
+    CompactCircleSerializer
 )
 
 from .models import (
     Society, Service, ServiceProvider, Profile, OTP,
-    VotingRequest, Vote, Country, State, District, Circle
+    VotingRequest, Vote, Country, State, District, Circle,
+    SocietyServiceCount, ArchivedVotingRequest, SocietyDeparture
+)
+from .locations import LOCATION_VERSION, get_location_version, get_location_snapshot
+from .outbox import pending_events
+from .voting import cast_vote, cast_votes, has_voted_annotation, voting_period_for, VoteConflict, APPROVED_EVENT
+from .caching import (
+    CachedResponseMixin, cached_response, conditional_response, row_last_modified,
+    SOCIETIES_VERSION, SOCIETY_VERSION, CATALOG_VERSION
+)
+from .search import search_societies, DEFAULT_LIMIT
+from .events import (
+    SETTLED, STREAM_TICKET_MAX_AGE, encode_event, get_broker, issue_stream_ticket, read_stream_ticket,
+    society_topic, user_topic
+)
+from .archiving import archived_has_voted_annotation
+from .authentication import CachedTokenAuthentication, issue_token
+from .context import UserContext, get_user_context
+from .onboarding import READERS, ImportFormatError, ResidentImporter, format_for
+from .hashing import HashingPoolBusy, authenticate_async, get_hashing_pool, hash_password
+from .changes import (
+    InvalidCursor, cursor_time, initial_cursor, voting_request_changes, DEFAULT_LIMIT as CHANGES_DEFAULT_LIMIT
 )
 
 # --- Location ViewSets ---
-class CountryViewSet(viewsets.ReadOnlyModelViewSet):
+class ExpandableLocationMixin:
+    """
+    Reads ?expand=district,district.state from the request, hands the shape to
+    the serializer and select_related()s exactly the parents it will render,
+    so a list costs one query whatever its length.
+    """
+
+    def get_expand(self):
+        if not hasattr(self, '_expand'):
+            raw = self.request.query_params.get('expand', '')
+            paths = [path.strip() for path in raw.split(',') if path.strip()]
+            allowed = self.get_serializer_class().expandable_paths()
+            unknown = [path for path in paths if path not in allowed]
+            if unknown:
+                raise ValidationError({
+                    'expand': f"Unknown expansion(s): {', '.join(unknown)}. Allowed: {', '.join(allowed) or 'none'}."
+                })
+
+            expand = {}
+            for path in paths:
+                node = expand
+                for part in path.split('.'):
+                    node = node.setdefault(part, {})
+            self._expand = expand
+        return self._expand
+
+    def get_select_related(self, expand=None, prefix=''):
+        expand = self.get_expand() if expand is None else expand
+        relations = []
+        for field, nested in expand.items():
+            path = f"{prefix}__{field}" if prefix else field
+            relations.extend(self.get_select_related(nested, path) or [path])
+        return relations
+
+    def expand_queryset(self, queryset):
+        relations = self.get_select_related()
+        if relations:
+            queryset = queryset.select_related(*relations)
+        return queryset
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault('expand', self.get_expand())
+        return super().get_serializer(*args, **kwargs)
+
+class CountryViewSet(CachedResponseMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Country.objects.all()
     serializer_class = CountrySerializer
     permission_classes = [AllowAny]
+    cache_versions = (LOCATION_VERSION,)
 
-class StateViewSet(viewsets.ReadOnlyModelViewSet):
+class StateViewSet(CachedResponseMixin, ExpandableLocationMixin, viewsets.ReadOnlyModelViewSet):
     queryset = State.objects.all()
-    serializer_class = StateSerializer
+    serializer_class = CompactStateSerializer
     permission_classes = [AllowAny]
+    cache_versions = (LOCATION_VERSION,)
     
     def get_queryset(self):
-        queryset = State.objects.all()
+        queryset = self.expand_queryset(State.objects.all())
         country_id = self.request.query_params.get('country_id')
         if country_id:
             queryset = queryset.filter(country_id=country_id)
         return queryset
 
-class DistrictViewSet(viewsets.ReadOnlyModelViewSet):
+class DistrictViewSet(CachedResponseMixin, ExpandableLocationMixin, viewsets.ReadOnlyModelViewSet):
     queryset = District.objects.all()
-    serializer_class = DistrictSerializer
+    serializer_class = CompactDistrictSerializer
     permission_classes = [AllowAny]
+    cache_versions = (LOCATION_VERSION,)
     
     def get_queryset(self):
-        queryset = District.objects.all()
+        queryset = self.expand_queryset(District.objects.all())
         state_id = self.request.query_params.get('state_id')
         if state_id:
             queryset = queryset.filter(state_id=state_id)
         return queryset
 
-class CircleViewSet(viewsets.ReadOnlyModelViewSet):
+class CircleViewSet(CachedResponseMixin, ExpandableLocationMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Circle.objects.all()
-    serializer_class = CircleSerializer
+    serializer_class = CompactCircleSerializer
     permission_classes = [AllowAny]
+    cache_versions = (LOCATION_VERSION,)
     
     def get_queryset(self):
-        queryset = Circle.objects.all()
+        queryset = self.expand_queryset(Circle.objects.all())
         district_id = self.request.query_params.get('district_id')
         if district_id:
             queryset = queryset.filter(district_id=district_id)
         return queryset
 
+# Whole location hierarchy (or one subtree) in a single cacheable response
+class LocationTreeView(APIView):
+    permission_classes = [AllowAny]
+    authentication_classes = []
+
+    # Most specific parameter wins if several are given
+    subtree_params = [
+        ('circle_id', 'circle'),
+        ('district_id', 'district'),
+        ('state_id', 'state'),
+        ('country_id', 'country'),
+    ]
+
+    def get(self, request, *args, **kwargs):
+        level, pk = None, None
+        for param, param_level in self.subtree_params:
+            value = request.query_params.get(param)
+            if value:
+                try:
+                    pk = int(value)
+                except ValueError:
+                    return Response({"detail": f"Invalid {param} provided."}, status=status.HTTP_400_BAD_REQUEST)
+                level = param_level
+                break
+
+        # The ETag only depends on the shared version, so revalidation is
+        # answered without touching the database or the snapshot.
+        etag = f'"locations-{get_location_version()}"'
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            snapshot = get_location_snapshot()
+            etag = f'"locations-{snapshot.version}"'
+            if level:
+                tree = snapshot.subtree(level, pk)
+                if tree is None:
+                    raise NotFound(f"{level.capitalize()} not found.")
+            else:
+                tree = snapshot.tree
+            response = Response({'version': snapshot.version, 'level': level, 'tree': tree})
+
+        response['ETag'] = etag
+        patch_cache_control(response, public=True, max_age=60)
+        return response
+
+# Typeahead search over society names, addresses and circle/district names
+class SocietySearchView(APIView):
+    permission_classes = [AllowAny]
+    authentication_classes = []
+
+    def get(self, request, *args, **kwargs):
+        query = request.query_params.get('q', '')
+        try:
+            limit = int(request.query_params.get('limit', DEFAULT_LIMIT))
+        except ValueError:
+            return Response({"detail": "Invalid limit provided."}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(search_societies(query, limit))
+
 # Society Viewset
 class SocietyViewSet(viewsets.ModelViewSet):
     queryset = Society.objects.all()
@@ -119,26 +259,49 @@ class SocietyViewSet(viewsets.ModelViewSet):
             
         return queryset
 
+    @cached_response(SOCIETIES_VERSION, LOCATION_VERSION)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @cached_response(SOCIETY_VERSION, LOCATION_VERSION, last_modified=row_last_modified(Society))
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
     @action(detail=True, methods=['get'], url_path='service-providers')
+    @cached_response(SOCIETY_VERSION, CATALOG_VERSION, LOCATION_VERSION)
     def service_providers(self, request, pk=None):
         try:
             society = self.get_object()
             service_id = request.query_params.get('service_id')
 
-            queryset = ServiceProvider.objects.filter(societies=society, is_approved=True).prefetch_related('services')
+            # Counted in a subquery so the societies=society filter join does not cap it at 1
+            society_count = ServiceProvider.societies.through.objects.filter(
+                serviceprovider_id=OuterRef('pk')
+            ).order_by().values('serviceprovider_id').annotate(count=Count('*')).values('count')
+
+            queryset = ServiceProvider.objects.filter(
+                societies=society, is_approved=True
+            ).select_related(
+                'country', 'state', 'district', 'circle'
+            ).prefetch_related(
+                Prefetch('services', queryset=Service.objects.only('id', 'name'))
+            ).annotate(
+                society_count=Coalesce(Subquery(society_count), 0)
+            )
 
-            print(f"DEBUG SocietyViewSet (service_providers): Found {queryset.count()} approved service providers associated with society {society.name} (ID: {society.id}) before service filter.")
+            print(f"DEBUG SocietyViewSet (service_providers): Listing approved service providers for society {society.name} (ID: {society.id}).")
 
             if service_id:
                 try:
                     service_id = int(service_id)
                     queryset = queryset.filter(services__id=service_id)
-                    print(f"DEBUG SocietyViewSet (service_providers): Filtered by service ID {service_id}. Found {queryset.count()} providers.")
+                    print(f"DEBUG SocietyViewSet (service_providers): Filtered by service ID {service_id}.")
                 except ValueError:
                     return Response({"detail": "Invalid service_id provided."}, status=status.HTTP_400_BAD_REQUEST)
 
-            serializer = ServiceProviderSerializer(queryset, many=True)
-            return Response(serializer.data)
+            page = self.paginate_queryset(queryset)
+            serializer = ProviderDirectorySerializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
         except ObjectDoesNotExist:
             raise NotFound("Society not found.")
         except Exception as e:
@@ -146,28 +309,34 @@ class SocietyViewSet(viewsets.ModelViewSet):
             return Response({"detail": "An error occurred while fetching service providers."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
     @action(detail=True, methods=['get'], url_path='service-categories-with-counts')
+    @cached_response(SOCIETY_VERSION, CATALOG_VERSION)
     def service_categories_with_counts(self, request, pk=None):
+        # The rollup is read without get_object(), so check the id the way it would
         try:
-            society = self.get_object()
-
-            services_with_counts = Service.objects.annotate(
-                approved_provider_count=Count(
-                    'service_providers',
-                    filter=Q(service_providers__societies=society, service_providers__is_approved=True)
-                )
-            ).filter(approved_provider_count__gt=0)
+            society_id = int(pk)
+        except (TypeError, ValueError):
+            raise NotFound("Society not found.")
 
-            print(f"DEBUG SocietyViewSet (service_categories_with_counts): Found {services_with_counts.count()} service categories with approved providers for society {society.name} (ID: {society.id}).")
+        try:
+            rows = SocietyServiceCount.objects.filter(
+                society_id=society_id, approved_provider_count__gt=0
+            ).select_related('service').order_by('service__name')
 
             data = [
                 {
-                    'id': service.id,
-                    'name': service.name,
-                    'approved_provider_count': service.approved_provider_count
+                    'id': row.service_id,
+                    'name': row.service.name,
+                    'approved_provider_count': row.approved_provider_count
                 }
-                for service in services_with_counts
+                for row in rows
             ]
 
+            # Only look the society up when there is nothing to show, to tell "none" from 404
+            if not data and not Society.objects.filter(pk=society_id).exists():
+                return Response({"detail": "Society not found."}, status=status.HTTP_404_NOT_FOUND)
+
+            print(f"DEBUG SocietyViewSet (service_categories_with_counts): Found {len(data)} service categories with approved providers for society ID {society_id}.")
+
             return Response(data)
 
         except ObjectDoesNotExist:
@@ -177,9 +346,10 @@ class SocietyViewSet(viewsets.ModelViewSet):
             return Response({"detail": "An error occurred while fetching service categories with counts."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 # Service ViewSet
-class ServiceViewSet(viewsets.ModelViewSet):
+class ServiceViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     queryset = Service.objects.all()
     serializer_class = ServiceSerializer
+    cache_versions = (CATALOG_VERSION,)
 
     def get_permissions(self):
         if self.action == 'list':
@@ -200,24 +370,83 @@ class ServiceProviderViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         return ServiceProvider.objects.all()
 
+# Location chains SocietySerializer renders
+SOCIETY_LOCATION_RELATED = (
+    'country',
+    'state__country',
+    'district__state__country',
+    'circle__district__state__country',
+)
+
+# Everything VotingRequestSerializer renders: the nested society's and
+# provider's locations are joined, the provider's services and societies
+# prefetched, so a page costs the same number of queries whatever its length
+VOTING_REQUEST_RELATED = (
+    *(f'society__{path}' for path in SOCIETY_LOCATION_RELATED),
+    *(f'service_provider__{path}' for path in SOCIETY_LOCATION_RELATED),
+    'initiated_by',
+    'resident_user',
+    'service_provider__user',
+)
+
+def voting_request_prefetches():
+    return (
+        'service_provider__services',
+        Prefetch('service_provider__societies', queryset=Society.objects.select_related(*SOCIETY_LOCATION_RELATED)),
+    )
+
+class UserAnnotationMixin:
+    """
+    Annotates per-user values onto the queryset in the list query itself.
+    `user_annotations` maps an attribute name to a callable taking the user and
+    returning an expression (usually Exists(OuterRef)); serializers read the
+    attribute when present instead of querying per row.
+    """
+    user_annotations = {}
+
+    def get_user_annotations(self):
+        return self.user_annotations
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        user = self.request.user
+        annotations = self.get_user_annotations()
+        if user.is_authenticated and annotations:
+            queryset = queryset.annotate(**{
+                name: build(user) for name, build in annotations.items()
+            })
+        return queryset
+
 # List voting requests initiated by the current user
-class UserInitiatedVotingRequestsView(generics.ListAPIView):
+class UserInitiatedVotingRequestsView(UserAnnotationMixin, generics.ListAPIView):
     serializer_class = VotingRequestSerializer
     permission_classes = [IsAuthenticated]
+    pagination_ordering = ('-created_at', '-id')
+    user_annotations = {'has_voted': has_voted_annotation}
+
+    # ?archived=true lists the user's requests that were moved to the archive tables
+    def is_archived(self):
+        return self.request.query_params.get('archived', '').lower() in ('1', 'true', 'yes')
+
+    def get_serializer_class(self):
+        if self.is_archived():
+            return ArchivedVotingRequestSerializer
+        return super().get_serializer_class()
+
+    def get_user_annotations(self):
+        if self.is_archived():
+            return {'has_voted': archived_has_voted_annotation}
+        return super().get_user_annotations()
 
     def get_queryset(self):
         user = self.request.user
-        queryset = VotingRequest.objects.all().select_related(
-            'society',
-            'initiated_by',
-            'resident_user',
-            'service_provider__user'
-            ).prefetch_related('votes')
+        model = ArchivedVotingRequest if self.is_archived() else VotingRequest
+        queryset = model.objects.all().select_related(*VOTING_REQUEST_RELATED).prefetch_related(*voting_request_prefetches())
 
         queryset = queryset.filter(initiated_by=user)
         queryset = queryset.order_by('-created_at')
 
-        print(f"DEBUG UserInitiatedVotingRequestsView: Fetching initiated requests for user {user.username} ({user.id}). Queryset count: {queryset.count()}")
+        print(f"DEBUG UserInitiatedVotingRequestsView: Fetching initiated requests for user {user.username} ({user.id}).")
 
         return queryset
 
@@ -235,83 +464,182 @@ class UserInitiatedVotingRequestsView(generics.ListAPIView):
         return Response(serializer.data)
 
 # --- Authentication and Registration Views ---
+# Async so PBKDF2 runs on the bounded hashing pool (core/hashing.py) instead
+# of holding a request worker; serve the app through asgi.py to benefit.
 
-# Resident Login View
-class ResidentLoginView(APIView):
-    permission_classes = [AllowAny]
-    serializer_class = LoginSerializer
+# Seconds a client is asked to wait when the hashing pool is full
+HASHING_BUSY_RETRY_AFTER = 1
+
+class AsyncAPIView(APIView):
+    """
+    APIView whose handlers are coroutines. Authentication, permissions and
+    throttling (APIView.initial) run in a thread as usual, and errors go
+    through the configured exception handler, so the view keeps every DRF
+    policy while the handler awaits without holding a worker. Inherited sync
+    handlers, such as options(), run in a thread too.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
 
-    def post(self, request, *args, **kwargs):
-        serializer = self.serializer_class(data=request.data, context={'request': request})
         try:
-            serializer.is_valid(raise_exception=True)
-            user = serializer.validated_data['user']
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            handler = getattr(self, request.method.lower(), None)
+            if handler is None or request.method.lower() not in self.http_method_names:
+                self.http_method_not_allowed(request, *args, **kwargs)
+            if not iscoroutinefunction(handler):
+                handler = sync_to_async(handler)
+            response = await handler(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+def hashing_busy_response():
+    return Response(
+        {'detail': 'Too many sign-ins in progress. Please try again shortly.'},
+        status=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={'Retry-After': str(HASHING_BUSY_RETRY_AFTER)}
+    )
+
+def login_response_data(user, role):
+    """Checks a verified user has the role and issues the token; returns (body, status)."""
+    if role == 'resident' and not hasattr(user, 'profile'):
+        return {'detail': 'Not authorized as a resident. User profile not found.'}, status.HTTP_403_FORBIDDEN
+    if role == 'provider' and not hasattr(user, 'service_provider'):
+        return {'detail': 'Not authorized as a service provider.'}, status.HTTP_403_FORBIDDEN
+
+    token = issue_token(user)
+    return {'token': token.key, 'user_id': user.id, 'username': user.username, 'user_role': role}, status.HTTP_200_OK
+
+class LoginView(AsyncAPIView):
+    permission_classes = [AllowAny]
+    serializer_class = CredentialsSerializer
+    role = None
 
-            if not hasattr(user, 'profile'):
-                 return Response(
-                    {'detail': 'Not authorized as a resident. User profile not found.'},
-                    status=status.HTTP_403_FORBIDDEN
-                 )
+    async def post(self, request, *args, **kwargs):
+        serializer = self.serializer_class(data=request.data, context={'request': request})
+        serializer.is_valid(raise_exception=True)
 
-            token, created = Token.objects.get_or_create(user=user)
-            return Response({'token': token.key, 'user_id': user.id, 'username': user.username, 'user_role': 'resident'}, status=status.HTTP_200_OK)
+        try:
+            user = await authenticate_async(serializer.validated_data['username'], serializer.validated_data['password'])
+            if user is None:
+                return Response(
+                    {api_settings.NON_FIELD_ERRORS_KEY: ["Invalid credentials provided."]},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            body, status_code = await sync_to_async(login_response_data)(user, self.role)
+            return Response(body, status=status_code)
 
-        except ValidationError as e:
-             return Response(e.detail, status=status.HTTP_400_BAD_REQUEST)
+        except HashingPoolBusy:
+            return hashing_busy_response()
         except Exception as e:
-            print(f"DEBUG: Resident Login Error: {e}")
+            print(f"DEBUG: {self.role.capitalize()} Login Error: {e}")
             return Response({"detail": "An error occurred during login."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-# Provider Login View
-class ProviderLoginView(APIView):
+class RegisterView(AsyncAPIView):
     permission_classes = [AllowAny]
-    serializer_class = LoginSerializer
+    serializer_class = None
 
-    def post(self, request, *args, **kwargs):
+    def response_data(self, serializer, instance):
+        return serializer.data
+
+    async def post(self, request, *args, **kwargs):
         serializer = self.serializer_class(data=request.data, context={'request': request})
+        await sync_to_async(serializer.is_valid)(raise_exception=True)
+
         try:
-            serializer.is_valid(raise_exception=True)
-            user = serializer.validated_data['user']
+            password_hash = await hash_password(serializer.validated_data['password'])
+        except HashingPoolBusy:
+            return hashing_busy_response()
 
-            if not hasattr(user, 'service_provider'):
-                 return Response(
-                    {'detail': 'Not authorized as a service provider.'},
-                    status=status.HTTP_403_FORBIDDEN
-                 )
+        def save():
+            try:
+                with transaction.atomic():
+                    instance = serializer.save(password_hash=password_hash)
+            except IntegrityError:
+                # Another registration took the username between validation and insert
+                raise ValidationError({'username': ["A user with that username already exists."]})
+            return self.response_data(serializer, instance)
 
-            token, created = Token.objects.get_or_create(user=user)
-            return Response({'token': token.key, 'user_id': user.id, 'username': user.username, 'user_role': 'provider'}, status=status.HTTP_200_OK)
+        return Response(await sync_to_async(save)(), status=status.HTTP_201_CREATED)
 
-        except ValidationError as e:
-             return Response(e.detail, status=status.HTTP_400_BAD_REQUEST)
-        except Exception as e:
-            print(f"DEBUG: Provider Login Error: {e}")
-            return Response({"detail": "An error occurred during login."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+# Resident Login View
+class ResidentLoginView(LoginView):
+    role = 'resident'
+
+# Provider Login View
+class ProviderLoginView(LoginView):
+    role = 'provider'
 
 # Resident Registration View
-class ResidentRegisterView(generics.CreateAPIView):
-    queryset = User.objects.all()
+class ResidentRegisterView(RegisterView):
     serializer_class = ResidentRegisterSerializer
-    permission_classes = [AllowAny]
-
-    def perform_create(self, serializer):
-        user = serializer.save()
 
 # Provider Registration View
-class ProviderRegisterView(generics.CreateAPIView):
-    queryset = User.objects.all()
+class ProviderRegisterView(RegisterView):
     serializer_class = ProviderRegisterSerializer
-    permission_classes = [AllowAny]
 
-    def create(self, request, *args, **kwargs):
-        serializer = self.get_serializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
+    def response_data(self, serializer, service_provider):
+        return ServiceProviderSerializer(service_provider).data
 
-        service_provider = serializer.save()
+# Password hashing pool counters, for monitoring
+class HashingPoolStatsView(APIView):
+    permission_classes = [IsAdminUser]
 
-        response_serializer = ServiceProviderSerializer(service_provider)
+    def get(self, request, *args, **kwargs):
+        return Response(get_hashing_pool().stats())
 
-        return Response(response_serializer.data, status=status.HTTP_201_CREATED)
+# Bulk resident onboarding for staff; see also `manage.py import_residents`
+class ResidentImportView(APIView):
+    """
+    POST a CSV (Content-Type: text/csv) or NDJSON (application/x-ndjson) of
+    residents. ?society=<id> fills in rows without society_ids or location,
+    ?dry_run=true only validates. The body is read and imported chunk by
+    chunk while the response streams one JSON line per rejected row,
+    followed by {"summary": {...}}.
+    """
+    permission_classes = [IsAdminUser]
+
+    def post(self, request, *args, **kwargs):
+        fmt = format_for(request.content_type)
+        if fmt is None:
+            return Response(
+                {'detail': "Send the residents as text/csv or application/x-ndjson."},
+                status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+            )
+
+        society = None
+        society_id = request.query_params.get('society')
+        if society_id:
+            try:
+                society = Society.objects.get(pk=int(society_id))
+            except (ValueError, Society.DoesNotExist):
+                raise ValidationError({'society': "Society with this ID does not exist."})
+
+        stream = request.stream
+        if stream is None:
+            raise ValidationError({'detail': "The request body is empty."})
+
+        dry_run = request.query_params.get('dry_run', '').lower() in ('1', 'true', 'yes')
+        # Hash on the shared thread pool; forking a process pool per request would copy the worker
+        importer = ResidentImporter(society=society, dry_run=dry_run, hashing_pool=get_hashing_pool())
+        print(f"DEBUG ResidentImportView: {request.user.username} importing {fmt} residents (society={society_id}, dry_run={dry_run}).")
+
+        def lines():
+            try:
+                for error in importer.run(READERS[fmt](codecs.iterdecode(stream, 'utf-8-sig'))):
+                    yield json.dumps(error) + '\n'
+            except (ImportFormatError, UnicodeDecodeError) as e:
+                yield json.dumps({'error': str(e)}) + '\n'
+            yield json.dumps({'summary': importer.summary()}) + '\n'
+
+        return StreamingHttpResponse(lines(), content_type='application/x-ndjson')
 
 # --- Profile Management Views ---
 
@@ -321,16 +649,39 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
     permission_classes = [IsAuthenticated]
 
     def get_object(self):
-        try:
-            return self.request.user.profile
-        except ObjectDoesNotExist:
+        profile = get_user_context(self.request).profile
+        if profile is None:
             raise NotFound("User profile not found.")
+        return profile
 
     def retrieve(self, request, *args, **kwargs):
-        instance = self.get_object()
-        instance = Profile.objects.prefetch_related('societies').get(pk=instance.pk)
-        serializer = self.get_serializer(instance)
-        return Response(serializer.data)
+        # Validators come from one indexed read: the profile and user rows plus the
+        # newest of its societies and how many there are
+        validators = Profile.objects.filter(user=request.user).annotate(
+            societies_updated_at=Max('societies__updated_at'),
+            societies_count=Count('societies'),
+        ).values_list(
+            'id', 'updated_at', 'societies_updated_at', 'societies_count', 'user__username', 'user__email'
+        ).first()
+        if validators is None:
+            raise NotFound("User profile not found.")
+
+        profile_id, updated_at, societies_updated_at, societies_count, username, email = validators
+        last_modified = max(filter(None, [updated_at, societies_updated_at]))
+        # The User row has no timestamp, so its serialized fields go into the ETag itself
+        user_digest = hashlib.md5(f"{username}\n{email}".encode()).hexdigest()
+        etag = (
+            f"profile-{profile_id}-{updated_at.timestamp()}-"
+            f"{societies_updated_at.timestamp() if societies_updated_at else 0}-{societies_count}-"
+            f"{user_digest}-{get_location_version()}"
+        )
+
+        def build():
+            instance = Profile.objects.prefetch_related('societies').get(pk=profile_id)
+            serializer = self.get_serializer(instance)
+            return Response(serializer.data)
+
+        return conditional_response(request, build, etag, last_modified, private=True)
 
 # View/Update current service provider's profile
 class ServiceProviderSelfManagementView(generics.RetrieveUpdateAPIView):
@@ -340,13 +691,12 @@ class ServiceProviderSelfManagementView(generics.RetrieveUpdateAPIView):
     def get_object(self, queryset=None):
         user = self.request.user
         print(f"DEBUG ServiceProviderSelfManagementView: Attempting to get ServiceProvider for user {user.username} ({user.id})")
-        try:
-            service_provider = user.service_provider
-            print(f"DEBUG ServiceProviderSelfManagementView: Found ServiceProvider: {service_provider.name} (ID: {service_provider.id})")
-            return service_provider
-        except ObjectDoesNotExist:
+        service_provider = get_user_context(self.request).provider
+        if service_provider is None:
             print(f"DEBUG ServiceProviderSelfManagementView: ServiceProvider not found for user {user.username} ({user.id}).")
             raise NotFound("Service provider profile not found.")
+        print(f"DEBUG ServiceProviderSelfManagementView: Found ServiceProvider: {service_provider.name} (ID: {service_provider.id})")
+        return service_provider
 
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
@@ -360,9 +710,9 @@ class MySocietyListView(generics.ListAPIView):
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        user = self.request.user
-        if hasattr(user, 'profile') and user.profile.societies.exists():
-            return user.profile.societies.all()
+        context = get_user_context(self.request)
+        if context.is_resident:
+            return context.profile.societies.all()
         return Society.objects.none()
 
 # --- Password Reset Views ---
@@ -389,124 +739,48 @@ class ConfirmPasswordResetView(APIView):
 
         user.set_password(new_password)
         user.save()
+        # Sign out every session; the cached credentials go with the token (core.signals)
+        Token.objects.filter(user=user).delete()
 
         return Response({"detail": "Password has been reset successfully."}, status=status.HTTP_200_OK)
 
 # --- Voting Views ---
 
-# Helper function to check and update VotingRequest status
-def check_and_update_voting_request_status(voting_request):
-    """
-    Checks the vote counts for a voting request and updates its status.
-    If approved votes >= 5, status becomes 'approved'.
-    If rejected votes >= 3, status becomes 'rejected'.
-    If expired, status becomes 'expired'.
-    Also updates ServiceProvider.is_approved for provider listing requests.
-    """
-    if voting_request.status != 'pending':
-        return
-
-    approved_votes, rejected_votes = voting_request.count_votes()
-
-    if approved_votes >= 5:
-        voting_request.status = 'approved'
-        if voting_request.request_type == 'resident_join' and voting_request.resident_user:
-             with transaction.atomic():
-                 try:
-                     profile = voting_request.resident_user.profile
-                     if voting_request.society not in profile.societies.all():
-                         profile.societies.add(voting_request.society)
-                         profile.save()
-                         print(f"DEBUG Voting Status Update: Resident {voting_request.resident_user.username} added to society {voting_request.society.name}.")
-                     else:
-                          print(f"DEBUG Voting Status Update: Resident {voting_request.resident_user.username} was already in society {voting_request.society.name}.")
-                 except ObjectDoesNotExist:
-                     print(f"ERROR Voting Status Update: Profile not found for user {voting_request.resident_user.username}.")
-        elif voting_request.request_type == 'provider_list' and voting_request.service_provider:
-             with transaction.atomic():
-                 try:
-                     service_provider = voting_request.service_provider
-                     if voting_request.society not in service_provider.societies.all():
-                         service_provider.societies.add(voting_request.society)
-                         print(f"DEBUG Voting Status Update: Service Provider {service_provider.name} linked to society {voting_request.society.name}.")
-
-                     if not service_provider.is_approved:
-                         service_provider.is_approved = True
-                         print(f"DEBUG Voting Status Update: Service Provider {service_provider.name} is_approved set to True.")
-
-                     service_provider.save()
-
-                 except ObjectDoesNotExist:
-                     print(f"ERROR Voting Status Update: Service Provider not found for request {voting_request.id}.")
-
-    elif rejected_votes >= 3:
-        voting_request.status = 'rejected'
-
-    elif voting_request.expiry_time < timezone.now():
-        voting_request.status = 'expired'
-
-    if voting_request.status != 'pending':
-        voting_request.save()
-        print(f"DEBUG Voting Status Update: Voting request {voting_request.id} status updated to '{voting_request.status}'.")
-
-class VotingRequestViewSet(viewsets.ModelViewSet):
+class VotingRequestViewSet(UserAnnotationMixin, viewsets.ModelViewSet):
     queryset = VotingRequest.objects.all()
     serializer_class = VotingRequestSerializer
     permission_classes = [IsAuthenticated]
+    pagination_ordering = ('-created_at', '-id')
+    user_annotations = {'has_voted': has_voted_annotation}
 
     def get_queryset(self):
+        # Pure read: expiry and thresholds are settled by the voting sweeper
+        # (manage.py run_voting_sweeper), so requests past their expiry_time
+        # are simply hidden until it marks them expired.
         user = self.request.user
+        context = get_user_context(self.request)
         queryset = VotingRequest.objects.all().select_related(
-            'society',
-            'initiated_by',
-            'resident_user',
-            'service_provider__user'
-        ).prefetch_related('votes', 'service_provider__services')
-
-        if hasattr(user, 'profile') and user.profile.societies.exists():
-            user_societies = user.profile.societies.all()
+            *VOTING_REQUEST_RELATED
+        ).prefetch_related(*voting_request_prefetches())
+
+        if context.is_resident:
             queryset = queryset.filter(
-                society__in=user_societies,
-                status='pending'
+                society__in=context.society_ids,
+                status='pending',
+                expiry_time__gt=timezone.now()
             ).exclude(initiated_by=user)
 
-            print(f"DEBUG VotingRequestViewSet: Filtering voting requests for Resident {user.username} ({user.id}) based on societies: {[s.name for s in user_societies]} and status=pending. Queryset count: {queryset.count()}")
+            print(f"DEBUG VotingRequestViewSet: Filtering voting requests for Resident {user.username} ({user.id}) based on their societies and status=pending.")
 
-        elif hasattr(user, 'service_provider'):
+        elif context.is_provider:
              queryset = VotingRequest.objects.none()
              print(f"DEBUG VotingRequestViewSet: User {user.username} ({user.id}) is a Service Provider. Returning empty queryset for voting.")
 
         else:
             queryset = VotingRequest.objects.none()
-            print(f"DEBUG VotingRequestViewSet: User {user.username} ({user.id}) is not associated with any societies or is not a resident/provider. Returning empty queryset for voting.")
-
-        # Check and update status for pending requests
-        pending_requests_in_queryset = list(queryset)
-        for request in pending_requests_in_queryset:
-             check_and_update_voting_request_status(request)
+            print(f"DEBUG VotingRequestViewSet: User {user.username} ({user.id}) is not a resident/provider. Returning empty queryset for voting.")
 
-        # Re-fetch the queryset after potential status updates
-        queryset = VotingRequest.objects.all().select_related(
-            'society',
-            'initiated_by',
-            'resident_user',
-            'service_provider__user'
-        ).prefetch_related('votes', 'service_provider__services')
-
-        if hasattr(user, 'profile') and user.profile.societies.exists():
-            user_societies = user.profile.societies.all()
-            queryset = queryset.filter(
-                society__in=user_societies,
-                status='pending'
-            ).exclude(initiated_by=user)
-        elif hasattr(user, 'service_provider'):
-             queryset = VotingRequest.objects.none()
-        else:
-             queryset = VotingRequest.objects.none()
-
-        queryset = queryset.order_by('-created_at')
-
-        return queryset
+        return queryset.order_by('-created_at')
 
     def list(self, request, *args, **kwargs):
         queryset = self.filter_queryset(self.get_queryset())
@@ -521,6 +795,102 @@ class VotingRequestViewSet(viewsets.ModelViewSet):
         print("DEBUG VotingRequestViewSet (list): Serialized data:", serializer.data)
         return Response(serializer.data)
 
+    @action(detail=False, methods=['get'])
+    def changes(self, request):
+        """
+        Delta sync for the voting inbox. ?since=<cursor> returns requests in the
+        user's societies changed after the cursor: those still open under
+        `changes`, those that left the inbox (decided, expired, or in a society
+        the user has since left) as tombstones under `removed`. Without `since` only a starting cursor is returned;
+        take it before fetching the full list.
+        """
+        user = request.user
+        since = request.query_params.get('since')
+        if not since:
+            return Response({'changes': [], 'removed': [], 'cursor': initial_cursor(), 'has_more': False})
+
+        try:
+            limit = int(request.query_params.get('limit', CHANGES_DEFAULT_LIMIT))
+        except ValueError:
+            raise ValidationError({'limit': "Must be an integer."})
+
+        context = get_user_context(request)
+        if context.is_resident:
+            queryset = VotingRequest.objects.filter(
+                society__in=context.society_ids
+            ).exclude(initiated_by=user).select_related(
+                *VOTING_REQUEST_RELATED
+            ).prefetch_related(*voting_request_prefetches())
+        else:
+            queryset = VotingRequest.objects.none()
+
+        now = timezone.now()
+        try:
+            rows, cursor, has_more = voting_request_changes(self.filter_queryset(queryset), since, limit, now)
+        except InvalidCursor as e:
+            raise ValidationError({'since': str(e)})
+
+        open_rows, removed = [], []
+        for row in rows:
+            if row.status == 'pending' and row.expiry_time > now:
+                open_rows.append(row)
+            else:
+                removed.append({'id': row.id, 'status': row.status})
+
+        if context.is_resident:
+            # Requests of societies left since the cursor no longer match the queryset; send
+            # their open ones as tombstones (again on later polls until the cursor passes)
+            left_ids = set(SocietyDeparture.objects.filter(
+                profile=context.profile, left_at__gt=cursor_time(since)
+            ).values_list('society_id', flat=True)) - context.society_ids
+            if left_ids:
+                removed.extend(
+                    {'id': pk, 'status': request_status}
+                    for pk, request_status in VotingRequest.objects.filter(
+                        society__in=left_ids, status='pending'
+                    ).exclude(initiated_by=user).values_list('id', 'status')
+                )
+
+        print(f"DEBUG VotingRequestViewSet (changes): {len(open_rows)} changed, {len(removed)} removed for user {user.username} ({user.id}).")
+
+        return Response({
+            'changes': self.get_serializer(open_rows, many=True).data,
+            'removed': removed,
+            'cursor': cursor,
+            'has_more': has_more,
+        })
+
+    @action(detail=False, methods=['post'], url_path='stream-ticket')
+    def stream_ticket(self, request):
+        """
+        Credential for opening /api/votingrequests/stream/?ticket=..., valid
+        for STREAM_TICKET_MAX_AGE seconds. 204 when the app is not served
+        under ASGI and there is no stream; clients should poll instead.
+        """
+        if not is_asgi_request(request):
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        return Response({'ticket': issue_stream_ticket(request.user), 'expires_in': STREAM_TICKET_MAX_AGE})
+
+    @action(detail=False, methods=['post'], url_path='bulk-vote', serializer_class=BulkVoteSerializer)
+    def bulk_vote(self, request):
+        """
+        Casts up to BulkVoteSerializer.MAX_VOTES votes in one transaction:
+        {"votes": [{"request_id": 1, "vote_type": "approve"}, ...]}.
+        Responds with one result per item; ineligible items are skipped, not fatal.
+        """
+        context = get_user_context(request)
+        if not context.is_resident:
+            raise PermissionDenied("Only residents can vote on requests.")
+
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        results = cast_votes(request.user, serializer.validated_data['votes'], society_ids=context.society_ids)
+        recorded = sum(1 for result in results if result['recorded'])
+        print(f"DEBUG VotingRequestViewSet (bulk_vote): Recorded {recorded} of {len(results)} votes for user {request.user.username} ({request.user.id}).")
+
+        return Response({'recorded': recorded, 'results': results}, status=status.HTTP_200_OK)
+
     @action(detail=True, methods=['post'], serializer_class=VoteSerializer)
     def vote(self, request, pk=None):
         voting_request = self.get_object()
@@ -531,13 +901,12 @@ class VotingRequestViewSet(viewsets.ModelViewSet):
 
             vote_type = serializer.validated_data['vote_type']
 
-            vote = Vote.objects.create(request=voting_request, voter=request.user, vote_type=vote_type)
-
-            voting_request.refresh_from_db()
-            check_and_update_voting_request_status(voting_request)
+            cast_vote(voting_request, request.user, vote_type)
 
             return Response({'detail': 'Vote recorded successfully.'}, status=status.HTTP_200_OK)
 
+        except VoteConflict as e:
+            return Response({'detail': str(e)}, status=status.HTTP_409_CONFLICT)
         except ValidationError as e:
              print(f"DEBUG VotingRequestViewSet (vote action) Validation Error: {e.detail}")
              return Response(e.detail, status=status.HTTP_400_BAD_REQUEST)
@@ -552,22 +921,22 @@ class AvailableSocietiesForResidentView(generics.ListAPIView):
 
     def get_queryset(self):
         user = self.request.user
-        if not hasattr(user, 'profile'):
+        context = get_user_context(self.request)
+        if not context.is_resident:
             return Society.objects.none()
 
-        user_society_ids = user.profile.societies.values_list('id', flat=True)
+        profile = context.profile
+        user_society_ids = context.society_ids
         
         # Filter societies by user's location
         queryset = Society.objects.filter(
-            country=user.profile.country,
-            state=user.profile.state,
-            district=user.profile.district,
-            circle=user.profile.circle
+            country_id=profile.country_id,
+            state_id=profile.state_id,
+            district_id=profile.district_id,
+            circle_id=profile.circle_id
         ).exclude(id__in=user_society_ids)
 
-        print(f"DEBUG AvailableSocietiesForResidentView: User {user.username} ({user.id}) is in societies: {list(user_society_ids)}. Available societies count: {queryset.count()}")
-
-        queryset = queryset.annotate(resident_count=Count('profiles'))
+        print(f"DEBUG AvailableSocietiesForResidentView: User {user.username} ({user.id}) is in societies: {sorted(user_society_ids)}.")
 
         return queryset
 
@@ -579,11 +948,11 @@ class AvailableSocietiesForServiceProviderView(generics.ListAPIView):
     def get_queryset(self):
         user = self.request.user
         print(f"DEBUG AvailableSocietiesForServiceProviderView: Checking user {user.username} ({user.id}) for service provider status.")
-        if not hasattr(user, 'service_provider'):
+        service_provider = get_user_context(self.request).provider
+        if service_provider is None:
             print(f"DEBUG AvailableSocietiesForServiceProviderView: User {user.username} ({user.id}) is not a service provider. Returning empty queryset.")
             return Society.objects.none()
 
-        service_provider = user.service_provider
         print(f"DEBUG AvailableSocietiesForServiceProviderView: User is a service provider: {service_provider.name} (ID: {service_provider.id}).")
 
         associated_society_ids = service_provider.societies.values_list('id', flat=True)
@@ -607,10 +976,6 @@ class AvailableSocietiesForServiceProviderView(generics.ListAPIView):
             circle=service_provider.circle
         ).exclude(id__in=excluded_society_ids)
 
-        print(f"DEBUG AvailableSocietiesForServiceProviderView: Available societies count: {queryset.count()}")
-
-        queryset = queryset.annotate(resident_count=Count('profiles'))
-
         return queryset
 
 # New View to initiate a resident join voting request
@@ -628,10 +993,11 @@ class InitiateResidentJoinVotingRequestView(generics.CreateAPIView):
         user = request.user
         society = validated_data['society_id']
 
-        if not hasattr(user, 'profile'):
+        context = get_user_context(request)
+        if not context.is_resident:
             raise PermissionDenied("Only resident users can initiate join requests.")
 
-        if user.profile.societies.filter(id=society.id).exists():
+        if society.id in context.society_ids:
             raise ValidationError({"detail": "You are already a member of this society."})
 
         if VotingRequest.objects.filter(
@@ -641,7 +1007,11 @@ class InitiateResidentJoinVotingRequestView(generics.CreateAPIView):
         ).exists():
             raise ValidationError({"detail": "You already have a pending join request. Please wait for it to be processed."})
 
-        expiry_time = timezone.now() + timedelta(minutes=5)
+        # An approved request stops being 'pending' before the outbox worker adds the membership
+        if pending_events(APPROVED_EVENT, request_type='resident_join', resident_user_id=user.id, society_id=society.id).exists():
+            raise ValidationError({"detail": "Your join request for this society was approved and is being applied."})
+
+        expiry_time = timezone.now() + voting_period_for(society)
 
         with transaction.atomic():
             voting_request = VotingRequest.objects.create(
@@ -655,11 +1025,8 @@ class InitiateResidentJoinVotingRequestView(generics.CreateAPIView):
             print(f"DEBUG InitiateResidentJoinVotingRequestView: Created resident join voting request {voting_request.id} for user {user.username} in society {society.name}.")
 
         created_request_instance = VotingRequest.objects.select_related(
-            'society',
-            'initiated_by',
-            'resident_user',
-            'service_provider__user'
-        ).prefetch_related('votes').get(pk=voting_request.pk)
+            *VOTING_REQUEST_RELATED
+        ).prefetch_related(*voting_request_prefetches()).get(pk=voting_request.pk)
 
         response_serializer = self.response_serializer_class(created_request_instance, context={'request': request})
 
@@ -680,11 +1047,10 @@ class InitiateServiceProviderListingVotingRequestView(generics.CreateAPIView):
         user = request.user
         society = validated_data['society_id']
 
-        if not hasattr(user, 'service_provider'):
+        service_provider = get_user_context(request).provider
+        if service_provider is None:
             raise PermissionDenied("Only service providers can initiate listing requests.")
 
-        service_provider = user.service_provider
-
         if service_provider.societies.filter(id=society.id).exists():
             raise ValidationError({"detail": "You are already listed in this society."})
 
@@ -696,7 +1062,7 @@ class InitiateServiceProviderListingVotingRequestView(generics.CreateAPIView):
         ).exists():
             raise ValidationError({"detail": "You already have a pending listing request for this society. Please wait for it to be processed."})
 
-        expiry_time = timezone.now() + timedelta(minutes=5)
+        expiry_time = timezone.now() + voting_period_for(society)
 
         with transaction.atomic():
             voting_request = VotingRequest.objects.create(
@@ -710,12 +1076,88 @@ class InitiateServiceProviderListingVotingRequestView(generics.CreateAPIView):
             print(f"DEBUG InitiateServiceProviderListingVotingRequestView: Created provider listing voting request {voting_request.id} for provider {service_provider.name} in society {society.name}.")
 
         created_request_instance = VotingRequest.objects.select_related(
-            'society',
-            'initiated_by',
-            'resident_user',
-            'service_provider__user'
-        ).prefetch_related('votes').get(pk=voting_request.pk)
+            *VOTING_REQUEST_RELATED
+        ).prefetch_related(*voting_request_prefetches()).get(pk=voting_request.pk)
 
         response_serializer = self.response_serializer_class(created_request_instance, context={'request': request})
 
-        return Response(response_serializer.data, status=status.HTTP_201_CREATED)
\ No newline at end of file
+        return Response(response_serializer.data, status=status.HTTP_201_CREATED)
+
+
+# --- Live voting updates (server-sent events) ---
+
+# Comment line sent when idle so proxies keep the connection open
+STREAM_KEEPALIVE_SECONDS = 15
+
+def is_asgi_request(request):
+    return isinstance(getattr(request, '_request', request), ASGIRequest)
+
+def stream_user(request):
+    """
+    Resolves the token from the Authorization header or, since EventSource
+    cannot set headers, a ?ticket= from the stream-ticket action. Returns
+    None if missing or invalid.
+    """
+    header = request.headers.get('Authorization', '')
+    if header.startswith('Token '):
+        try:
+            user, _ = CachedTokenAuthentication().authenticate_credentials(header[len('Token '):])
+        except AuthenticationFailed:
+            return None
+        return user
+
+    user_id = read_stream_ticket(request.GET.get('ticket', ''))
+    if user_id is None:
+        return None
+    return User.objects.filter(pk=user_id, is_active=True).first()
+
+def stream_topics(user):
+    topics = [user_topic(user.id)]
+    topics.extend(society_topic(pk) for pk in UserContext(user).society_ids)
+    return topics
+
+async def voting_request_stream(request):
+    """
+    Pushes voting request events for the user's societies and for requests
+    the user initiated: new requests, tally changes and final outcomes.
+    The database is only read on connect; an idle stream costs nothing but
+    the keepalive. Needs an ASGI server (see society_app_backend/asgi.py):
+    under WSGI Django would buffer the endless stream and hold a worker, so
+    it answers 204, which also tells EventSource not to reconnect.
+    """
+    if not is_asgi_request(request):
+        return HttpResponse(status=status.HTTP_204_NO_CONTENT)
+    user = await sync_to_async(stream_user)(request)
+    if user is None:
+        return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=401)
+    topics = await sync_to_async(stream_topics)(user)
+    # subscribe() may wait for the broker's listener to connect; keep that off the event loop
+    subscribe = sync_to_async(get_broker().subscribe, thread_sensitive=False)
+    subscription = await subscribe(topics, asyncio.get_running_loop())
+    print(f"DEBUG voting_request_stream: User {user.username} ({user.id}) subscribed to {len(topics)} topics.")
+
+    async def events():
+        try:
+            yield f"retry: {STREAM_KEEPALIVE_SECONDS * 1000}\n\n"
+            while True:
+                event = await subscription.get(STREAM_KEEPALIVE_SECONDS)
+                if subscription.overflowed:
+                    # Fell behind; the client should refetch its lists
+                    subscription.overflowed = False
+                    yield "event: resync\ndata: {}\n\n"
+                if event is None:
+                    yield ": keepalive\n\n"
+                    continue
+                voting_request = event['request']
+                if (event['type'] == SETTLED and voting_request['status'] == 'approved'
+                        and voting_request['resident_user_id'] == user.id):
+                    # The user just joined this society; follow its requests too
+                    subscription.add_topic(society_topic(voting_request['society_id']))
+                yield encode_event(event)
+        finally:
+            subscription.close()
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,322 @@
+# backend/core/voting.py
+
+from django.db import IntegrityError, transaction
+from django.db.models import (
+    Case, CharField, Count, Exists, F, IntegerField, OuterRef, Subquery, Value, When
+)
+from django.db.models.functions import Coalesce, Greatest, Least
+from django.utils import timezone
+
+from .context import UserContext
+from .events import UPDATED, SETTLED, publish_on_commit
+from .models import Profile, ServiceProvider, VotingPolicy, VotingRequest, Vote
+from .outbox import enqueue, outbox_handler
+
+# Used for societies without a VotingPolicy row
+APPROVAL_THRESHOLD = VotingPolicy.DEFAULT_APPROVAL_THRESHOLD
+REJECTION_THRESHOLD = VotingPolicy.DEFAULT_REJECTION_THRESHOLD
+
+# Tally column for each vote type
+TALLY_FIELDS = {
+    'approve': 'approved_count',
+    'reject': 'rejected_count',
+}
+
+class VoteConflict(Exception):
+    """The vote lost a race: the request closed or the voter already voted."""
+
+
+def cast_vote(voting_request, voter, vote_type):
+    """
+    Records a vote as a conditional state transition and settles the request
+    if this vote crossed a threshold. Returns the request's resulting status.
+
+    The guarded UPDATE bumps the tally only while the request is still pending
+    and unexpired, and the row lock it takes is held until commit, so votes on
+    the same request are serialized while votes on other requests are not.
+    The unique (request, voter) constraint catches duplicate votes.
+    """
+    field = TALLY_FIELDS[vote_type]
+    now = timezone.now()
+    try:
+        with transaction.atomic():
+            opened = VotingRequest.objects.filter(
+                pk=voting_request.pk, status='pending', expiry_time__gt=now
+            ).update(**{field: F(field) + 1}, updated_at=now)
+            if not opened:
+                raise VoteConflict("This voting request is no longer active.")
+
+            vote = Vote(request_id=voting_request.pk, voter=voter, vote_type=vote_type)
+            vote._tallied = True  # counted by the UPDATE above, not by core.signals
+            vote.save()
+
+            # Re-read under the lock so the tallies include every committed vote
+            locked = VotingRequest.objects.get(pk=voting_request.pk)
+            check_and_update_voting_request_status(locked)
+            if locked.status == 'pending':
+                publish_on_commit([locked.pk], UPDATED)
+            return locked.status
+    except IntegrityError:
+        raise VoteConflict("You have already voted on this request.")
+
+# --- Voting policy ---
+
+def required_votes(threshold_field, percent_field, default):
+    """
+    SQL expression for the votes a request needs: the larger of the policy's
+    absolute threshold and its percentage of the society's resident_count,
+    capped at resident_count so small societies can still decide, and never
+    below one.
+    """
+    members = F('society__resident_count')
+    threshold = Coalesce(F(f'society__voting_policy__{threshold_field}'), Value(default))
+    percent = Coalesce(F(f'society__voting_policy__{percent_field}'), Value(0))
+    # Integer ceil(members * percent / 100)
+    quorum = (members * percent + Value(99)) / Value(100)
+    return Greatest(Value(1), Least(members, Greatest(threshold, quorum)), output_field=IntegerField())
+
+def with_policy(queryset):
+    """
+    Annotates approvals_required, rejections_required and `decision` (the
+    status the stored tallies call for, or 'pending') in the same query.
+    """
+    return queryset.annotate(
+        approvals_required=required_votes('approval_threshold', 'approval_percent', APPROVAL_THRESHOLD),
+        rejections_required=required_votes('rejection_threshold', 'rejection_percent', REJECTION_THRESHOLD),
+    ).annotate(
+        decision=Case(
+            When(approved_count__gte=F('approvals_required'), then=Value('approved')),
+            When(rejected_count__gte=F('rejections_required'), then=Value('rejected')),
+            default=Value('pending'),
+            output_field=CharField(),
+        )
+    )
+
+def voting_period_for(society):
+    """How long a new request in `society` stays open."""
+    period = VotingPolicy.objects.filter(society=society).values_list('voting_period', flat=True).first()
+    return period or VotingPolicy.DEFAULT_VOTING_PERIOD
+
+def has_voted_annotation(user):
+    """Exists() expression for annotating whether `user` has voted on each request."""
+    return Exists(Vote.objects.filter(request_id=OuterRef('pk'), voter=user))
+
+def tally_subquery(vote_type):
+    return Coalesce(
+        Subquery(
+            Vote.objects.filter(request_id=OuterRef('pk'), vote_type=vote_type)
+            .order_by()
+            .values('request_id')
+            .annotate(count=Count('*'))
+            .values('count')
+        ),
+        0
+    )
+
+def refresh_vote_tallies(request_ids=None):
+    """Recomputes approved_count/rejected_count from the votes table in one UPDATE."""
+    queryset = VotingRequest.objects.all()
+    if request_ids is not None:
+        queryset = queryset.filter(id__in=list(request_ids))
+    return queryset.update(
+        approved_count=tally_subquery('approve'),
+        rejected_count=tally_subquery('reject')
+    )
+
+def cast_votes(voter, votes, society_ids=None):
+    """
+    Records many votes by one voter in a single transaction. `votes` is a list
+    of {'request_id', 'vote_type'} with distinct request ids; `society_ids` are
+    the voter's societies if the caller already has them. Eligibility is
+    checked for all of them with a fixed number of queries, the votes go in
+    with bulk_create and the tallies with one UPDATE per vote type; only
+    requests this batch decided are settled one by one. Returns one result
+    dict per item, in input order.
+    """
+    now = timezone.now()
+    requested = {item['request_id']: item['vote_type'] for item in votes}
+    results = {}
+
+    member_of = UserContext(voter).society_ids if society_ids is None else society_ids
+
+    with transaction.atomic():
+        # Lock the requested rows in id order so concurrent batches cannot deadlock
+        rows = {
+            row['id']: row for row in VotingRequest.objects.select_for_update()
+            .filter(id__in=list(requested)).order_by('id')
+            .values('id', 'status', 'expiry_time', 'society_id', 'initiated_by_id')
+        }
+        already_voted = set(
+            Vote.objects.filter(request_id__in=list(rows), voter=voter).values_list('request_id', flat=True)
+        )
+
+        accepted = {}
+        for request_id, vote_type in requested.items():
+            row = rows.get(request_id)
+            if row is None:
+                results[request_id] = "Voting request not found."
+            elif row['status'] != 'pending' or row['expiry_time'] <= now:
+                results[request_id] = "This voting request is no longer active."
+            elif row['society_id'] not in member_of:
+                results[request_id] = "You are not authorized to vote on this request."
+            elif row['initiated_by_id'] == voter.id:
+                results[request_id] = "You cannot vote on your own request."
+            elif request_id in already_voted:
+                results[request_id] = "You have already voted on this request."
+            else:
+                accepted[request_id] = vote_type
+
+        try:
+            with transaction.atomic():
+                Vote.objects.bulk_create([
+                    Vote(request_id=request_id, voter=voter, vote_type=vote_type)
+                    for request_id, vote_type in accepted.items()
+                ])
+        except IntegrityError:
+            # A vote cast elsewhere (e.g. a concurrent single vote) landed after the check;
+            # insert one by one to find it, so only that item is refused instead of the batch
+            for request_id, vote_type in list(accepted.items()):
+                vote = Vote(request_id=request_id, voter=voter, vote_type=vote_type)
+                vote._tallied = True  # counted by the UPDATE below
+                try:
+                    with transaction.atomic():
+                        vote.save()
+                except IntegrityError:
+                    del accepted[request_id]
+                    results[request_id] = "You have already voted on this request."
+        for vote_type, field in TALLY_FIELDS.items():
+            ids = [request_id for request_id, chosen in accepted.items() if chosen == vote_type]
+            if ids:
+                VotingRequest.objects.filter(id__in=ids).update(**{field: F(field) + 1}, updated_at=now)
+
+        decided = VotingRequest.objects.filter(
+            pk__in=with_policy(VotingRequest.objects.filter(id__in=list(accepted))).exclude(decision='pending').values('pk')
+        )
+        outcomes = {}
+        for voting_request in decided:
+            check_and_update_voting_request_status(voting_request)
+            outcomes[voting_request.id] = voting_request.status
+
+        publish_on_commit([request_id for request_id in accepted if request_id not in outcomes], UPDATED)
+
+    return [
+        {
+            'request_id': item['request_id'],
+            'recorded': item['request_id'] in accepted,
+            'detail': results.get(item['request_id'], "Vote recorded successfully."),
+            'request_status': outcomes.get(item['request_id'], 'pending') if item['request_id'] in accepted else None,
+        }
+        for item in votes
+    ]
+
+# Outbox event written when a request is approved
+APPROVED_EVENT = 'voting_request.approved'
+
+@outbox_handler(APPROVED_EVENT)
+def apply_approval(payload):
+    """
+    Adds the resident to, or lists the provider in, the request's society.
+    Runs in the outbox worker; m2m add() skips existing links, so replays are
+    harmless.
+    """
+    society_id = payload['society_id']
+    if payload['request_type'] == 'resident_join' and payload.get('resident_user_id'):
+        profile = Profile.objects.get(user_id=payload['resident_user_id'])
+        profile.societies.add(society_id)
+        print(f"DEBUG Voting Status Update: Resident {payload['resident_user_id']} added to society {society_id}.")
+    elif payload['request_type'] == 'provider_list' and payload.get('service_provider_id'):
+        service_provider = ServiceProvider.objects.get(pk=payload['service_provider_id'])
+        service_provider.societies.add(society_id)
+        print(f"DEBUG Voting Status Update: Service Provider {service_provider.name} linked to society {society_id}.")
+
+        if not service_provider.is_approved:
+            service_provider.is_approved = True
+            service_provider.save()
+            print(f"DEBUG Voting Status Update: Service Provider {service_provider.name} is_approved set to True.")
+
+# Helper function to check and update VotingRequest status
+def check_and_update_voting_request_status(voting_request):
+    """
+    Checks the vote counts for a voting request against its society's
+    voting policy and updates its status.
+    If approvals reach the policy's requirement, status becomes 'approved'.
+    Otherwise if rejections reach theirs, status becomes 'rejected'.
+    If expired, status becomes 'expired'.
+    The move out of 'pending' is a guarded UPDATE, so when several callers
+    race only the one that wins queues the approval side effects, as an
+    outbox event in the same transaction (see core.outbox).
+    """
+    if voting_request.status != 'pending':
+        return
+
+    new_status = with_policy(
+        VotingRequest.objects.filter(pk=voting_request.pk)
+    ).values_list('decision', flat=True).first()
+
+    if new_status is None:
+        return
+    if new_status == 'pending':
+        if voting_request.expiry_time >= timezone.now():
+            return
+        new_status = 'expired'
+
+    with transaction.atomic():
+        claimed = VotingRequest.objects.filter(pk=voting_request.pk, status='pending').update(
+            status=new_status, updated_at=timezone.now()
+        )
+        if not claimed:
+            voting_request.refresh_from_db(fields=['status'])
+            print(f"DEBUG Voting Status Update: Voting request {voting_request.id} was already settled as '{voting_request.status}'.")
+            return
+
+        voting_request.status = new_status
+        if new_status == 'approved':
+            enqueue(APPROVED_EVENT, {
+                'voting_request_id': voting_request.pk,
+                'request_type': voting_request.request_type,
+                'society_id': voting_request.society_id,
+                'resident_user_id': voting_request.resident_user_id,
+                'service_provider_id': voting_request.service_provider_id,
+            })
+        publish_on_commit([voting_request.pk], SETTLED)
+
+    print(f"DEBUG Voting Status Update: Voting request {voting_request.id} status updated to '{voting_request.status}'.")
+
+# --- Background sweeping ---
+
+def sweep_voting_requests(now=None):
+    """
+    Settles every pending request whose expiry_time has passed, judging all
+    of them against their society's policy in SQL: rejections and expiries
+    are bulk UPDATEs, approvals are decided one by one since they carry
+    membership side effects. Returns (decided, expired).
+    """
+    now = now or timezone.now()
+    due = VotingRequest.objects.filter(status='pending', expiry_time__lte=now)
+
+    # Catch-up for requests whose last vote crossed a threshold but were not
+    # settled at vote time (or whose policy or member count changed since)
+    rejected_ids = list(with_policy(due).filter(decision='rejected').values_list('pk', flat=True))
+    decided_count = VotingRequest.objects.filter(
+        pk__in=rejected_ids, status='pending'
+    ).update(status='rejected', updated_at=now)
+    publish_on_commit(rejected_ids, SETTLED)
+
+    approved = VotingRequest.objects.filter(
+        pk__in=with_policy(due).filter(decision='approved').values('pk')
+    )
+    for voting_request in approved:
+        check_and_update_voting_request_status(voting_request)
+        decided_count += 1
+
+    expired_ids = list(due.values_list('pk', flat=True))
+    expired_count = VotingRequest.objects.filter(
+        pk__in=expired_ids, status='pending'
+    ).update(status='expired', updated_at=now)
+    publish_on_commit(expired_ids, SETTLED)
+    return decided_count, expired_count
+
+
+def next_expiry_time():
+    """The earliest expiry_time among pending requests, or None."""
+    return VotingRequest.objects.filter(status='pending').order_by('expiry_time').values_list('expiry_time', flat=True).first()
@@ -3,6 +3,12 @@ ASGI config for society_app_backend project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+The live voting stream (/api/votingrequests/stream/) is an async view that
+holds the connection open, so serve the app through this module with an ASGI
+server, e.g. `uvicorn society_app_backend.asgi:application`.
+The login and registration views are async too, so the password hashing
+they wait on (core/hashing.py) does not hold up other requests.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -38,6 +38,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'core',
     'rest_framework',
     'rest_framework.authtoken',
@@ -87,16 +88,20 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'society_app_backend.wsgi.application'
+ASGI_APPLICATION = 'society_app_backend.asgi.application'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication', # Use TokenAuthentication
+        'core.authentication.CachedTokenAuthentication', # TokenAuthentication with a short-lived in-process cache
         'rest_framework.authentication.SessionAuthentication', # Optional: for browsable API/admin login
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated', # Default to requiring authentication
         # You might relax this for specific views like registration/login using AllowAny
-    ]
+    ],
+    # Keyset pagination for every list endpoint; page size is bounded by KeysetPagination.max_page_size
+    'DEFAULT_PAGINATION_CLASS': 'core.pagination.KeysetPagination',
+    'PAGE_SIZE': 50,
 }
 
 
@@ -115,6 +120,68 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+#
+# Holds the version counters (core/versions.py) and the public response cache
+# (core/caching.py), and the auth versions that tell CachedTokenAuthentication
+# a user's password or tokens changed. Every process that writes (web workers,
+# run_outbox_worker, run_voting_sweeper) must share it, or its version bumps
+# never reach the others and they keep serving stale responses; `manage.py
+# check` warns about process-local backends (core.W001) and the worker and
+# sweeper refuse to start with one. The database cache below is shared by
+# everything that uses the same database and needs no extra service (its table
+# is created by migration 0029, or `manage.py createcachetable`). For less load
+# on the database use a shared in-memory backend, e.g.
+#   'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+#   'LOCATION': 'redis://127.0.0.1:6379',
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'core_cache',
+        'OPTIONS': {
+            'MAX_ENTRIES': 50000,
+        },
+    }
+}
+
+# Cache alias and timeout (seconds) for cached public read endpoints.
+# Entries are keyed by version, so the timeout only bounds memory use.
+RESPONSE_CACHE_ALIAS = 'default'
+RESPONSE_CACHE_TIMEOUT = 600
+
+# Pub/sub broker behind the live voting stream (core/events.py). The
+# Postgres broker relays events over LISTEN/NOTIFY, so streams also see what
+# other workers, run_voting_sweeper and run_outbox_worker publish; whether any
+# stream is open anywhere is kept in the shared cache, so publishers skip the
+# work while none is. The in-process broker only reaches streams held by the
+# publishing process.
+VOTING_EVENT_BROKER = 'core.events.PostgresBroker'
+
+# Token authentication (core/authentication.py). Tokens older than
+# AUTH_TOKEN_TTL_DAYS are refused and replaced at the next login; expired rows
+# are deleted by `manage.py cleanup_expired_tokens`. Resolved tokens are cached
+# per process for AUTH_TOKEN_CACHE_TTL seconds, at most AUTH_TOKEN_CACHE_SIZE;
+# that is also how long another worker may accept a revoked token when CACHES
+# is not shared (see above).
+AUTH_TOKEN_TTL_DAYS = 30
+AUTH_TOKEN_CACHE_TTL = 60
+AUTH_TOKEN_CACHE_SIZE = 10000
+
+# Password hashing for the async login/registration views (core/hashing.py)
+# runs on PASSWORD_HASHING_WORKERS threads (default: one per core). Once
+# PASSWORD_HASHING_MAX_PENDING hashes are queued or running (default: eight
+# per worker) further logins get 503 with Retry-After instead of waiting.
+# `manage.py benchmark_password_hashing` reports the throughput to expect.
+PASSWORD_HASHING_WORKERS = None
+PASSWORD_HASHING_MAX_PENDING = None
+
+# Closed voting requests untouched for this many days are moved to the archive
+# tables by `manage.py archive_voting_requests` (run it from cron).
+VOTING_ARCHIVE_AFTER_DAYS = 30
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -11,96 +11,36 @@ const LocationSelector = ({
     disabled = false 
 }) => {
     const [countries, setCountries] = useState([]);
-    const [states, setStates] = useState([]);
-    const [districts, setDistricts] = useState([]);
-    const [circles, setCircles] = useState([]);
     const [loading, setLoading] = useState(false);
 
     const backendIp = '127.0.0.1';
     const backendPort = '8000';
 
-    // Fetch countries on component mount
+    // Fetch the whole location hierarchy once on component mount
     useEffect(() => {
-        fetchCountries();
+        fetchLocationTree();
     }, []);
 
-    // Fetch states when country changes
-    useEffect(() => {
-        if (selectedCountry) {
-            fetchStates(selectedCountry);
-        } else {
-            setStates([]);
-            setDistricts([]);
-            setCircles([]);
-        }
-    }, [selectedCountry]);
-
-    // Fetch districts when state changes
-    useEffect(() => {
-        if (selectedState) {
-            fetchDistricts(selectedState);
-        } else {
-            setDistricts([]);
-            setCircles([]);
-        }
-    }, [selectedState]);
-
-    // Fetch circles when district changes
-    useEffect(() => {
-        if (selectedDistrict) {
-            fetchCircles(selectedDistrict);
-        } else {
-            setCircles([]);
-        }
-    }, [selectedDistrict]);
-
-    const fetchCountries = async () => {
-        try {
-            setLoading(true);
-            const response = await axios.get(`http://${backendIp}:${backendPort}/api/countries/`);
-            setCountries(response.data);
-        } catch (error) {
-            console.error('Error fetching countries:', error);
-        } finally {
-            setLoading(false);
-        }
-    };
-
-    const fetchStates = async (countryId) => {
-        try {
-            setLoading(true);
-            const response = await axios.get(`http://${backendIp}:${backendPort}/api/states/?country_id=${countryId}`);
-            setStates(response.data);
-        } catch (error) {
-            console.error('Error fetching states:', error);
-        } finally {
-            setLoading(false);
-        }
-    };
-
-    const fetchDistricts = async (stateId) => {
+    const fetchLocationTree = async () => {
         try {
             setLoading(true);
-            const response = await axios.get(`http://${backendIp}:${backendPort}/api/districts/?state_id=${stateId}`);
-            setDistricts(response.data);
+            const response = await axios.get(`http://${backendIp}:${backendPort}/api/locations/tree/`);
+            setCountries(response.data.tree);
         } catch (error) {
-            console.error('Error fetching districts:', error);
+            console.error('Error fetching locations:', error);
         } finally {
             setLoading(false);
         }
     };
 
-    const fetchCircles = async (districtId) => {
-        try {
-            setLoading(true);
-            const response = await axios.get(`http://${backendIp}:${backendPort}/api/circles/?district_id=${districtId}`);
-            setCircles(response.data);
-        } catch (error) {
-            console.error('Error fetching circles:', error);
-        } finally {
-            setLoading(false);
-        }
-    };
+    // Each level is derived from the selection above it, no extra requests needed
+    const findById = (items, id) => items.find(item => String(item.id) === String(id));
+    const country = selectedCountry ? findById(countries, selectedCountry) : null;
+    const states = country ? country.states : [];
+    const state = selectedState ? findById(states, selectedState) : null;
+    const districts = state ? state.districts : [];
+    const district = selectedDistrict ? findById(districts, selectedDistrict) : null;
+    const circles = district ? district.circles : [];
 
     const handleCountryChange = (e) => {
         const countryId = e.target.value;
@@ -4,6 +4,8 @@ import axios from 'axios';
 import { useNavigate, Link } from 'react-router-dom';
 import { useTheme } from '../contexts/ThemeContext';
 import '../App.css';
+import { openVotingStream } from '../utils/votingStream';
+import { fetchAllPages } from '../utils/pagination';
 
 function DashboardPage() {
     const [userProfile, setUserProfile] = useState(null);
@@ -11,6 +13,9 @@ function DashboardPage() {
     const [availableSocieties, setAvailableSocieties] = useState([]);
     const [initiatedRequests, setInitiatedRequests] = useState([]);
     const [votingRequests, setVotingRequests] = useState([]);
+    const [archivedRequests, setArchivedRequests] = useState(null);
+    const [archivedNext, setArchivedNext] = useState(null);
+    const [archivedLoading, setArchivedLoading] = useState(false);
     const [error, setError] = useState('');
     const [message, setMessage] = useState('');
     const [loading, setLoading] = useState(true);
@@ -51,21 +56,21 @@ function DashboardPage() {
 
             console.log("DashboardPage: Attempting to fetch available societies...");
             // Fetch Societies available to join (now filtered by location)
-            const availableSocietiesResponse = await axios.get(`http://${backendIp}:${backendPort}/api/societies/available-for-resident/`, { headers });
-            console.log("DashboardPage: Available societies fetched:", availableSocietiesResponse.data);
-            setAvailableSocieties(availableSocietiesResponse.data);
+            const availableSocietiesList = await fetchAllPages(`http://${backendIp}:${backendPort}/api/societies/available-for-resident/`, { headers });
+            console.log("DashboardPage: Available societies fetched:", availableSocietiesList);
+            setAvailableSocieties(availableSocietiesList);
 
             console.log("DashboardPage: Attempting to fetch initiated voting requests...");
             // Fetch voting requests initiated by this resident
-            const initiatedRequestsResponse = await axios.get(`http://${backendIp}:${backendPort}/api/my-initiated-voting-requests/`, { headers });
-            console.log("DashboardPage: Initiated voting requests fetched:", initiatedRequestsResponse.data);
-            setInitiatedRequests(initiatedRequestsResponse.data);
+            const initiatedRequestsList = await fetchAllPages(`http://${backendIp}:${backendPort}/api/my-initiated-voting-requests/`, { headers });
+            console.log("DashboardPage: Initiated voting requests fetched:", initiatedRequestsList);
+            setInitiatedRequests(initiatedRequestsList);
 
             console.log("DashboardPage: Attempting to fetch voting requests for voting...");
             // Fetch voting requests that this resident can vote on
-            const votingRequestsResponse = await axios.get(`http://${backendIp}:${backendPort}/api/votingrequests/`, { headers });
-            console.log("DashboardPage: Voting requests fetched:", votingRequestsResponse.data);
-            setVotingRequests(votingRequestsResponse.data);
+            const votingRequestsList = await fetchAllPages(`http://${backendIp}:${backendPort}/api/votingrequests/`, { headers });
+            console.log("DashboardPage: Voting requests fetched:", votingRequestsList);
+            setVotingRequests(votingRequestsList);
 
         } catch (err) {
             console.error("DashboardPage: Error fetching user data:", err.response ? err.response.data : err.message);
@@ -91,6 +96,62 @@ function DashboardPage() {
         fetchUserData();
     }, [fetchUserData]);
 
+    // --- Live voting updates (server-sent events) ---
+    useEffect(() => {
+        if (!authToken || userRole !== 'resident') {
+            return undefined;
+        }
+
+        // Tally changes are applied in place; anything else refetches the lists
+        const handleTallies = (event) => {
+            const update = JSON.parse(event.data);
+            const patchTallies = (requests) => requests.map((request) => (
+                request.id === update.id
+                    ? { ...request, approved_votes_count: update.approved_count, rejected_votes_count: update.rejected_count }
+                    : request
+            ));
+            setVotingRequests(patchTallies);
+            setInitiatedRequests(patchTallies);
+        };
+
+        return openVotingStream(authToken, {
+            'voting_request.updated': handleTallies,
+            'voting_request.created': fetchUserData,
+            'voting_request.settled': fetchUserData,
+            'resync': fetchUserData,
+        }, fetchUserData);
+    }, [authToken, userRole, fetchUserData]);
+
+    // --- Fetch Archived Initiated Requests (on demand, a page at a time) ---
+    const fetchArchivedRequests = async (url) => {
+        setArchivedLoading(true);
+        setError('');
+
+        const backendIp = '127.0.0.1';
+        const backendPort = '8000';
+
+        const headers = {
+            Authorization: `Token ${authToken}`,
+        };
+
+        try {
+            console.log("DashboardPage: Attempting to fetch archived initiated requests...");
+            const response = await axios.get(url || `http://${backendIp}:${backendPort}/api/my-initiated-voting-requests/?archived=true`, { headers });
+            console.log("DashboardPage: Archived initiated requests fetched:", response.data);
+            setArchivedRequests((previous) => (url && previous ? [...previous, ...response.data.results] : response.data.results));
+            setArchivedNext(response.data.next);
+        } catch (err) {
+            console.error("DashboardPage: Error fetching archived requests:", err.response ? err.response.data : err.message);
+            let errorMessage = 'Failed to fetch archived requests.';
+            if (err.response && err.response.data && err.response.data.detail) {
+                errorMessage = `Error: ${err.response.data.detail}`;
+            }
+            setError(errorMessage);
+        } finally {
+            setArchivedLoading(false);
+        }
+    };
+
     // --- Handle Logout ---
     const handleLogout = () => {
         localStorage.removeItem('authToken');
@@ -352,6 +413,51 @@ function DashboardPage() {
                     )}
                 </div>
 
+                {/* --- Archived Initiated Requests Section --- */}
+                <div style={{ marginBottom: '2rem', textAlign: 'left' }}>
+                    <h3 className="heading-small" style={{ marginBottom: '1rem' }}>Archived Requests</h3>
+                    {archivedRequests === null ? (
+                        <button
+                            onClick={() => fetchArchivedRequests()}
+                            className="btn btn-secondary btn-small"
+                            disabled={archivedLoading}
+                        >
+                            <span>{archivedLoading ? 'Loading...' : 'Show Archived Requests'}</span>
+                        </button>
+                    ) : archivedRequests.length > 0 ? (
+                        <>
+                            <ul style={{ listStyle: 'none', padding: 0 }}>
+                                {archivedRequests.map(request => (
+                                    <li key={request.id} style={{ borderBottom: '1px solid var(--border-color)', padding: '10px 0', marginBottom: '5px' }}>
+                                        <p><strong>Request Type:</strong> {request.request_type}</p>
+                                        <p><strong>Society:</strong> {request.society.name}</p>
+                                        <p><strong>Status:</strong> {request.status}</p>
+                                        {request.request_type === 'resident_join' && request.resident_user && (
+                                            <p><strong>Target User:</strong> {request.resident_user.username}</p>
+                                        )}
+                                        {request.request_type === 'provider_list' && request.service_provider && (
+                                            <p><strong>Target Provider:</strong> {request.service_provider.name}</p>
+                                        )}
+                                        <p><strong>Closed:</strong> {new Date(request.updated_at).toLocaleString()}</p>
+                                        <p><strong>Votes:</strong> {request.approved_votes_count} Approve, {request.rejected_votes_count} Reject</p>
+                                    </li>
+                                ))}
+                            </ul>
+                            {archivedNext && (
+                                <button
+                                    onClick={() => fetchArchivedRequests(archivedNext)}
+                                    className="btn btn-secondary btn-small"
+                                    disabled={archivedLoading}
+                                >
+                                    <span>{archivedLoading ? 'Loading...' : 'Load More'}</span>
+                                </button>
+                            )}
+                        </>
+                    ) : (
+                        <p>You have no archived requests.</p>
+                    )}
+                </div>
+
                 {/* Logout Button */}
                 <button onClick={handleLogout} className="btn btn-primary" style={{ marginTop: '2rem', backgroundColor: '#f44336' }}>
                     <span>Logout</span>
@@ -2,6 +2,7 @@
 import React, { useEffect, useState, useCallback } from 'react';
 import axios from 'axios';
 import { useNavigate } from 'react-router-dom';
+import { fetchAllPages } from '../utils/pagination';
 
 function ProfilePage() {
     const [userProfile, setUserProfile] = useState(null); // For resident profile
@@ -54,9 +55,9 @@ function ProfilePage() {
 
                 // For residents, initiated requests are join requests
                 console.log("ProfilePage: Fetching initiated requests for resident...");
-                const requestsResponse = await axios.get('http://172.17.0.1:8000/api/my-initiated-voting-requests/', { headers });
+                const requestsList = await fetchAllPages('http://172.17.0.1:8000/api/my-initiated-voting-requests/', { headers });
                  // Filter for resident_join requests if needed, though backend might already filter by initiated_by
-                 const residentJoinRequests = requestsResponse.data.filter(req => req.request_type === 'resident_join');
+                 const residentJoinRequests = requestsList.filter(req => req.request_type === 'resident_join');
                  console.log("ProfilePage: Initiated resident join requests fetched:", residentJoinRequests);
                  setInitiatedRequests(residentJoinRequests);
 
@@ -4,6 +4,8 @@ import axios from 'axios';
 import { useNavigate } from 'react-router-dom';
 import { useTheme } from '../contexts/ThemeContext';
 import '../App.css';
+import { openVotingStream } from '../utils/votingStream';
+import { fetchAllPages } from '../utils/pagination';
 
 function ProviderDashboardPage() {
     const [serviceProviderProfile, setServiceProviderProfile] = useState(null);
@@ -48,15 +50,15 @@ function ProviderDashboardPage() {
 
             console.log("ProviderDashboardPage: Attempting to fetch initiated voting requests...");
             // Fetch voting requests initiated by this provider
-            const initiatedRequestsResponse = await axios.get(`http://${backendIp}:${backendPort}/api/my-initiated-voting-requests/`, { headers });
-            console.log("ProviderDashboardPage: Initiated voting requests fetched:", initiatedRequestsResponse.data);
-            setInitiatedRequests(initiatedRequestsResponse.data);
+            const initiatedRequestsList = await fetchAllPages(`http://${backendIp}:${backendPort}/api/my-initiated-voting-requests/`, { headers });
+            console.log("ProviderDashboardPage: Initiated voting requests fetched:", initiatedRequestsList);
+            setInitiatedRequests(initiatedRequestsList);
 
             console.log("ProviderDashboardPage: Attempting to fetch societies available for listing...");
             // Fetch societies available for the provider to list services in (now filtered by location)
-            const availableSocietiesResponse = await axios.get(`http://${backendIp}:${backendPort}/api/societies/available-for-provider/`, { headers });
-            console.log("ProviderDashboardPage: Available societies for provider fetched:", availableSocietiesResponse.data);
-            setAvailableSocietiesForProvider(availableSocietiesResponse.data);
+            const availableSocietiesList = await fetchAllPages(`http://${backendIp}:${backendPort}/api/societies/available-for-provider/`, { headers });
+            console.log("ProviderDashboardPage: Available societies for provider fetched:", availableSocietiesList);
+            setAvailableSocietiesForProvider(availableSocietiesList);
 
         } catch (err) {
             console.error("ProviderDashboardPage: Error fetching provider data:", err.response ? err.response.data : err.message);
@@ -82,6 +84,31 @@ function ProviderDashboardPage() {
         fetchProviderData();
     }, [fetchProviderData]);
 
+    // --- Live voting updates (server-sent events) ---
+    useEffect(() => {
+        if (!authToken || userRole !== 'provider') {
+            return undefined;
+        }
+
+        // Tally changes are applied in place; anything else refetches the lists
+        const handleTallies = (event) => {
+            const update = JSON.parse(event.data);
+            const patchTallies = (requests) => requests.map((request) => (
+                request.id === update.id
+                    ? { ...request, approved_votes_count: update.approved_count, rejected_votes_count: update.rejected_count }
+                    : request
+            ));
+            setInitiatedRequests(patchTallies);
+        };
+
+        return openVotingStream(authToken, {
+            'voting_request.updated': handleTallies,
+            'voting_request.created': fetchProviderData,
+            'voting_request.settled': fetchProviderData,
+            'resync': fetchProviderData,
+        }, fetchProviderData);
+    }, [authToken, userRole, fetchProviderData]);
+
     // --- Handle Logout ---
     const handleLogout = () => {
         localStorage.removeItem('authToken');
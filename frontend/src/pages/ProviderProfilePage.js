@@ -2,6 +2,7 @@
 import React, { useEffect, useState, useCallback } from 'react';
 import axios from 'axios';
 import { useNavigate } from 'react-router-dom';
+import { fetchAllPages } from '../utils/pagination';
 
 function ProviderProfilePage() {
     const [providerProfile, setProviderProfile] = useState(null); // For provider profile
@@ -62,17 +63,17 @@ function ProviderProfilePage() {
 
                 console.log("ProviderProfilePage: Fetching initiated requests for provider...");
                 // Fetch initiated voting requests (filtered for provider listing requests)
-                const requestsResponse = await axios.get('http://127.0.0.1:8000/api/my-initiated-voting-requests/', { headers });
+                const requestsList = await fetchAllPages('http://127.0.0.1:8000/api/my-initiated-voting-requests/', { headers });
                 // Filter for provider_list requests if needed (backend should handle this based on initiated_by)
-                const providerListingRequests = requestsResponse.data.filter(req => req.request_type === 'provider_list');
+                const providerListingRequests = requestsList.filter(req => req.request_type === 'provider_list');
                 console.log("ProviderProfilePage: Initiated provider listing requests fetched:", providerListingRequests);
                 setInitiatedRequests(providerListingRequests);
 
                  console.log("ProviderProfilePage: Fetching all services...");
                  // Fetch all services to populate the service selection for editing
-                 const servicesResponse = await axios.get('http://127.0.0.1:8000/api/services/', { headers }); // Assuming services endpoint is protected
-                 console.log("ProviderProfilePage: All services fetched:", servicesResponse.data);
-                 setAllServices(servicesResponse.data);
+                 const servicesList = await fetchAllPages('http://127.0.0.1:8000/api/services/', { headers }); // Assuming services endpoint is protected
+                 console.log("ProviderProfilePage: All services fetched:", servicesList);
+                 setAllServices(servicesList);
 
 
              } else if (userRole === 'resident') {
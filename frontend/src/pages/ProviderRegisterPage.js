@@ -5,6 +5,7 @@ import { Link, useNavigate } from 'react-router-dom';
 import { useTheme } from '../contexts/ThemeContext';
 import LocationSelector from '../components/LocationSelector';
 import '../App.css';
+import { fetchAllPages } from '../utils/pagination';
 
 function ProviderRegisterPage() {
   const [formData, setFormData] = useState({
@@ -35,9 +36,9 @@ function ProviderRegisterPage() {
   useEffect(() => {
     const fetchServices = async () => {
       try {
-        const response = await axios.get(`http://${backendIp}:${backendPort}/api/services/`);
-        console.log("Services fetched:", response.data);
-        setServices(response.data);
+        const services = await fetchAllPages(`http://${backendIp}:${backendPort}/api/services/`);
+        console.log("Services fetched:", services);
+        setServices(services);
       } catch (err) {
         console.error("Error fetching services:", err);
         setError('Failed to load services. Please refresh the page.');
@@ -5,6 +5,7 @@ import { Link, useNavigate } from 'react-router-dom';
 import { useTheme } from '../contexts/ThemeContext';
 import LocationSelector from '../components/LocationSelector';
 import '../App.css';
+import { fetchAllPages } from '../utils/pagination';
 
 function ResidentRegisterPage() {
   const [formData, setFormData] = useState({
@@ -40,10 +41,10 @@ function ResidentRegisterPage() {
 
   const fetchAvailableSocieties = async () => {
     try {
-      const response = await axios.get(
+      const societies = await fetchAllPages(
         `http://${backendIp}:${backendPort}/api/societies/?country_id=${formData.country_id}&state_id=${formData.state_id}&district_id=${formData.district_id}&circle_id=${formData.circle_id}`
       );
-      setAvailableSocieties(response.data);
+      setAvailableSocieties(societies);
     } catch (error) {
       console.error('Error fetching societies:', error);
       setAvailableSocieties([]);
@@ -4,6 +4,7 @@ import axios from 'axios';
 import { useParams, useNavigate, Link } from 'react-router-dom'; // Import Link
 import { useTheme } from '../contexts/ThemeContext'; // Import useTheme
 import '../App.css'; // Import the central CSS file
+import { fetchAllPages } from '../utils/pagination';
 
 
 function SocietyDetailPage() {
@@ -101,9 +102,9 @@ function SocietyDetailPage() {
 
         try {
             console.log(`SocietyDetailPage: Attempting to fetch service providers from URL: ${apiUrl}`); // Log the full URL
-            const providersResponse = await axios.get(apiUrl, { headers });
-            console.log("SocietyDetailPage: Service providers for category fetched successfully:", providersResponse.data); // Log successful response
-            setServiceProviders(providersResponse.data);
+            const providersList = await fetchAllPages(apiUrl, { headers });
+            console.log("SocietyDetailPage: Service providers for category fetched successfully:", providersList); // Log successful response
+            setServiceProviders(providersList);
 
         } catch (err) {
             console.error("SocietyDetailPage: Error fetching service providers:", err.response ? err.response.data : err.message);
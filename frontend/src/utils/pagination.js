@@ -0,0 +1,15 @@
+// frontend/src/utils/pagination.js
+import axios from 'axios';
+
+// Collects every page of a paginated list endpoint by following `next`
+// until the backend reports no more pages. Returns the combined results.
+export async function fetchAllPages(url, config) {
+    const results = [];
+    let next = url;
+    while (next) {
+        const response = await axios.get(next, config);
+        results.push(...response.data.results);
+        next = response.data.next;
+    }
+    return results;
+}
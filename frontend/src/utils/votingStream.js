@@ -0,0 +1,67 @@
+// frontend/src/utils/votingStream.js
+import axios from 'axios';
+
+const backendIp = '127.0.0.1';
+const backendPort = '8000';
+
+// Used when the backend is not served under ASGI and has no live stream
+const POLL_INTERVAL_MS = 30000;
+const RECONNECT_DELAY_MS = 5000;
+
+// Subscribes to live voting updates. `handlers` maps event names to callbacks;
+// `onPoll` is called periodically instead when the backend cannot stream.
+// Returns a function that stops everything.
+export function openVotingStream(authToken, handlers, onPoll) {
+    let source = null;
+    let timer = null;
+    let closed = false;
+
+    const connect = async () => {
+        let response;
+        try {
+            // EventSource cannot send headers, so the stream takes a short-lived ticket instead of the token
+            response = await axios.post(
+                `http://${backendIp}:${backendPort}/api/votingrequests/stream-ticket/`,
+                {},
+                { headers: { Authorization: `Token ${authToken}` } }
+            );
+        } catch (err) {
+            console.error("votingStream: Could not get a stream ticket:", err.response ? err.response.data : err.message);
+            if (!closed) {
+                timer = setTimeout(connect, RECONNECT_DELAY_MS);
+            }
+            return;
+        }
+        if (closed) {
+            return;
+        }
+
+        if (response.status === 204) {
+            console.log("votingStream: Live updates unavailable; polling instead.");
+            timer = setInterval(onPoll, POLL_INTERVAL_MS);
+            return;
+        }
+
+        source = new EventSource(`http://${backendIp}:${backendPort}/api/votingrequests/stream/?ticket=${encodeURIComponent(response.data.ticket)}`);
+        Object.entries(handlers).forEach(([name, handler]) => source.addEventListener(name, handler));
+        // The ticket has expired by the time EventSource would retry, so reconnect with a new one
+        source.onerror = () => {
+            source.close();
+            if (!closed) {
+                onPoll();
+                timer = setTimeout(connect, RECONNECT_DELAY_MS);
+            }
+        };
+    };
+
+    connect();
+
+    return () => {
+        closed = true;
+        clearTimeout(timer);
+        clearInterval(timer);
+        if (source) {
+            source.close();
+        }
+    };
+}